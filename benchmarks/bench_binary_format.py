@@ -0,0 +1,107 @@
+"""Size, save time and load time of a graph in the JSON and binary
+formats, with a round-trip check.
+
+"parse" decodes the file only (`json.loads` or `BinaryGraphData`),
+"load" also builds the nodes and edges of the graph.
+
+Usage:
+    python benchmarks/bench_binary_format.py
+"""
+import json
+import random
+import time
+
+from easynode.core import Graph, Node, Port, DataPort
+from easynode.utils.binary_format import (
+    BinaryGraphData, dump_graph_binary, load_graph_binary,
+)
+from easynode.utils.serialization import (
+    load_graph, serialize_nodes_and_edges,
+)
+
+
+class Source(Node):
+    input_ports = [DataPort(name="value", data_type=int), Port(name="in")]
+    output_ports = [Port(name="out")]
+
+
+class Mix(Node):
+    input_ports = [Port(name="a"), Port(name="b")]
+    output_ports = [Port(name="out"), Port(name="rest")]
+
+
+def build(n: int, seed: int = 0) -> Graph:
+    rng = random.Random(seed)
+    graph = Graph()
+    nodes = [Source() if i % 2 else Mix() for i in range(n)]
+    for i, node in enumerate(nodes):
+        node.attrs['pos'] = [rng.uniform(0, 1e4), rng.uniform(0, 1e4)]
+        if isinstance(node, Source):
+            node.input_ports[0].value = rng.randrange(4)
+    graph.add_nodes(*nodes)
+    graph.add_edges(*[
+        nodes[rng.randrange(i)].create_edge(nodes[i], 0, 1)
+        for i in range(1, n)
+    ])
+    return graph
+
+
+def summary(graph: Graph) -> tuple:
+    index = {id(node): i for i, node in enumerate(graph.nodes)}
+    return (
+        [(n.type_name(), n.name, n.attrs,
+          [getattr(p, "value", None) for p in n.input_ports])
+         for n in graph.nodes],
+        sorted(
+            (index[id(e.source_port.node)], e.source_port.index,
+             index[id(e.target_port.node)], e.target_port.index)
+            for e in graph.edges),
+    )
+
+
+def timed(func, repeat: int = 3) -> tuple:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    factories = {"Source": Source, "Mix": Mix}
+    print(f"{'nodes':>7} {'format':>12} {'size':>9} {'save':>7} "
+          f"{'parse':>7} {'load':>7}")
+    for n in (10_000, 50_000):
+        graph = build(n)
+        expected = summary(graph)
+        rows = []
+        t_save, text = timed(lambda: json.dumps(
+            serialize_nodes_and_edges(graph.nodes, graph.edges)))
+        t_parse, _ = timed(lambda: json.loads(text))
+        t_load, loaded = timed(
+            lambda: load_graph(json.loads(text), factories))
+        assert summary(loaded) == expected
+        rows.append(("json", len(text.encode()), t_save, t_parse, t_load))
+        for compression in (None, "zlib", "lzma"):
+            t_save, blob = timed(lambda: dump_graph_binary(
+                graph.nodes, graph.edges, compression))
+            t_parse, _ = timed(lambda: BinaryGraphData(blob))
+            t_load, loaded = timed(
+                lambda: load_graph_binary(blob, factories))
+            assert summary(loaded) == expected
+            rows.append((
+                f"binary/{compression or 'raw'}", len(blob),
+                t_save, t_parse, t_load))
+        for name, size, t_save, t_parse, t_load in rows:
+            print(f"{n:>7} {name:>12} {size / 2**20:>7.2f}MB "
+                  f"{t_save:>6.2f}s {t_parse:>6.3f}s {t_load:>6.2f}s")
+        json_row, raw_row = rows[0], rows[1]
+        print(f"{'':>7} raw binary: {json_row[1] / raw_row[1]:.0f}x smaller, "
+              f"save {json_row[2] / raw_row[2]:.1f}x faster, "
+              f"parse {json_row[3] / raw_row[3]:.0f}x faster, "
+              f"load {json_row[4] / raw_row[4]:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
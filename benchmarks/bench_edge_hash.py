@@ -0,0 +1,51 @@
+"""Cost of hashing and serializing edges on nodes with many ports.
+
+Port indices are assigned when the node is created, so the per-edge
+cost should not depend on the number of ports.
+
+Usage:
+    python benchmarks/bench_edge_hash.py
+"""
+import time
+
+from easynode.model import Node, Port
+from easynode.utils.serialization import serialize_edge
+
+
+def make_node_class(n_ports: int):
+    return type(f"Node{n_ports}", (Node,), {
+        "input_ports": [Port(name=f"in{i}") for i in range(n_ports)],
+        "output_ports": [Port(name=f"out{i}") for i in range(n_ports)],
+    })
+
+
+def bench(n_ports: int, repeat: int = 20):
+    cls = make_node_class(n_ports)
+    a, b = cls(), cls()
+    # connect the last ports, the worst case for a list.index lookup
+    edges = [
+        a.create_edge(b, n_ports - 1 - i, n_ports - 1 - i)
+        for i in range(min(n_ports, 100))
+    ]
+    n_ops = len(edges) * repeat
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        set(edges)
+    t_hash = (time.perf_counter() - t0) / n_ops
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        for e in edges:
+            serialize_edge(e)
+    t_ser = (time.perf_counter() - t0) / n_ops
+    return t_hash, t_ser
+
+
+def main():
+    print(f"{'ports':>8} {'hash':>10} {'serialize':>10}   (us / edge)")
+    for n_ports in (10, 100, 1_000, 5_000):
+        t_hash, t_ser = bench(n_ports)
+        print(f"{n_ports:>8} {t_hash * 1e6:>10.3f} {t_ser * 1e6:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
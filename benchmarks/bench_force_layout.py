@@ -0,0 +1,58 @@
+"""Cost of a force-directed layout iteration, Barnes–Hut vs all pairs.
+
+The Barnes–Hut time per node should grow slowly (O(N log N) per
+iteration), while the all pairs repulsion grows linearly per node.
+
+Usage:
+    python benchmarks/bench_force_layout.py
+"""
+import time
+
+import numpy as np
+
+from easynode.utils.force import _QuadTree
+
+
+def all_pairs(pos: np.ndarray, radius: np.ndarray, k: float) -> np.ndarray:
+    """Exact repulsion, in blocks of rows to bound the memory."""
+    disp = np.zeros_like(pos)
+    for lo in range(0, len(pos), 1000):
+        delta = pos[lo:lo + 1000, None] - pos[None]
+        dist = np.hypot(delta[..., 0], delta[..., 1])
+        gap = np.maximum(
+            dist - radius[lo:lo + 1000, None] - radius[None], 0.01 * k)
+        scale = k * k / (gap * np.maximum(dist, 1e-9))
+        scale[dist == 0] = 0
+        disp[lo:lo + 1000] = (delta * scale[..., None]).sum(axis=1)
+    return disp
+
+
+def main():
+    rng = np.random.default_rng(0)
+    k = 75.0
+    print(f"{'nodes':>8} {'barnes-hut':>11} {'all pairs':>10} "
+          f"{'us/node':>8} {'error':>7}")
+    for n in (1_000, 4_000, 16_000, 64_000):
+        pos = rng.uniform(0, 2 * k * np.sqrt(n), (n, 2))
+        radius = np.full(n, 55.0)
+        depth = int(np.ceil(np.log2(n) / 2)) + 1
+        t0 = time.perf_counter()
+        tree = _QuadTree(pos, radius, depth)
+        approx = tree.repulsion(k, 0.8)
+        t_bh = time.perf_counter() - t0
+        if n <= 4_000:
+            t0 = time.perf_counter()
+            exact = all_pairs(pos, radius, k)
+            t_ap = f"{(time.perf_counter() - t0) * 1e3:>8.0f}ms"
+            err = np.median(
+                np.linalg.norm(approx - exact, axis=1) /
+                np.linalg.norm(exact, axis=1))
+            err_s = f"{err:>7.3f}"
+        else:
+            t_ap, err_s = f"{'-':>10}", f"{'-':>7}"
+        print(f"{n:>8} {t_bh * 1e3:>9.0f}ms {t_ap} "
+              f"{t_bh / n * 1e6:>8.1f} {err_s}")
+
+
+if __name__ == "__main__":
+    main()
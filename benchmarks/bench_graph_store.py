@@ -0,0 +1,65 @@
+"""Cost of adding and removing nodes/edges as the graph grows.
+
+The per-operation time should stay roughly flat across sizes.
+
+Usage:
+    python benchmarks/bench_graph_store.py
+"""
+import time
+
+from easynode.model import Node, Port, Graph
+
+
+class ChainNode(Node):
+    input_ports = [Port(name="in")]
+    output_ports = [Port(name="out")]
+
+
+def build_chain(n: int):
+    graph = Graph()
+    nodes = [ChainNode() for _ in range(n)]
+    graph.add_nodes(*nodes)
+    edges = [
+        nodes[i].create_edge(nodes[i + 1], 0, 0)
+        for i in range(n - 1)
+    ]
+    graph.add_edges(*edges)
+    return graph, nodes, edges
+
+
+def bench(n: int, n_ops: int = 500):
+    graph, nodes, edges = build_chain(n)
+    # add: extra nodes appended to a graph of size n
+    extra = [ChainNode() for _ in range(n_ops)]
+    t0 = time.perf_counter()
+    for node in extra:
+        graph.add_node(node)
+    t_add = (time.perf_counter() - t0) / n_ops
+    # membership + remove of edges spread over the graph
+    step = max(1, len(edges) // n_ops)
+    to_remove = edges[::step][:n_ops]
+    t0 = time.perf_counter()
+    for edge in to_remove:
+        graph.remove_edge(edge)
+    t_rm_edge = (time.perf_counter() - t0) / len(to_remove)
+    # remove nodes spread over the graph
+    step = max(1, len(nodes) // n_ops)
+    to_remove_nodes = nodes[::step][:n_ops]
+    t0 = time.perf_counter()
+    for node in to_remove_nodes:
+        graph.remove_node(node)
+    t_rm_node = (time.perf_counter() - t0) / len(to_remove_nodes)
+    return t_add, t_rm_edge, t_rm_node
+
+
+def main():
+    print(f"{'nodes':>8} {'add_node':>12} {'remove_edge':>12} "
+          f"{'remove_node':>12}   (us / op)")
+    for n in (1_000, 5_000, 20_000, 50_000):
+        t_add, t_rm_edge, t_rm_node = bench(n)
+        print(f"{n:>8} {t_add * 1e6:>12.2f} {t_rm_edge * 1e6:>12.2f} "
+              f"{t_rm_node * 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Full vs incremental layout after adding nodes to a large graph.
+
+Adds nodes one at a time to a laid out graph, each connected to two
+existing nodes, and compares the cost of placing them incrementally
+with laying out the whole graph again.
+
+Usage:
+    python benchmarks/bench_incremental_layout.py
+"""
+import random
+import time
+
+from easynode.core import Graph, Node, Port
+from easynode.utils.incremental import IncrementalLayout
+from easynode.utils.sugiyama import sugiyama_layout
+
+
+class MergeNode(Node):
+    input_ports = [Port(name="in1"), Port(name="in2")]
+    output_ports = [Port(name="out")]
+
+
+def build(n: int, seed: int = 0) -> Graph:
+    rng = random.Random(seed)
+    graph = Graph()
+    nodes = [MergeNode() for _ in range(n)]
+    graph.add_nodes(*nodes)
+    graph.add_edges(*[
+        nodes[rng.randrange(max(0, i - 50), i)].create_edge(
+            nodes[i], 0, rng.randrange(2))
+        for i in range(1, n)
+    ])
+    return graph
+
+
+def main():
+    rng = random.Random(1)
+    n_added = 100
+    print(f"{'nodes':>7} {'full':>10} {'incremental':>12} {'moved':>6}")
+    for n in (1_000, 5_000, 20_000):
+        graph = build(n)
+        nodes = list(graph.nodes)
+        sizes = {node.id: (120.0, 60.0) for node in nodes}
+        t0 = time.perf_counter()
+        positions = sugiyama_layout(nodes, sizes)
+        t_full = time.perf_counter() - t0
+        layout = IncrementalLayout()
+        layout.reset(positions, sizes)
+        before = dict(layout.positions)
+        t_inc = 0.0
+        for _ in range(n_added):
+            node = MergeNode()
+            graph.add_nodes(node)
+            graph.add_edges(
+                rng.choice(nodes).create_edge(node, 0, 0),
+                rng.choice(nodes).create_edge(node, 0, 1))
+            sizes[node.id] = (120.0, 60.0)
+            t0 = time.perf_counter()
+            layout.update(graph.nodes, sizes)
+            t_inc += time.perf_counter() - t0
+        moved = sum(layout.positions[k] != v for k, v in before.items())
+        print(f"{n:>7} {t_full * 1e3:>8.1f}ms "
+              f"{t_inc / n_added * 1e3:>10.2f}ms {moved:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Time of saving a large graph after a few edits, by writing the whole
+graph vs appending the patch since the previous save, and of applying
+that patch to another copy of the graph.
+
+Usage:
+    python benchmarks/bench_incremental_save.py
+"""
+import json
+import os
+import random
+import tempfile
+import time
+
+from easynode.core import Graph, Node, Port, DataPort
+from easynode.utils.graph_diff import IncrementalSaver
+from easynode.utils.serialization import serialize_nodes_and_edges
+
+
+class Source(Node):
+    input_ports = [DataPort(name="value", data_type=int), Port(name="in")]
+    output_ports = [Port(name="out")]
+
+
+def build(n: int, seed: int = 0) -> Graph:
+    rng = random.Random(seed)
+    graph = Graph()
+    nodes = [Source(pos=[rng.uniform(0, 1e4), rng.uniform(0, 1e4)])
+             for _ in range(n)]
+    graph.add_nodes(*nodes)
+    graph.add_edges(*[
+        nodes[rng.randrange(i)].create_edge(nodes[i], 0, 1)
+        for i in range(1, n)
+    ])
+    return graph
+
+
+def edit(graph: Graph, rng: random.Random, count: int):
+    """Move, rename, reconnect and add a few nodes."""
+    nodes = list(graph.nodes)
+    for node in rng.sample(nodes, count):
+        node.attrs['pos'] = [rng.uniform(0, 1e4), rng.uniform(0, 1e4)]
+    rng.choice(nodes).name = "renamed"
+    rng.choice(nodes).input_ports[0].value = 42
+    new = Source(pos=[0.0, 0.0])
+    graph.add_node(new)
+    graph.add_edge(rng.choice(nodes).create_edge(new, 0, 1))
+
+
+def main():
+    factories = {"Source": Source}
+    tmp = tempfile.mkdtemp()
+    print(f"{'nodes':>7} {'edits':>6} {'full save':>10} {'patch save':>11} "
+          f"{'patch':>8} {'apply':>8}")
+    for n in (10_000, 50_000):
+        graph = build(n)
+        path = os.path.join(tmp, f"graph_{n}.json")
+        saver = IncrementalSaver(graph, path)
+        saver.save_all()
+        copy = Graph.deserialize(
+            json.dumps(serialize_nodes_and_edges(graph.nodes, graph.edges)),
+            factories)
+        rng = random.Random(1)
+        for count in (1, 10, 100):
+            edit(graph, rng, count)
+            t0 = time.perf_counter()
+            patch = saver.save()
+            t_patch = time.perf_counter() - t0
+            assert patch is not None
+            size = len(json.dumps(patch))
+            t0 = time.perf_counter()
+            copy.apply_patch(patch, factories)
+            t_apply = time.perf_counter() - t0
+            t0 = time.perf_counter()
+            with open(path + ".full", "w") as f:
+                json.dump(serialize_nodes_and_edges(
+                    graph.nodes, graph.edges), f)
+            t_full = time.perf_counter() - t0
+            print(f"{n:>7} {count + 3:>6} {t_full:>9.3f}s {t_patch:>10.3f}s "
+                  f"{size / 2**10:>6.1f}KB {t_apply * 1e3:>6.2f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Cost of an autosave of a large graph in the editor after an edit,
+by appending the edit to the journal vs writing a snapshot, and time of
+recovering the graph from the snapshot and its journal.
+
+Needs a Qt binding, runs offscreen. Graphs are loaded with lazy items.
+
+Usage:
+    python benchmarks/bench_journal.py
+"""
+import json
+import os
+import random
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+def main():
+    from qtpy import QtWidgets
+    app = QtWidgets.QApplication([])
+    from easynode import NodeEditor
+    from easynode.command import NodeRenameCommand
+    from easynode.model import Node, Port, DataPort
+    from easynode.utils.serialization import serialize_nodes_and_edges
+
+    class Source(Node):
+        input_ports = [DataPort(name="value", data_type=int), Port("in")]
+        output_ports = [Port(name="out")]
+
+    tmp = tempfile.mkdtemp()
+    print(f"{'nodes':>7} {'snapshot':>9} {'journal':>9} {'edits':>6} "
+          f"{'load':>7} {'recover':>8}")
+    for n in (10_000, 50_000):
+        rng = random.Random(0)
+        nodes = [Source() for _ in range(n)]
+        for i, node in enumerate(nodes):
+            node.attrs['pos'] = [(i % 200) * 300.0, (i // 200) * 150.0]
+        edges = [
+            nodes[rng.randrange(i)].create_edge(nodes[i], 0, 1)
+            for i in range(1, n)]
+        text = json.dumps(serialize_nodes_and_edges(nodes, edges))
+        del nodes, edges
+        editor = NodeEditor()
+        editor.register_factory(Source)
+        editor.load_graph(text, lazy=True)
+        graph = editor.current_scene.graph
+        view = editor.current_view
+        path = os.path.join(tmp, f"graph_{n}.json")
+        journal = graph.enable_journal(path, max_ratio=1e9)
+        t0 = time.perf_counter()
+        journal.snapshot()
+        t_snapshot = time.perf_counter() - t0
+        # one rename and one port edit per autosave
+        edits = 100
+        t_journal = 0.0
+        for k in range(edits):
+            node = graph.nodes[rng.randrange(n)]
+            old_name = node.name
+            node.name = f"node {k}"
+            view.undo_stack.push(
+                NodeRenameCommand(view, node, old_name, node.name))
+            graph.nodes[rng.randrange(n)].input_ports[0].value = k
+            t0 = time.perf_counter()
+            journal.flush()
+            t_journal += time.perf_counter() - t0
+        journal.close()
+        loaded = NodeEditor()
+        loaded.register_factory(Source)
+        t0 = time.perf_counter()
+        loaded.load_graph_from_json_file(path, lazy=True)
+        t_load = time.perf_counter() - t0
+        recovered = NodeEditor()
+        recovered.register_factory(Source)
+        t0 = time.perf_counter()
+        recovered.load_journaled_graph(path, lazy=True).close()
+        t_recover = time.perf_counter() - t0
+        print(f"{n:>7} {t_snapshot:>8.3f}s {t_journal / edits * 1e3:>7.2f}ms "
+              f"{edits:>6} {t_load:>6.2f}s {t_recover:>7.2f}s")
+    del app
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Peak memory and time of loading a large JSON graph file, whole vs
+streamed.
+
+Usage:
+    python benchmarks/bench_json_loading.py
+"""
+import json
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+from easynode.core import Graph, Node, Port, DataPort
+from easynode.utils.serialization import (
+    load_graph, load_graph_file, serialize_nodes_and_edges,
+)
+
+
+class Source(Node):
+    input_ports = [DataPort(name="value", data_type=int), Port(name="in")]
+    output_ports = [Port(name="out")]
+
+
+def build(n: int, seed: int = 0) -> Graph:
+    rng = random.Random(seed)
+    graph = Graph()
+    nodes = [Source() for _ in range(n)]
+    graph.add_nodes(*nodes)
+    graph.add_edges(*[
+        nodes[rng.randrange(i)].create_edge(nodes[i], 0, 1)
+        for i in range(1, n)
+    ])
+    return graph
+
+
+def measure(load) -> tuple:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    graph = load()
+    dt = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del graph
+    return dt, peak
+
+
+def main():
+    print(f"{'nodes':>7} {'file':>8} {'loader':>10} {'time':>8} {'peak':>8}")
+    for n in (10_000, 50_000):
+        graph = build(n)
+        fd, path = tempfile.mkstemp(suffix=".json")
+        with os.fdopen(fd, "w") as f:
+            json.dump(serialize_nodes_and_edges(graph.nodes, graph.edges), f)
+        size = os.path.getsize(path) / 2**20
+
+        def whole():
+            with open(path) as f:
+                return load_graph(json.loads(f.read()))
+
+        for name, load in (
+                ("json.loads", whole),
+                ("streamed", lambda: load_graph_file(path))):
+            dt, peak = measure(load)
+            print(f"{n:>7} {size:>6.0f}MB {name:>10} {dt:>7.2f}s "
+                  f"{peak / 2**20:>6.0f}MB")
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
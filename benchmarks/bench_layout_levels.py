@@ -0,0 +1,73 @@
+"""Cost of computing layout levels on deep, wide and cyclic graphs.
+
+The time per node + edge should stay roughly flat across sizes, and
+deep chains must not hit the recursion limit.
+
+Usage:
+    python benchmarks/bench_layout_levels.py
+"""
+import random
+import time
+
+from easynode.core import Graph, Node, Port
+from easynode.utils.layout import compute_levels
+
+
+class MergeNode(Node):
+    input_ports = [Port(name="in1"), Port(name="in2")]
+    output_ports = [Port(name="out")]
+
+
+def chain(n: int, cycles: int = 0, seed: int = 0) -> Graph:
+    """A chain, with `cycles` back edges to earlier nodes."""
+    rng = random.Random(seed)
+    graph = Graph()
+    nodes = [MergeNode() for _ in range(n)]
+    graph.add_nodes(*nodes)
+    edges = [nodes[i].create_edge(nodes[i + 1], 0, 0) for i in range(n - 1)]
+    for _ in range(cycles):
+        i = rng.randrange(1, n)
+        edges.append(nodes[i].create_edge(nodes[rng.randrange(i)], 0, 1))
+    graph.add_edges(*edges)
+    return graph
+
+
+def wide_dag(n_levels: int, width: int, seed: int = 0) -> Graph:
+    """Levels of `width` nodes, each fed by two nodes of the previous
+    level."""
+    rng = random.Random(seed)
+    graph = Graph()
+    levels = [[MergeNode() for _ in range(width)] for _ in range(n_levels)]
+    graph.add_nodes(*[n for level in levels for n in level])
+    edges = []
+    for prev, level in zip(levels, levels[1:]):
+        for node in level:
+            edges.append(rng.choice(prev).create_edge(node, 0, 0))
+            edges.append(rng.choice(prev).create_edge(node, 0, 1))
+    graph.add_edges(*edges)
+    return graph
+
+
+def main():
+    cases = [
+        ("chain", lambda: chain(10_000)),
+        ("chain", lambda: chain(100_000)),
+        ("wide DAG", lambda: wide_dag(100, 1_000)),
+        ("wide DAG", lambda: wide_dag(10, 10_000)),
+        ("cyclic chain", lambda: chain(100_000, cycles=1_000)),
+    ]
+    print(f"{'graph':>14} {'nodes':>8} {'edges':>8} {'time':>10} "
+          f"{'ns/elem':>8} {'feedback':>9}")
+    for name, build in cases:
+        graph = build()
+        t0 = time.perf_counter()
+        levels, feedback = compute_levels(graph.nodes)
+        dt = time.perf_counter() - t0
+        n_elem = len(graph.nodes) + len(graph.edges)
+        print(f"{name:>14} {len(graph.nodes):>8} {len(graph.edges):>8} "
+              f"{dt * 1e3:>8.1f}ms {dt / n_elem * 1e9:>8.0f} "
+              f"{len(feedback):>9}")
+
+
+if __name__ == "__main__":
+    main()
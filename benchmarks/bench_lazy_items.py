@@ -0,0 +1,79 @@
+"""Time and memory of opening a large graph in the editor, with all the
+node items created vs with lazy items.
+
+Each case runs in its own process, memory is the growth of its resident
+set size. Needs a Qt binding, runs offscreen.
+
+Usage:
+    python benchmarks/bench_lazy_items.py
+"""
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+
+def rss() -> float:
+    """Resident set size in MB (Linux)."""
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+
+
+def run(n: int, lazy: bool):
+    from qtpy import QtWidgets
+    app = QtWidgets.QApplication([])
+    from easynode import NodeEditor
+    from easynode.model import Node, Port, DataPort
+    from easynode.utils.serialization import serialize_nodes_and_edges
+
+    class Source(Node):
+        input_ports = [DataPort(name="value", data_type=int), Port("in")]
+        output_ports = [Port(name="out")]
+
+    rng = random.Random(0)
+    nodes = [Source() for _ in range(n)]
+    for i, node in enumerate(nodes):
+        node.attrs['pos'] = [(i % 200) * 300.0, (i // 200) * 150.0]
+    edges = [
+        nodes[rng.randrange(max(0, i - 400), i)].create_edge(nodes[i], 0, 1)
+        for i in range(1, n)]
+    text = json.dumps(serialize_nodes_and_edges(nodes, edges))
+    del nodes, edges
+    editor = NodeEditor()
+    editor.register_factory(Source)
+    editor.resize(1200, 800)
+    editor.show()
+    app.processEvents()
+    base = rss()
+    t0 = time.perf_counter()
+    editor.load_graph(text, lazy=lazy)
+    app.processEvents()  # first paint, creates the visible items
+    app.processEvents()
+    dt = time.perf_counter() - t0
+    graph = editor.current_scene.graph
+    items = sum(1 for node in graph.nodes if node.item is not None)
+    print(json.dumps([dt, rss() - base, items]))
+
+
+def main():
+    if len(sys.argv) == 3:
+        run(int(sys.argv[1]), sys.argv[2] == "lazy")
+        return
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    print(f"{'nodes':>7} {'items':>6} {'open':>8} {'memory':>8} "
+          f"{'created':>8}")
+    for n, modes in ((2_000, ("eager", "lazy")), (10_000, ("eager", "lazy")),
+                     (50_000, ("lazy",))):
+        for mode in modes:
+            out = subprocess.run(
+                [sys.executable, __file__, str(n), mode], env=env,
+                capture_output=True, text=True, check=True).stdout
+            dt, mem, items = json.loads(out.strip().splitlines()[-1])
+            print(f"{n:>7} {mode:>6} {dt:>7.2f}s {mem:>6.0f}MB "
+                  f"{items:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Size, save time and load time of JSON graphs with the settings
+written inline in every node and port, vs once in the settings table.
+
+Usage:
+    python benchmarks/bench_settings_table.py
+"""
+import json
+import random
+import time
+
+from easynode.core import Graph, Node, Port, DataPort
+from easynode.utils.serialization import (
+    load_graph, serialize_edge, serialize_node, serialize_nodes_and_edges,
+)
+
+
+class Source(Node):
+    input_ports = [DataPort(name="value", data_type=int), Port(name="in")]
+    output_ports = [Port(name="out")]
+
+
+def build(n: int, seed: int = 0) -> Graph:
+    rng = random.Random(seed)
+    graph = Graph()
+    nodes = [Source() for _ in range(n)]
+    graph.add_nodes(*nodes)
+    graph.add_edges(*[
+        nodes[rng.randrange(i)].create_edge(nodes[i], 0, 1)
+        for i in range(1, n)
+    ])
+    return graph
+
+
+def inline(graph: Graph) -> dict:
+    return {
+        "nodes": [serialize_node(node) for node in graph.nodes],
+        "edges": [serialize_edge(edge) for edge in graph.edges],
+    }
+
+
+def table(graph: Graph) -> dict:
+    return serialize_nodes_and_edges(graph.nodes, graph.edges)
+
+
+def timed(func, repeat: int = 3) -> tuple:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def main():
+    print(f"{'nodes':>7} {'settings':>9} {'size':>8} {'save':>7} "
+          f"{'load':>7}")
+    for n in (10_000, 50_000):
+        graph = build(n)
+        for name, serialize in (("inline", inline), ("table", table)):
+            t_save, text = timed(lambda: json.dumps(serialize(graph)))
+            t_load, _ = timed(lambda: load_graph(json.loads(text)))
+            print(f"{n:>7} {name:>9} {len(text) / 2**20:>6.1f}MB "
+                  f"{t_save:>6.2f}s {t_load:>6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
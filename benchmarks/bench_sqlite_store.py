@@ -0,0 +1,78 @@
+"""Time of saving a large graph to a SQLite database, as a whole vs only
+the nodes and edges changed by a few edits, and of loading a small
+region of it vs the whole graph.
+
+Usage:
+    python benchmarks/bench_sqlite_store.py
+"""
+import os
+import random
+import tempfile
+import time
+
+from easynode.core import Graph, Node, Port, DataPort
+from easynode.utils.sqlite_store import GraphStore
+
+
+class Source(Node):
+    input_ports = [DataPort(name="value", data_type=int), Port(name="in")]
+    output_ports = [Port(name="out")]
+
+
+def build(n: int, seed: int = 0) -> Graph:
+    rng = random.Random(seed)
+    graph = Graph()
+    nodes = [Source(pos=[rng.uniform(0, 1e4), rng.uniform(0, 1e4)])
+             for _ in range(n)]
+    graph.add_nodes(*nodes)
+    graph.add_edges(*[
+        nodes[rng.randrange(i)].create_edge(nodes[i], 0, 1)
+        for i in range(1, n)
+    ])
+    return graph
+
+
+def edit(graph: Graph, rng: random.Random, count: int):
+    """Move and rename a few nodes, then add and connect one."""
+    nodes = list(graph.nodes)
+    for node in rng.sample(nodes, count):
+        node.attrs['pos'] = [rng.uniform(0, 1e4), rng.uniform(0, 1e4)]
+        node.name = "edited"
+        graph.mark_changed(node)
+    new = Source(pos=[0.0, 0.0])
+    graph.add_node(new)
+    graph.add_edge(rng.choice(nodes).create_edge(new, 0, 1))
+
+
+def main():
+    factories = {"Source": Source}
+    tmp = tempfile.mkdtemp()
+    print(f"{'nodes':>7} {'edits':>6} {'full save':>10} {'dirty save':>11} "
+          f"{'load':>7} {'region':>8} {'in region':>10}")
+    for n in (10_000, 50_000):
+        graph = build(n)
+        path = os.path.join(tmp, f"graph_{n}.db")
+        with GraphStore(path) as store:
+            rng = random.Random(1)
+            for count in (1, 10, 100):
+                t0 = time.perf_counter()
+                store.write_graph(graph)
+                t_full = time.perf_counter() - t0
+                edit(graph, rng, count)
+                t0 = time.perf_counter()
+                store.save()
+                t_dirty = time.perf_counter() - t0
+                t0 = time.perf_counter()
+                store.load_graph(factories)
+                t_load = time.perf_counter() - t0
+                # 1% of the area
+                t0 = time.perf_counter()
+                region = store.load_region(0, 0, 1e3, 1e3, factories)
+                t_region = time.perf_counter() - t0
+                print(f"{n:>7} {count + 2:>6} {t_full:>9.3f}s "
+                      f"{t_dirty * 1e3:>9.2f}ms {t_load:>6.2f}s "
+                      f"{t_region * 1e3:>6.1f}ms {len(region.nodes):>10}")
+
+
+if __name__ == "__main__":
+    main()
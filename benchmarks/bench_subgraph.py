@@ -0,0 +1,56 @@
+"""Cost of extracting and serializing a subgraph from a large selection.
+
+This is what Ctrl+C does in `GraphicsView.serialize_selected_items`.
+
+Usage:
+    python benchmarks/bench_subgraph.py
+"""
+import json
+import random
+import time
+
+from easynode.model import Node, Port, Graph
+from easynode.utils.serialization import serialize_subgraph
+
+
+class MergeNode(Node):
+    input_ports = [Port(name="in1"), Port(name="in2")]
+    output_ports = [Port(name="out")]
+
+
+def build_graph(n: int, seed: int = 0) -> Graph:
+    rng = random.Random(seed)
+    graph = Graph()
+    nodes = [MergeNode() for _ in range(n)]
+    graph.add_nodes(*nodes)
+    edges = []
+    for i in range(1, n):
+        edges.append(nodes[i - 1].create_edge(nodes[i], 0, 0))
+        j = rng.randrange(i)
+        if j != i - 1:
+            edges.append(nodes[j].create_edge(nodes[i], 0, 1))
+    graph.add_edges(*edges)
+    return graph
+
+
+def main():
+    n_total = 20_000
+    graph = build_graph(n_total)
+    nodes = list(graph.nodes)
+    print(f"graph: {len(graph.nodes)} nodes, {len(graph.edges)} edges")
+    print(f"{'selected':>9} {'extract':>10} {'serialize':>10} "
+          f"{'inner':>7} {'boundary':>9}")
+    for n_sel in (1_000, 5_000, 10_000):
+        selection = random.Random(1).sample(nodes, n_sel)
+        t0 = time.perf_counter()
+        sub_graph = graph.sub_graph(selection)
+        t_extract = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        json.dumps(serialize_subgraph(sub_graph))
+        t_ser = time.perf_counter() - t0
+        print(f"{n_sel:>9} {t_extract * 1e3:>8.1f}ms {t_ser * 1e3:>8.1f}ms "
+              f"{len(sub_graph.edges):>7} {len(sub_graph.boundary_edges):>9}")
+
+
+if __name__ == "__main__":
+    main()
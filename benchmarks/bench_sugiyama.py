@@ -0,0 +1,117 @@
+"""Time and edge crossings of the "sugiyama" layout mode.
+
+Compares the crossings left by the plain level stacking ("levels"
+mode) with the crossing-minimizing layout, on layered DAGs and on a
+graph with long and backward edges.
+
+Usage:
+    python benchmarks/bench_sugiyama.py
+"""
+import random
+import time
+
+import numpy as np
+
+from easynode.core import Graph, Node, Port
+from easynode.utils.layout import compute_levels
+from easynode.utils.sugiyama import sugiyama_layout
+
+
+class MergeNode(Node):
+    input_ports = [Port(name="in1"), Port(name="in2")]
+    output_ports = [Port(name="out1"), Port(name="out2")]
+
+
+def layered_dag(n_levels: int, width: int, reach: int, seed: int = 0):
+    """Levels of `width` nodes, each fed by two nodes at most `reach`
+    positions away in the previous level."""
+    rng = random.Random(seed)
+    graph = Graph()
+    levels = [[MergeNode() for _ in range(width)] for _ in range(n_levels)]
+    # hide the structure from the initial order of the nodes
+    nodes = [n for level in levels for n in level]
+    rng.shuffle(nodes)
+    graph.add_nodes(*nodes)
+    edges = []
+    for prev, level in zip(levels, levels[1:]):
+        for i, node in enumerate(level):
+            for port in (0, 1):
+                j = min(width - 1, max(0, i + rng.randint(-reach, reach)))
+                edges.append(
+                    prev[j].create_edge(node, rng.randrange(2), port))
+    graph.add_edges(*edges)
+    return graph
+
+
+def long_edges(n: int, seed: int = 0):
+    """Nodes in a sequence, fed by earlier nodes at random distances,
+    with a few backward edges."""
+    rng = random.Random(seed)
+    graph = Graph()
+    nodes = [MergeNode() for _ in range(n)]
+    graph.add_nodes(*nodes)
+    edges = []
+    for i in range(1, n):
+        for port in (0, 1):
+            if rng.random() < 0.6:
+                j = max(0, i - 1 - int(rng.expovariate(0.05)))
+                edges.append(
+                    nodes[j].create_edge(nodes[i], rng.randrange(2), port))
+    for _ in range(n // 100):
+        i = rng.randrange(1, n)
+        edges.append(nodes[i].create_edge(nodes[rng.randrange(i)], 0, 0))
+    graph.add_edges(*edges)
+    return graph
+
+
+def crossings(graph, positions) -> int:
+    """Crossings between edges joining consecutive levels."""
+    levels, _ = compute_levels(graph.nodes)
+    by_level = {}
+    for edge in graph.edges:
+        s, t = edge.source_port.node, edge.target_port.node
+        if levels[t.id] == levels[s.id] + 1:
+            by_level.setdefault(levels[s.id], []).append(
+                (positions[s.id][1], positions[t.id][1]))
+    total = 0
+    for pairs in by_level.values():
+        a, b = np.array(pairs).T
+        total += int(np.sum(
+            ((a[:, None] < a[None, :]) & (b[:, None] > b[None, :]))))
+    return total
+
+
+def stacked(graph):
+    """Positions of the "levels" mode, with unit-sized nodes."""
+    levels, _ = compute_levels(graph.nodes)
+    count = {}
+    positions = {}
+    for node in graph.nodes:
+        lvl = levels[node.id]
+        positions[node.id] = (lvl, count.get(lvl, 0))
+        count[lvl] = count.get(lvl, 0) + 1
+    return positions
+
+
+def main():
+    cases = [
+        ("layered 100x100", lambda: layered_dag(100, 100, 3)),
+        ("layered 20x500", lambda: layered_dag(20, 500, 10)),
+        ("long edges", lambda: long_edges(10_000)),
+    ]
+    print(f"{'graph':>16} {'nodes':>7} {'edges':>7} {'time':>9} "
+          f"{'crossings':>10} {'stacked':>10}")
+    for name, build in cases:
+        graph = build()
+        nodes = list(graph.nodes)
+        sizes = {node.id: (100.0, 50.0) for node in nodes}
+        t0 = time.perf_counter()
+        positions = sugiyama_layout(nodes, sizes)
+        dt = time.perf_counter() - t0
+        print(f"{name:>16} {len(nodes):>7} {len(graph.edges):>7} "
+              f"{dt * 1e3:>7.0f}ms {crossings(graph, positions):>10} "
+              f"{crossings(graph, stacked(graph)):>10}")
+
+
+if __name__ == "__main__":
+    main()
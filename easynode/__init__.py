@@ -1,4 +1,14 @@
-from .node_editor import NodeEditor  # noqa: F401
-from .model import Node, Edge, Graph, Port, DataPort  # noqa: F401
+try:
+    import qtpy  # noqa: F401
+    _has_qt = True
+except ImportError:
+    # without a Qt binding, only the headless `easynode.core` is available
+    _has_qt = False
+
+if _has_qt:
+    from .node_editor import NodeEditor  # noqa: F401
+    from .model import (  # noqa: F401
+        Node, Edge, Graph, Port, DataPort, StreamPort,
+    )
 
 __version__ = '0.1.0'
@@ -27,18 +27,29 @@ class FlowCommand(QtWidgets.QUndoCommand):
         # because it will be called when command is pushed
         if self._first_redo:
             self._first_redo = False
-            return
-        self._redo()
+        else:
+            self._redo()
+        self._record()
 
     def _redo(self):
         pass
 
     def undo(self):
         self._undo()
+        self._record()
 
     def _undo(self):
         pass
 
+    def changed_nodes(self) -> T.List["Node"]:
+        """Nodes whose name or attrs the command changes, passed to
+        `Graph.mark_changed`. Added and removed elements have their own
+        graph signals."""
+        return []
+
+    def _record(self):
+        self.scene.graph.mark_changed(*self.changed_nodes())
+
 
 class FlowItemsCommand(FlowCommand):
     def create_items_group(self):
@@ -57,6 +68,9 @@ class NodeItemsMoveCommand(FlowItemsCommand):
         self.items: T.List[NodeItem] = node_items
         self.pos_diff = pos_diff
 
+    def changed_nodes(self) -> T.List["Node"]:
+        return [item.node for item in self.items]
+
     def _undo(self):
         group = self.create_items_group()
         group.setPos(-self.pos_diff)
@@ -76,18 +90,22 @@ class RemoveItemsCommand(FlowItemsCommand):
         self.items = items
 
     def _undo(self):
-        for item in self.items:
-            if isinstance(item, NodeItem):
-                self.scene.graph.add_node(item.node)
-            elif isinstance(item, EdgeItem):
-                self.scene.graph.add_edge(item.edge)
+        graph = self.scene.graph
+        with graph.batch():
+            for item in self.items:
+                if isinstance(item, NodeItem):
+                    graph.add_node(item.node)
+                elif isinstance(item, EdgeItem):
+                    graph.add_edge(item.edge)
 
     def _redo(self):
-        for item in self.items:
-            if isinstance(item, NodeItem):
-                self.scene.graph.remove_node(item.node)
-            elif isinstance(item, EdgeItem):
-                self.scene.graph.remove_edge(item.edge)
+        graph = self.scene.graph
+        with graph.batch():
+            for item in self.items:
+                if isinstance(item, NodeItem):
+                    graph.remove_node(item.node)
+                elif isinstance(item, EdgeItem):
+                    graph.remove_edge(item.edge)
 
 
 class CreateEdgeCommand(FlowCommand):
@@ -131,16 +149,16 @@ class PasteSubgraphCommand(FlowCommand):
         self.edges = edges
 
     def _undo(self):
-        for node in self.nodes:
-            self.scene.graph.remove_node(node)
-        for edge in self.edges:
-            self.scene.graph.remove_edge(edge)
+        graph = self.scene.graph
+        with graph.batch():
+            graph.remove_nodes(*self.nodes)
+            graph.remove_edges(*self.edges)
 
     def _redo(self):
-        for node in self.nodes:
-            self.scene.graph.add_node(node)
-        for edge in self.edges:
-            self.scene.graph.add_edge(edge)
+        graph = self.scene.graph
+        with graph.batch():
+            graph.add_nodes(*self.nodes)
+            graph.add_edges(*self.edges)
 
 
 class NodeRenameCommand(FlowCommand):
@@ -155,6 +173,9 @@ class NodeRenameCommand(FlowCommand):
         self.old_name = old_name
         self.new_name = new_name
 
+    def changed_nodes(self) -> T.List["Node"]:
+        return [self.node]
+
     def _undo(self):
         self.node.name = self.old_name
         if self.node.item:
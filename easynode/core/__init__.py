@@ -0,0 +1,21 @@
+"""Qt-free graph model.
+
+Mirrors the topology API of `easynode.model`, without importing qtpy,
+so graphs can be loaded and processed on machines without a Qt binding.
+"""
+from .callback import Callback
+from .node import Node, NodeBase, new_uid
+from .edge import Edge, EdgeBase, EdgeKey, EdgeUid
+from .graph import Graph, SubGraph, GraphChanges, ElementsView
+from .port import (
+    Port, DataPort, StreamPort, PortBase, DataPortBase, StreamPortBase,
+)
+
+
+__all__ = [
+    "Callback", "Node", "NodeBase", "new_uid",
+    "Edge", "EdgeBase", "EdgeKey", "EdgeUid",
+    "Graph", "SubGraph", "GraphChanges", "ElementsView",
+    "Port", "DataPort", "StreamPort",
+    "PortBase", "DataPortBase", "StreamPortBase",
+]
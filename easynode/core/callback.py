@@ -0,0 +1,27 @@
+import typing as T
+
+
+class Callback:
+    """A minimal, Qt-free stand-in for a Qt signal.
+
+    Supports the `connect`/`disconnect`/`emit` subset of the signal API,
+    so handlers can be written once for both the core and the Qt model.
+    """
+
+    __slots__ = ("_funcs",)
+
+    def __init__(self) -> None:
+        self._funcs: T.List[T.Callable[..., T.Any]] = []
+
+    def connect(self, func: T.Callable[..., T.Any]) -> None:
+        self._funcs.append(func)
+
+    def disconnect(self, func: T.Callable[..., T.Any]) -> None:
+        self._funcs.remove(func)
+
+    def emit(self, *args: T.Any) -> None:
+        for func in self._funcs:
+            func(*args)
+
+    def __len__(self) -> int:
+        return len(self._funcs)
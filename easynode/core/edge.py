@@ -0,0 +1,79 @@
+import typing as T
+
+if T.TYPE_CHECKING:
+    from ..setting import EdgeItemSetting
+    from .port import PortBase
+
+
+# ((source node id, source port index), (target node id, target port index))
+EdgeKey = T.Tuple[T.Tuple[int, int], T.Tuple[int, int]]
+# (source node uid, source port index, target node uid, target port index)
+EdgeUid = T.Tuple[int, int, int, int]
+
+
+class EdgeBase:
+    """Topology of an edge, shared by the core and the Qt model.
+
+    Subclasses provide the `source_port`, `target_port` and `_key`
+    attributes.
+    """
+
+    __slots__ = ()
+
+    source_port: "PortBase"
+    target_port: "PortBase"
+    _key: T.Optional[EdgeKey]
+
+    @property
+    def key(self) -> EdgeKey:
+        """Identify the edge by its (node id, port index) endpoints.
+
+        The endpoints of an edge never change, so the key is computed
+        once and cached.
+        """
+        if self._key is None:
+            s_port = self.source_port
+            t_port = self.target_port
+            self._key = (  # type: ignore
+                (id(s_port.node), s_port.index),
+                (id(t_port.node), t_port.index)
+            )
+        return self._key
+
+    @property
+    def uid(self) -> EdgeUid:
+        """Persistent identifier of the edge, from the `uid`s of its
+        nodes and its port indexes."""
+        s_port = self.source_port
+        t_port = self.target_port
+        return (
+            s_port.node.uid, s_port.index,  # type: ignore
+            t_port.node.uid, t_port.index,  # type: ignore
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, EdgeBase):
+            return NotImplemented
+        return (
+            (self.source_port == other.source_port) and
+            (self.target_port == other.target_port)
+        )
+
+    def __hash__(self):
+        return hash(self.key)
+
+
+class Edge(EdgeBase):
+    __slots__ = ("source_port", "target_port", "item_setting", "_key")
+
+    def __init__(
+            self, source_port: "PortBase", target_port: "PortBase",
+            item_setting: T.Optional["EdgeItemSetting"] = None,
+            ) -> None:
+        self.source_port = source_port
+        self.target_port = target_port
+        self.item_setting = item_setting
+        self._key = None
+
+    def __repr__(self) -> str:
+        return f"Edge({self.source_port!r} -> {self.target_port!r})"
@@ -0,0 +1,485 @@
+import typing as T
+import json
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+from .callback import Callback
+from .node import NodeBase, new_uid
+from .edge import EdgeBase, EdgeKey, EdgeUid
+
+if T.TYPE_CHECKING:
+    from .node import Node
+
+
+K = T.TypeVar("K")
+V = T.TypeVar("V")
+
+
+class ElementsView(T.Generic[K, V]):
+    """Read-only, insertion-ordered view of the elements in a graph.
+
+    Membership tests go through the index instead of scanning. Indexing
+    goes through `values_list`, a list of the elements kept by the
+    graph between changes, when given.
+    """
+
+    def __init__(
+            self,
+            store: T.Dict[K, V],
+            key_func: T.Callable[[V], K],
+            values_list: T.Optional[T.Callable[[], T.List[V]]] = None,
+            ) -> None:
+        self._store = store
+        self._key_func = key_func
+        self._values_list = values_list
+
+    def __iter__(self) -> T.Iterator[V]:
+        return iter(self._store.values())
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __contains__(self, element: object) -> bool:
+        try:
+            key = self._key_func(element)  # type: ignore
+        except (AttributeError, ValueError):
+            return False
+        return key in self._store
+
+    def __getitem__(self, index: int) -> V:
+        if self._values_list is not None:
+            return self._values_list()[index]
+        return list(self._store.values())[index]
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({list(self._store.values())})"
+
+
+def _node_key(node: NodeBase) -> int:
+    return node.id
+
+
+def _edge_key(edge: EdgeBase) -> EdgeKey:
+    return edge.key
+
+
+@dataclass
+class GraphChanges:
+    """Elements added and removed during a `Graph.batch`."""
+    added_nodes: T.List[T.Any] = field(default_factory=list)
+    removed_nodes: T.List[T.Any] = field(default_factory=list)
+    added_edges: T.List[T.Any] = field(default_factory=list)
+    removed_edges: T.List[T.Any] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (
+            self.added_nodes or self.removed_nodes or
+            self.added_edges or self.removed_edges
+        )
+
+
+class _BatchState:
+    def __init__(self) -> None:
+        self.depth = 0
+        # id -> element, so that add + remove inside one batch cancel out
+        self.added_nodes: T.Dict[int, NodeBase] = {}
+        self.removed_nodes: T.Dict[int, NodeBase] = {}
+        self.added_edges: T.Dict[int, EdgeBase] = {}
+        self.removed_edges: T.Dict[int, EdgeBase] = {}
+        # graphics items waiting to be added to the scene
+        self.pending_items: T.Dict[int, T.Any] = {}
+
+    @staticmethod
+    def _record(
+            element, added: T.Dict[int, T.Any], removed: T.Dict[int, T.Any]):
+        key = id(element)
+        if key in removed:
+            del removed[key]
+        else:
+            added[key] = element
+
+    def node_added(self, node: NodeBase):
+        self._record(node, self.added_nodes, self.removed_nodes)
+
+    def node_removed(self, node: NodeBase):
+        self._record(node, self.removed_nodes, self.added_nodes)
+
+    def edge_added(self, edge: EdgeBase):
+        self._record(edge, self.added_edges, self.removed_edges)
+
+    def edge_removed(self, edge: EdgeBase):
+        self._record(edge, self.removed_edges, self.added_edges)
+
+    def changes(self) -> GraphChanges:
+        return GraphChanges(
+            list(self.added_nodes.values()),
+            list(self.removed_nodes.values()),
+            list(self.added_edges.values()),
+            list(self.removed_edges.values()),
+        )
+
+
+class GraphBase:
+    """Topology of a graph, shared by the core and the Qt model.
+
+    Subclasses call `_init_store` on construction, and provide the
+    `elements_changed`, `node_added`, `node_removed`, `edge_added`,
+    `edge_removed`, `batch_changed` and `nodes_changed` signals (or
+    `Callback`s).
+    The `_attach_*`/`_detach_*` hooks are called when an element
+    enters or leaves the graph.
+    """
+
+    __slots__ = ()
+
+    _nodes: T.Dict[int, T.Any]
+    _uids: T.Dict[int, T.Any]
+    _edges: T.Dict[EdgeKey, T.Any]
+    _node_list: T.Optional[T.List[T.Any]]
+    _edge_list: T.Optional[T.List[T.Any]]
+    _batch: T.Optional[_BatchState]
+    elements_changed: T.Any
+    node_added: T.Any
+    node_removed: T.Any
+    edge_added: T.Any
+    edge_removed: T.Any
+    batch_changed: T.Any
+    nodes_changed: T.Any
+
+    def _init_store(self):
+        # dicts keep the insertion order and give O(1) lookup by id
+        self._nodes = {}
+        self._uids = {}
+        self._edges = {}
+        # ordered lists for indexing, rebuilt on first use after a change
+        self._node_list = None
+        self._edge_list = None
+        self._batch = None
+
+    def _nodes_list(self) -> T.List[T.Any]:
+        if self._node_list is None:
+            self._node_list = list(self._nodes.values())  # type: ignore
+        return self._node_list
+
+    def _edges_list(self) -> T.List[T.Any]:
+        if self._edge_list is None:
+            self._edge_list = list(self._edges.values())  # type: ignore
+        return self._edge_list
+
+    @property
+    def nodes(self) -> ElementsView[int, T.Any]:
+        return ElementsView(self._nodes, _node_key, self._nodes_list)
+
+    @property
+    def edges(self) -> ElementsView[EdgeKey, T.Any]:
+        return ElementsView(self._edges, _edge_key, self._edges_list)
+
+    @contextmanager
+    def batch(self) -> T.Iterator["GraphBase"]:
+        """Group several mutations into one change notification.
+
+        Inside the block, the per-element signals and `elements_changed`
+        are not emitted and new graphics items are not added to the scene.
+        When the outermost block exits, the items are added, then
+        `batch_changed` is emitted with the net `GraphChanges`, followed
+        by a single `elements_changed`.
+
+        Example:
+            >>> with graph.batch():
+            ...     graph.add_nodes(*nodes)
+            ...     graph.add_edges(*edges)
+        """
+        if self._batch is None:
+            self._batch = _BatchState()  # type: ignore
+        batch = self._batch
+        batch.depth += 1
+        try:
+            yield self
+        finally:
+            batch.depth -= 1
+            if batch.depth == 0:
+                self._batch = None  # type: ignore
+                self._commit_batch(batch)
+
+    def node_by_uid(self, uid: int) -> T.Optional[T.Any]:
+        """Node of the graph with this `NodeBase.uid`, if any."""
+        return self._uids.get(uid)
+
+    def edge_by_uid(self, uid: EdgeUid) -> T.Optional[T.Any]:
+        """Edge of the graph with this `EdgeBase.uid`, if any."""
+        s_uid, s_idx, t_uid, t_idx = uid
+        source = self._uids.get(s_uid)
+        target = self._uids.get(t_uid)
+        if source is None or target is None:
+            return None
+        return self._edges.get(((source.id, s_idx), (target.id, t_idx)))
+
+    @property
+    def in_batch(self) -> bool:
+        return self._batch is not None
+
+    def _commit_batch(self, batch: _BatchState):
+        changes = batch.changes()
+        if changes.is_empty():
+            return
+        self.batch_changed.emit(changes)  # type: ignore
+        self.elements_changed.emit()  # type: ignore
+
+    def _attach_node(self, node):
+        pass
+
+    def _detach_node(self, node):
+        pass
+
+    def _attach_edge(self, edge):
+        edge.source_port.on_edge_added(edge)
+        edge.target_port.on_edge_added(edge)
+
+    def _detach_edge(self, edge):
+        edge.source_port.on_edge_removed(edge)
+        edge.target_port.on_edge_removed(edge)
+
+    def add_node(self, node):
+        if node.id in self._nodes:
+            return
+        self._nodes[node.id] = node
+        self._node_list = None
+        if node.uid in self._uids:
+            # e.g. a pasted copy of a node of the graph
+            node.uid = new_uid()
+        self._uids[node.uid] = node
+        self._attach_node(node)
+        if self._batch is not None:
+            self._batch.node_added(node)
+        else:
+            self.node_added.emit(node)  # type: ignore
+            self.elements_changed.emit()  # type: ignore
+
+    def add_nodes(self, *nodes):
+        """Add several nodes, emitting the signals of `add_node` for
+        each. Call it inside a `batch` block to get one `batch_changed`
+        for all instead."""
+        for node in nodes:
+            self.add_node(node)
+
+    def remove_node(self, node):
+        if self._nodes.pop(node.id, None) is None:
+            return
+        self._node_list = None
+        del self._uids[node.uid]
+        self._detach_node(node)
+        for edge in node.input_edges + node.output_edges:
+            self.remove_edge(edge)
+        if self._batch is not None:
+            self._batch.node_removed(node)
+        else:
+            self.node_removed.emit(node)  # type: ignore
+            self.elements_changed.emit()  # type: ignore
+
+    def remove_nodes(self, *nodes):
+        """Remove several nodes, see `add_nodes`."""
+        for node in nodes:
+            self.remove_node(node)
+
+    def add_edge(self, edge):
+        key = edge.key
+        if key in self._edges:
+            return
+        self._edges[key] = edge
+        self._edge_list = None
+        self._attach_edge(edge)
+        if self._batch is not None:
+            self._batch.edge_added(edge)
+        else:
+            self.edge_added.emit(edge)  # type: ignore
+            self.elements_changed.emit()  # type: ignore
+
+    def add_edges(self, *edges):
+        """Add several edges, see `add_nodes`."""
+        for edge in edges:
+            self.add_edge(edge)
+
+    def remove_edge(self, edge):
+        stored = self._edges.pop(edge.key, None)
+        if stored is None:
+            return
+        self._edge_list = None
+        edge = stored
+        self._detach_edge(edge)
+        if self._batch is not None:
+            self._batch.edge_removed(edge)
+        else:
+            self.edge_removed.emit(edge)  # type: ignore
+            self.elements_changed.emit()  # type: ignore
+
+    def remove_edges(self, *edges):
+        """Remove several edges, see `add_nodes`."""
+        for edge in edges:
+            self.remove_edge(edge)
+
+    def mark_changed(self, *nodes):
+        """Emit `nodes_changed` with nodes whose name, attrs or port
+        values were edited. The commands of the editor call it, other
+        code editing nodes should too, for the `ChangeSet`s following
+        the graph."""
+        if nodes:
+            self.nodes_changed.emit(list(nodes))  # type: ignore
+
+
+class Graph(GraphBase):
+    """Qt-free graph.
+
+    Change notifications are `Callback`s with the same names as the
+    signals of `easynode.model.Graph`.
+    """
+
+    def __init__(self) -> None:
+        self.elements_changed = Callback()
+        self.node_added = Callback()
+        self.node_removed = Callback()
+        self.edge_added = Callback()
+        self.edge_removed = Callback()
+        self.batch_changed = Callback()
+        self.nodes_changed = Callback()
+        self._init_store()
+
+    def _add_loaded(
+            self, nodes: T.List["Node"], edges: T.List[T.Any]):
+        """Add new nodes and the edges between them, in one batch, like
+        `add_nodes` then `add_edges`.
+
+        For loaders: the nodes must not be connected yet, which spares
+        the checks of the per-element path.
+        """
+        if type(self)._attach_edge is not GraphBase._attach_edge:
+            # a subclass hooks the attachment of the edges
+            with self.batch():
+                self.add_nodes(*nodes)
+                self.add_edges(*edges)
+            return
+        with self.batch():
+            added_nodes = self._batch.added_nodes  # type: ignore
+            added_edges = self._batch.added_edges  # type: ignore
+            node_map, uids, edge_map = self._nodes, self._uids, self._edges
+            for node in nodes:
+                node_id = id(node)
+                if node_id in node_map:
+                    continue
+                node_map[node_id] = added_nodes[node_id] = node
+                if node.uid in uids:
+                    node.uid = new_uid()
+                uids[node.uid] = node
+                self._attach_node(node)
+            for edge in edges:
+                key = edge.key
+                if key in edge_map:
+                    continue
+                edge_map[key] = added_edges[id(edge)] = edge
+                s_port, t_port = edge.source_port, edge.target_port
+                s_port.edges.add(edge)
+                t_port.edges.add(edge)
+                source, target = s_port.node, t_port.node
+                source._output_edges[key] = edge
+                target._input_edges[key] = edge
+                successors = source._successors
+                successors[target] = successors.get(target, 0) + 1
+                predecessors = target._predecessors
+                predecessors[source] = predecessors.get(source, 0) + 1
+            self._node_list = self._edge_list = None
+
+    def sub_graph(self, nodes: T.Iterable["NodeBase"]) -> "SubGraph":
+        return SubGraph(nodes)
+
+    def serialize(self) -> str:
+        from ..utils.serialization import serialize_nodes_and_edges
+        data = serialize_nodes_and_edges(self.nodes, self.edges)
+        return json.dumps(data)
+
+    @staticmethod
+    def deserialize(
+            data_str: str,
+            factory_table: T.Optional[
+                T.Mapping[str, T.Callable[..., "Node"]]] = None,
+            ) -> "Graph":
+        from ..utils.serialization import load_graph
+        data = json.loads(data_str)
+        return load_graph(data, factory_table)
+
+    def serialize_binary(self, compression: T.Optional[str] = None) -> bytes:
+        """Serialize to the compact binary format of
+        `easynode.utils.binary_format`."""
+        from ..utils.binary_format import dump_graph_binary
+        return dump_graph_binary(self.nodes, self.edges, compression)
+
+    @staticmethod
+    def deserialize_binary(
+            blob: bytes,
+            factory_table: T.Optional[
+                T.Mapping[str, T.Callable[..., "Node"]]] = None,
+            ) -> "Graph":
+        from ..utils.binary_format import load_graph_binary
+        return load_graph_binary(blob, factory_table)
+
+    def apply_patch(
+            self,
+            patch: T.Dict[str, T.Any],
+            factory_table: T.Optional[
+                T.Mapping[str, T.Callable[..., "Node"]]] = None,
+            ) -> None:
+        """Apply a patch made by `easynode.utils.graph_diff.diff`."""
+        from ..utils.graph_diff import apply_patch
+        apply_patch(self, patch, factory_table)
+
+
+class SubGraph:
+    """Subgraph induced by a set of nodes.
+
+    Attributes:
+        nodes: Nodes of the subgraph.
+        edges: Edges with both ends inside the subgraph.
+        incoming_edges: Edges from outside into the subgraph.
+        outgoing_edges: Edges from the subgraph to the outside.
+    """
+
+    def __init__(
+            self,
+            nodes: T.Iterable[T.Any],
+            ) -> None:
+        self.nodes = list(nodes)
+        self._node_ids = {node.id for node in self.nodes}
+        self.incoming_edges: T.List[T.Any] = []
+        self.outgoing_edges: T.List[T.Any] = []
+        self.edges = self.get_edges()
+
+    def __contains__(self, node: object) -> bool:
+        return (
+            isinstance(node, NodeBase) and (node.id in self._node_ids))
+
+    def get_edges(self) -> T.List[T.Any]:
+        """Collect the inner edges, and record the boundary edges."""
+        node_ids = self._node_ids
+        edges: T.List[T.Any] = []
+        incoming: T.List[T.Any] = []
+        outgoing: T.List[T.Any] = []
+        for node in self.nodes:
+            # every inner edge is an input edge of exactly one node
+            for edge in node.iter_input_edges():
+                s_node = edge.source_port.node
+                assert s_node is not None
+                if s_node.id in node_ids:
+                    edges.append(edge)
+                else:
+                    incoming.append(edge)
+            for edge in node.iter_output_edges():
+                t_node = edge.target_port.node
+                assert t_node is not None
+                if t_node.id not in node_ids:
+                    outgoing.append(edge)
+        self.incoming_edges = incoming
+        self.outgoing_edges = outgoing
+        return edges
+
+    @property
+    def boundary_edges(self) -> T.List[T.Any]:
+        """Edges that cross the border of the subgraph."""
+        return self.incoming_edges + self.outgoing_edges
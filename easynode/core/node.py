@@ -0,0 +1,270 @@
+import typing as T
+import random
+from copy import copy
+
+from .port import PortBase, Port
+from .edge import Edge
+from ..setting import NodeItemSetting
+
+if T.TYPE_CHECKING:
+    from .edge import EdgeBase, EdgeKey
+
+
+# separate from the global generator, so seeding that one in user code
+# does not repeat the uids of another session
+_uid_random = random.Random()
+
+
+def new_uid() -> int:
+    """Random 63-bit node uid, fits a signed 64-bit integer."""
+    return _uid_random.getrandbits(63)
+
+
+class NodeBase:
+    """Topology of a node, shared by the core and the Qt model.
+
+    Subclasses provide the `input_ports` and `output_ports` attributes,
+    and call `_init_adjacency` and `_init_ports` on construction.
+    """
+
+    __slots__ = ()
+
+    input_ports: T.List[PortBase]
+    output_ports: T.List[PortBase]
+    status: str  # "normal", "running" or "error"
+    _input_edges: T.Dict["EdgeKey", "EdgeBase"]
+    _output_edges: T.Dict["EdgeKey", "EdgeBase"]
+    _predecessors: T.Dict["NodeBase", int]
+    _successors: T.Dict["NodeBase", int]
+
+    # class used by `create_edge`
+    edge_class: T.Type["EdgeBase"] = Edge
+    # where the executor runs the node: "thread" or "process"
+    affinity: str = "thread"
+    # whether a `ResultCache` may reuse the outputs, disable for nodes
+    # with side effects or random outputs
+    cacheable: bool = True
+    _uid: T.Optional[int] = None
+
+    @classmethod
+    def type_name(cls) -> str:
+        return cls.__name__
+
+    @property
+    def id(self) -> int:
+        return id(self)
+
+    @property
+    def uid(self) -> int:
+        """Persistent identifier of the node.
+
+        Unlike `id`, it is saved with the graph and restored on load, so
+        it stays the same between sessions. Created on first access.
+        Set it before adding the node to a graph.
+        """
+        if self._uid is None:
+            self._uid = new_uid()  # type: ignore
+        return self._uid
+
+    @uid.setter
+    def uid(self, value: int):
+        self._uid = value  # type: ignore
+
+    def create_edge(
+            self, other: "NodeBase",
+            source_port_idx: int, target_port_idx: int) -> "EdgeBase":
+        source_port = self.output_ports[source_port_idx]
+        target_port = other.input_ports[target_port_idx]
+        return self.edge_class(source_port, target_port)  # type: ignore
+
+    def process(self, *inputs: T.Any) -> T.Any:
+        """Compute the outputs of the node, called by the executor.
+
+        Receives one argument per input port. Return a single value when
+        the node has one output port, or a tuple with one value per
+        output port. The default does nothing.
+        """
+        return None
+
+    def task(self) -> T.Callable[..., T.Any]:
+        """Picklable callable run in a worker process instead of `process`.
+
+        Used when `affinity` is "process". The default is the class-level
+        `process` function, which must then be a staticmethod.
+        """
+        from ..execution.backends import default_task
+        return default_task(self)
+
+    def _init_ports(self):
+        cls = self.__class__
+        input_ports = [
+            port.blueprint_copy()  # type: ignore
+            for port in cls.input_ports
+        ]
+        output_ports = [
+            port.blueprint_copy()  # type: ignore
+            for port in cls.output_ports
+        ]
+        self.input_ports = input_ports
+        self.output_ports = output_ports
+        for tp, ports in zip(("in", "out"), (input_ports, output_ports)):
+            for idx, port in enumerate(ports):
+                port.type = tp
+                port.node = self
+                port._index = idx
+
+    def _init_adjacency(self):
+        # edges keyed by `Edge.key`, and neighbor nodes with the number
+        # of edges connecting them, kept up to date by the ports
+        self._input_edges = {}
+        self._output_edges = {}
+        self._predecessors = {}
+        self._successors = {}
+
+    def _adjacency_of(
+            self, port: PortBase, edge: "EdgeBase",
+            ) -> T.Tuple[
+                T.Dict["EdgeKey", "EdgeBase"], T.Dict["NodeBase", int],
+                "NodeBase"]:
+        if port.type == "in":
+            neighbor = edge.source_port.node
+            assert neighbor is not None
+            return self._input_edges, self._predecessors, neighbor
+        else:
+            neighbor = edge.target_port.node
+            assert neighbor is not None
+            return self._output_edges, self._successors, neighbor
+
+    def _on_port_edge_added(self, port: PortBase, edge: "EdgeBase"):
+        edges, neighbors, neighbor = self._adjacency_of(port, edge)
+        key = edge.key
+        if key in edges:
+            return
+        edges[key] = edge
+        neighbors[neighbor] = neighbors.get(neighbor, 0) + 1
+
+    def _on_port_edge_removed(self, port: PortBase, edge: "EdgeBase"):
+        edges, neighbors, neighbor = self._adjacency_of(port, edge)
+        if edges.pop(edge.key, None) is None:
+            return
+        count = neighbors[neighbor] - 1
+        if count > 0:
+            neighbors[neighbor] = count
+        else:
+            del neighbors[neighbor]
+
+    @property
+    def input_edges(self) -> T.List["EdgeBase"]:
+        return list(self._input_edges.values())
+
+    @property
+    def output_edges(self) -> T.List["EdgeBase"]:
+        return list(self._output_edges.values())
+
+    def iter_input_edges(self) -> T.Iterator["EdgeBase"]:
+        """Iterate over input edges without building a list.
+
+        The node must not be connected or disconnected while iterating.
+        """
+        return iter(self._input_edges.values())
+
+    def iter_output_edges(self) -> T.Iterator["EdgeBase"]:
+        """Iterate over output edges without building a list.
+
+        The node must not be connected or disconnected while iterating.
+        """
+        return iter(self._output_edges.values())
+
+    def predecessors(self) -> T.Iterator["NodeBase"]:
+        """Iterate over the distinct nodes connected to the input ports."""
+        return iter(self._predecessors)
+
+    def successors(self) -> T.Iterator["NodeBase"]:
+        """Iterate over the distinct nodes connected to the output ports."""
+        return iter(self._successors)
+
+    @property
+    def in_degree(self) -> int:
+        return len(self._input_edges)
+
+    @property
+    def out_degree(self) -> int:
+        return len(self._output_edges)
+
+
+class Node(NodeBase):
+    """Qt-free node.
+
+    Ports are declared on subclasses the same way as `easynode.model.Node`.
+    Nodes are not slotted, because subclasses shadow `input_ports` and
+    `output_ports` with their blueprints; ports and edges are.
+    """
+
+    _instance_count = 0
+    input_ports: T.List[Port] = []  # type: ignore
+    output_ports: T.List[Port] = []  # type: ignore
+    item_setting: T.Optional[NodeItemSetting] = None
+
+    def __init__(
+            self,
+            name: T.Optional[str] = None,
+            **attrs
+            ) -> None:
+        if name is None:
+            name = self.type_name() + ": " + str(self._instance_count)
+        self.name = name
+        self.__class__._instance_count += 1
+        self.status = "normal"
+        self.attrs = attrs
+        self.item_setting = copy(self.item_setting)
+        self._init_adjacency()
+        self._init_ports()
+
+    @classmethod
+    def _restore_many(
+            cls, names: T.Iterable[str],
+            attrs: T.Iterable[T.Dict[str, T.Any]]) -> T.List["Node"]:
+        """Nodes in the same state as `cls(name, **attrs)`, for each
+        name and attrs, built without `__init__`, for loaders building
+        many nodes.
+
+        Only valid for classes that do not override `__init__`. The
+        caller adds the nodes to `_instance_count`.
+        """
+        new = cls.__new__
+        setting = cls.item_setting
+        # bound `blueprint_copy` of each port, with its type and index
+        copies = [
+            (port.blueprint_copy, tp, idx)
+            for tp, ports in (("in", cls.input_ports),
+                              ("out", cls.output_ports))
+            for idx, port in enumerate(ports)]
+        n_inputs = len(cls.input_ports)
+        nodes: T.List["Node"] = []
+        append = nodes.append
+        for name, node_attrs in zip(names, attrs):
+            node = new(cls)
+            node.name = name
+            node.status = "normal"
+            node.attrs = node_attrs
+            if setting is not None:
+                node.item_setting = copy(setting)
+            node._input_edges = {}
+            node._output_edges = {}
+            node._predecessors = {}
+            node._successors = {}
+            ports = []
+            for blueprint_copy, tp, idx in copies:
+                port = blueprint_copy()
+                port.type = tp
+                port.node = node
+                port._index = idx
+                ports.append(port)
+            node.input_ports = ports[:n_inputs]
+            node.output_ports = ports[n_inputs:]
+            append(node)
+        return nodes
+
+    def __repr__(self) -> str:
+        cls_name = self.__class__.__name__
+        return f"{cls_name}({self.name})"
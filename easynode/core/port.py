@@ -0,0 +1,141 @@
+import typing as T
+
+from ..setting import PortSetting
+
+if T.TYPE_CHECKING:
+    from .edge import EdgeBase
+    from .node import NodeBase
+
+
+class PortBase:
+    """Topology of a port, shared by the core and the Qt model.
+
+    Subclasses provide the `name`, `node`, `type`, `edges`, `_index`
+    and `_setting` attributes.
+    """
+
+    __slots__ = ()
+
+    name: str
+    node: T.Optional["NodeBase"]
+    type: T.Optional[str]  # 'in' or 'out'
+    edges: T.Set["EdgeBase"]
+    _index: T.Optional[int]  # assigned by the node
+    _setting: T.Optional[PortSetting]
+
+    @property
+    def index(self) -> int:
+        if self._index is None:
+            raise ValueError("Node is not set")
+        return self._index
+
+    @property
+    def setting(self) -> PortSetting:
+        if self._setting is not None:
+            return self._setting
+        return PortSetting()
+
+    def on_edge_added(self, edge: "EdgeBase"):
+        self.edges.add(edge)
+        if self.node is not None:
+            self.node._on_port_edge_added(self, edge)
+
+    def on_edge_removed(self, edge: "EdgeBase"):
+        self.edges.remove(edge)
+        if self.node is not None:
+            self.node._on_port_edge_removed(self, edge)
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}({self.name})"
+
+
+class DataPortBase(PortBase):
+    """Marker base of ports that carry a value.
+
+    Subclasses provide the `data_type`, `data_range`, `data_default`
+    and `widget_args` attributes, and a `value`.
+    """
+
+    __slots__ = ()
+
+    data_type: type
+    data_range: object
+    data_default: object
+    widget_args: T.Optional[T.Dict[str, T.Any]]
+    value: T.Any
+
+    @property
+    def is_active(self) -> bool:
+        return len(self.edges) == 0
+
+
+class StreamPortBase(PortBase):
+    """Marker base of ports whose edges carry a stream of chunks.
+
+    An output stream port gets an iterable from `Node.process`; every
+    connected input receives an iterator over its chunks while they are
+    produced, through a queue of at most `maxsize` chunks.
+    Subclasses provide the `maxsize` attribute.
+    """
+
+    __slots__ = ()
+
+    maxsize: int
+
+
+class Port(PortBase):
+    __slots__ = ("name", "node", "type", "edges", "_index", "_setting")
+
+    def __init__(
+            self, name: str,
+            setting: T.Optional[PortSetting] = None
+            ) -> None:
+        self.name = name
+        self.node = None
+        self.type = None
+        self.edges = set()
+        self._index = None
+        self._setting = setting
+
+    def blueprint_copy(self) -> "Port":
+        return self.__class__(self.name, self._setting)
+
+
+class DataPort(DataPortBase, Port):
+    __slots__ = (
+        "data_type", "data_range", "data_default", "widget_args", "value")
+
+    def __init__(
+            self, name: str,
+            data_type: type = object,
+            data_range: object = None,
+            data_default: object = None,
+            widget_args: T.Optional[T.Dict[str, T.Any]] = None,
+            setting: T.Optional[PortSetting] = None,
+            ) -> None:
+        super().__init__(name, setting)
+        self.data_type = data_type
+        self.data_range = data_range
+        self.data_default = data_default
+        self.widget_args = widget_args
+        self.value = data_default
+
+    def blueprint_copy(self) -> "DataPort":
+        return self.__class__(
+            self.name, self.data_type, self.data_range,
+            self.data_default, self.widget_args, self._setting)
+
+
+class StreamPort(StreamPortBase, Port):
+    __slots__ = ("maxsize",)
+
+    def __init__(
+            self, name: str,
+            maxsize: int = 1,
+            setting: T.Optional[PortSetting] = None,
+            ) -> None:
+        super().__init__(name, setting)
+        self.maxsize = maxsize
+
+    def blueprint_copy(self) -> "StreamPort":
+        return self.__class__(self.name, self.maxsize, self._setting)
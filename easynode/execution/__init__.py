@@ -0,0 +1,16 @@
+"""Running graphs as dataflows.
+
+This package does not import qtpy, it works with both the Qt model and
+the headless core.
+"""
+from .engine import GraphExecutor, ExecutionResult, topological_order
+from .backends import Backend, ThreadBackend, ProcessBackend
+from .cache import Cache, ResultCache, CacheStats
+from .disk_cache import DiskCache
+
+
+__all__ = [
+    "GraphExecutor", "ExecutionResult", "topological_order",
+    "Backend", "ThreadBackend", "ProcessBackend",
+    "Cache", "ResultCache", "CacheStats", "DiskCache",
+]
@@ -0,0 +1,97 @@
+"""Re-run a Qt graph while its port values are being edited.
+
+Unlike the rest of this package, this module requires qtpy.
+"""
+import typing as T
+from concurrent.futures import Future
+
+from qtpy import QtCore
+
+from .engine import GraphExecutor, ExecutionResult
+
+if T.TYPE_CHECKING:
+    from ..model.graph import Graph
+    from ..model.port import DataPort
+
+
+class AutoRunner(QtCore.QObject):
+    """Re-run the affected part of a graph after each edit.
+
+    An edit of a `DataPort` value (through its widget) marks the port's
+    node dirty, and so everything downstream of it. Graph changes mark
+    the targets of added or removed edges. The dirty nodes are re-run
+    once no edit happened for `delay` milliseconds, so dragging a
+    spinbox does not start a run per step. Edits made while a run is in
+    progress start another run after it.
+
+    Args:
+        executor: Executor of a Qt `Graph`.
+        delay: Debounce delay in milliseconds.
+        parent: Parent QObject.
+    """
+    # emitted on the GUI thread with the ExecutionResult of each run
+    finished = QtCore.Signal(object)
+    _run_done = QtCore.Signal(object)
+
+    def __init__(
+            self,
+            executor: GraphExecutor,
+            delay: int = 300,
+            parent: T.Optional[QtCore.QObject] = None,
+            ) -> None:
+        super().__init__(parent)
+        self.executor = executor
+        self.graph: "Graph" = executor.graph  # type: ignore
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(delay)
+        self._timer.timeout.connect(self._start_run)
+        self._running = False
+        self._pending = False
+        self._run_done.connect(self._on_run_done)
+        self.graph.port_value_changed.connect(self._on_port_value_changed)
+        self.graph.elements_changed.connect(self.schedule)
+
+    @property
+    def delay(self) -> int:
+        return self._timer.interval()
+
+    @delay.setter
+    def delay(self, value: int):
+        self._timer.setInterval(value)
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    def schedule(self):
+        """Run the dirty nodes after the debounce delay."""
+        self._timer.start()
+
+    def stop(self):
+        """Stop reacting to edits. A run in progress is not cancelled."""
+        self._timer.stop()
+        self.graph.port_value_changed.disconnect(self._on_port_value_changed)
+        self.graph.elements_changed.disconnect(self.schedule)
+
+    def _on_port_value_changed(self, port: "DataPort"):
+        if port.node is not None:
+            self.executor.mark_dirty(port.node)
+        self.schedule()
+
+    def _start_run(self):
+        if self._running:
+            self._pending = True
+            return
+        self._running = True
+        future = self.executor.submit_dirty()
+        # may be called on a worker thread, the signal is queued
+        future.add_done_callback(self._run_done.emit)
+
+    def _on_run_done(self, future: "Future[ExecutionResult]"):
+        self._running = False
+        if self._pending:
+            self._pending = False
+            self.schedule()
+        if future.exception() is None:
+            self.finished.emit(future.result())
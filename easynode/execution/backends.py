@@ -0,0 +1,236 @@
+import typing as T
+import inspect
+import multiprocessing
+import threading
+from concurrent.futures import (
+    Executor, Future, ThreadPoolExecutor, ProcessPoolExecutor,
+)
+
+from . import shm
+
+if T.TYPE_CHECKING:
+    from ..core.node import NodeBase
+
+
+def normalize_outputs(node: "NodeBase", result: T.Any) -> T.Tuple:
+    """Map the return value of `Node.process` to one value per port."""
+    return _normalize(repr(node), len(node.output_ports), result)
+
+
+def _normalize(node_name: str, n_out: int, result: T.Any) -> T.Tuple:
+    if n_out == 0:
+        return ()
+    if n_out == 1:
+        return (result,)
+    outputs = tuple(result)
+    if len(outputs) != n_out:
+        raise ValueError(
+            f"{node_name} returned {len(outputs)} values "
+            f"for {n_out} output ports")
+    return outputs
+
+
+def default_task(node: "NodeBase") -> T.Callable[..., T.Any]:
+    """The class-level `process` function, when it is a staticmethod."""
+    cls = type(node)
+    if not isinstance(inspect.getattr_static(cls, "process"), staticmethod):
+        raise TypeError(
+            f"{cls.__name__} has process affinity, its `process` must be "
+            "a staticmethod, or it must override `task`")
+    return cls.process
+
+
+def _call_task(
+        task: T.Callable[..., T.Any], inputs: T.List[T.Any]) -> T.Any:
+    return task(*inputs)
+
+
+def _call_shared_task(
+        node_name: str, n_outputs: int,
+        task: T.Callable[..., T.Any], inputs: T.List[T.Any],
+        threshold: int) -> T.Tuple:
+    # runs in the worker: map the shared inputs, share the large outputs
+    result = task(*shm.open_all(inputs))
+    outputs = _normalize(node_name, n_outputs, result)
+    return tuple(shm.share_all(outputs, threshold))
+
+
+def _noop() -> None:
+    return None
+
+
+def submit_on_thread(
+        name: str, func: T.Callable[..., T.Any], *args: T.Any) -> Future:
+    """Run `func` on a new daemon thread, outside of any pool, and
+    return a future of its result."""
+    future: Future = Future()
+
+    def target():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            result = func(*args)
+        except BaseException as e:
+            future.set_exception(e)
+        else:
+            future.set_result(result)
+
+    threading.Thread(target=target, name=name, daemon=True).start()
+    return future
+
+
+class Backend:
+    """Runs single nodes for the `GraphExecutor`.
+
+    `submit` returns a future of the node's outputs, one value per
+    output port, and keeps `Node.status` up to date.
+    """
+
+    def submit(self, node: "NodeBase", inputs: T.List[T.Any]) -> Future:
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class ThreadBackend(Backend):
+    """Run `Node.process` on a thread pool.
+
+    Args:
+        max_workers: Size of the thread pool.
+            Default: chosen by `ThreadPoolExecutor`.
+        executor: Use this executor instead of creating a thread pool.
+            It is not shut down by `close`.
+    """
+
+    def __init__(
+            self,
+            max_workers: T.Optional[int] = None,
+            executor: T.Optional[Executor] = None,
+            ) -> None:
+        self._own_executor = executor is None
+        if executor is None:
+            executor = ThreadPoolExecutor(
+                max_workers=max_workers,
+                thread_name_prefix="easynode")
+        self.executor = executor
+
+    def submit(self, node: "NodeBase", inputs: T.List[T.Any]) -> Future:
+        return self.executor.submit(self._execute, node, inputs)
+
+    @staticmethod
+    def _execute(node: "NodeBase", inputs: T.List[T.Any]) -> T.Tuple:
+        node.status = "running"  # type: ignore
+        try:
+            outputs = normalize_outputs(node, node.process(*inputs))
+        except BaseException:
+            node.status = "error"  # type: ignore
+            raise
+        node.status = "normal"  # type: ignore
+        return outputs
+
+
+class ProcessBackend(Backend):
+    """Run `Node.task()` in worker processes, outside of the GIL.
+
+    Only the task and the input values are sent to the workers, so both
+    must be picklable. The pool is created on first use and kept alive
+    between runs, until `close`.
+
+    With `shared_memory_threshold`, NumPy arrays and bytes values of at
+    least that many bytes are passed through shared memory blocks
+    instead of being pickled (see `easynode.execution.shm`). Outputs
+    then come back as `SharedArray` descriptors, which the executor
+    frees once every consumer has finished.
+
+    Args:
+        max_workers: Number of worker processes.
+            Default: chosen by `ProcessPoolExecutor`.
+        executor: Use this executor instead of creating a process pool.
+            It is not shut down by `close`.
+        mp_context: Multiprocessing start method for the pool.
+            Default: "spawn", forking a process running Qt is unsafe.
+        shared_memory_threshold: Minimum size in bytes of the values
+            passed through shared memory. Default: always pickle.
+    """
+
+    def __init__(
+            self,
+            max_workers: T.Optional[int] = None,
+            executor: T.Optional[Executor] = None,
+            mp_context: str = "spawn",
+            shared_memory_threshold: T.Optional[int] = None,
+            ) -> None:
+        self.max_workers = max_workers
+        self.mp_context = mp_context
+        self.shared_memory_threshold = shared_memory_threshold
+        self._own_executor = executor is None
+        self._executor = executor
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context(self.mp_context))
+        return self._executor
+
+    def warm_up(self):
+        """Start the worker processes now rather than on the first task."""
+        n = self.max_workers or multiprocessing.cpu_count()
+        futures = [self.executor.submit(_noop) for _ in range(n)]
+        for future in futures:
+            future.result()
+
+    def submit(self, node: "NodeBase", inputs: T.List[T.Any]) -> Future:
+        result: Future = Future()
+        threshold = self.shared_memory_threshold
+        # blocks created here for inputs that were not shared yet
+        temp_blocks: T.List[shm.SharedArray] = []
+        try:
+            task = node.task()
+            node.status = "running"  # type: ignore
+            if threshold is None:
+                worker_future = self.executor.submit(
+                    _call_task, task, inputs)
+            else:
+                shared = shm.share_all(inputs, threshold)
+                temp_blocks = [
+                    new for old, new in zip(inputs, shared) if new is not old]
+                inputs = shared
+                worker_future = self.executor.submit(
+                    _call_shared_task, repr(node), len(node.output_ports),
+                    task, inputs, threshold)
+        except BaseException as e:
+            node.status = "error"  # type: ignore
+            for block in temp_blocks:
+                shm.release(block)
+            result.set_exception(e)
+            return result
+
+        def on_done(future: Future):
+            # an error raised here would be swallowed by `future` and
+            # leave `result` pending, it goes to `result` instead
+            try:
+                for block in temp_blocks:
+                    shm.release(block)
+                if threshold is None:
+                    outputs = normalize_outputs(node, future.result())
+                else:  # normalized in the worker
+                    outputs = future.result()
+                node.status = "normal"  # type: ignore
+            except BaseException as e:
+                try:
+                    node.status = "error"  # type: ignore
+                finally:
+                    result.set_exception(e)
+            else:
+                result.set_result(outputs)
+
+        worker_future.add_done_callback(on_done)
+        return result
+
+    def close(self):
+        if self._own_executor and (self._executor is not None):
+            self._executor.shutdown(wait=True)
+            self._executor = None
@@ -0,0 +1,163 @@
+import typing as T
+import sys
+import pickle
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+if T.TYPE_CHECKING:
+    from ..core.node import NodeBase
+
+
+# attributes that only affect how a node is drawn
+IGNORED_ATTRS = frozenset({"pos"})
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def sizeof(value: T.Any) -> int:
+    """Approximate memory size of a value in bytes.
+
+    Uses `nbytes` for arrays, and recurses into lists, tuples and dicts.
+    """
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(sizeof(v) for v in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            sizeof(k) + sizeof(v) for k, v in value.items())
+    return sys.getsizeof(value)
+
+
+def digest(obj: T.Any) -> T.Optional[str]:
+    """Content hash of a picklable object, None if it can not be pickled."""
+    try:
+        data = pickle.dumps(obj, protocol=4)
+    except Exception:
+        return None
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def node_key(
+        node: "NodeBase",
+        inputs: T.Sequence[T.Any],
+        ) -> T.Optional[str]:
+    """Cache key of a node run.
+
+    Args:
+        node: The node.
+        inputs: One item per input port: the port value when it is not
+            connected, else the `(key, port index)` pairs of the upstream
+            results, in edge order.
+
+    Returns:
+        The key, or None if the inputs or `attrs` can not be hashed.
+    """
+    cls = type(node)
+    attrs = sorted(
+        (k, v) for k, v in getattr(node, "attrs", {}).items()
+        if k not in IGNORED_ATTRS)
+    return digest((cls.__module__, cls.__qualname__, tuple(inputs), attrs))
+
+
+class Cache:
+    """Storage of node outputs for the `GraphExecutor`.
+
+    Keys are built by `node_key`. Subclasses implement `get`, `put` and
+    `clear`, and count hits and misses in `stats`.
+    """
+
+    def __init__(self) -> None:
+        self.stats = CacheStats()
+
+    def get(self, key: str) -> T.Optional[T.Tuple]:
+        raise NotImplementedError
+
+    def put(self, key: str, outputs: T.Tuple):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+
+class ResultCache(Cache):
+    """Bounded LRU cache of node outputs, shared across runs.
+
+    Keys are built by `node_key` from the node type, its port values,
+    its `attrs` and the keys of the upstream results, so an unchanged
+    subgraph is not run again. Nodes with `cacheable = False` and
+    everything downstream of them are never cached.
+
+    Args:
+        max_entries: Maximum number of cached node outputs.
+        max_bytes: Maximum total size of the cached outputs, as
+            estimated by `sizeof`. Default: unlimited.
+    """
+
+    def __init__(
+            self,
+            max_entries: int = 1024,
+            max_bytes: T.Optional[int] = None,
+            ) -> None:
+        super().__init__()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: "OrderedDict[str, T.Tuple[T.Tuple, int]]" = \
+            OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> T.Optional[T.Tuple]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return entry[0]
+
+    def put(self, key: str, outputs: T.Tuple):
+        size = sizeof(outputs)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            self._entries[key] = (outputs, size)
+            self.nbytes += size
+            self._evict()
+
+    def _evict(self):
+        while self._entries and (
+                len(self._entries) > self.max_entries or
+                (self.max_bytes is not None and
+                 self.nbytes > self.max_bytes)):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.nbytes -= size
+            self.stats.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,198 @@
+import typing as T
+import os
+import mmap
+import pickle
+import struct
+import tempfile
+import threading
+
+from .cache import Cache
+
+# file layout: header, (offset, size) of each buffer, pickle, buffers
+_MAGIC = b"ENC1"
+_HEADER = struct.Struct("<4sIQ")  # magic, number of buffers, pickle size
+_BUFFER = struct.Struct("<QQ")
+_ALIGN = 64
+_SUFFIX = ".entry"
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def write_entry(path: str, outputs: T.Tuple):
+    """Write outputs to `path` atomically.
+
+    Objects supporting out-of-band pickling (protocol 5), like NumPy
+    arrays, are stored as raw aligned buffers after the pickle, so that
+    `read_entry` can map them instead of copying.
+    """
+    buffers: T.List[pickle.PickleBuffer] = []
+    data = pickle.dumps(outputs, protocol=5, buffer_callback=buffers.append)
+    raws = [buf.raw() for buf in buffers]
+    offset = _aligned(
+        _HEADER.size + _BUFFER.size * len(raws) + len(data))
+    table = []
+    for raw in raws:
+        table.append((offset, raw.nbytes))
+        offset = _aligned(offset + raw.nbytes)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, len(raws), len(data)))
+            for item in table:
+                f.write(_BUFFER.pack(*item))
+            f.write(data)
+            for (start, _), raw in zip(table, raws):
+                f.seek(start)
+                f.write(raw)
+        # readers see either no entry or a complete one
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_entry(path: str) -> T.Tuple:
+    """Read outputs written by `write_entry`.
+
+    Out-of-band buffers are read-only views of a memory map of the file.
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    magic, n_buffers, size = _HEADER.unpack_from(view)
+    if magic != _MAGIC:
+        raise ValueError(f"Not a cache entry: {path}")
+    pos = _HEADER.size
+    buffers = []
+    for _ in range(n_buffers):
+        start, nbytes = _BUFFER.unpack_from(view, pos)
+        buffers.append(view[start:start + nbytes])
+        pos += _BUFFER.size
+    return pickle.loads(view[pos:pos + size], buffers=buffers)
+
+
+class DiskCache(Cache):
+    """Content-addressed cache of node outputs in a directory.
+
+    Entries are keyed by `node_key`, which does not depend on the
+    session, so outputs computed yesterday are reused after reloading
+    the same graph. Large binary values (anything pickled out-of-band,
+    like NumPy arrays) are memory-mapped on load, and are then
+    read-only.
+
+    Writes are atomic, so several editor or worker processes can share
+    the directory. When the total size exceeds `max_bytes`, the least
+    recently used entries are removed.
+
+    Args:
+        directory: Where to store the entries, created if needed.
+        max_bytes: Size cap of the directory. Default: 1 GiB.
+    """
+
+    def __init__(
+            self,
+            directory: str,
+            max_bytes: int = 2**30,
+            ) -> None:
+        super().__init__()
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self.nbytes = sum(size for _, _, size in self._scan())
+
+    @classmethod
+    def for_graph_file(cls, path: str, **kwargs: T.Any) -> "DiskCache":
+        """Cache in a directory next to a saved graph."""
+        return cls(path + ".cache", **kwargs)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], key + _SUFFIX)
+
+    def _scan(self) -> T.List[T.Tuple[float, str, int]]:
+        entries = []
+        for sub in os.scandir(self.directory):
+            if not sub.is_dir():
+                continue
+            for entry in os.scandir(sub.path):
+                if not entry.name.endswith(_SUFFIX):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:  # removed by another process
+                    continue
+                entries.append((st.st_mtime, entry.path, st.st_size))
+        return entries
+
+    def get(self, key: str) -> T.Optional[T.Tuple]:
+        path = self._path(key)
+        try:
+            outputs = read_entry(path)
+        except FileNotFoundError:
+            outputs = None
+        except Exception:  # truncated or foreign file
+            self._remove(path)
+            outputs = None
+        with self._lock:
+            if outputs is None:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+        try:
+            os.utime(path)  # mark as recently used
+        except OSError:
+            pass
+        return outputs
+
+    def put(self, key: str, outputs: T.Tuple):
+        path = self._path(key)
+        try:
+            # an existing entry is replaced, count only the difference
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write_entry(path, outputs)
+            size = os.path.getsize(path)
+        except Exception:
+            return  # not picklable or disk full, do not cache
+        with self._lock:
+            self.nbytes += size - old_size
+            if self.nbytes > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        # other processes write to the same directory, so recount
+        entries = sorted(self._scan())
+        total = sum(size for _, _, size in entries)
+        for _, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            if self._remove(path):
+                self.stats.evictions += 1
+            total -= size
+        self.nbytes = total
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.remove(path)
+        except OSError:  # already removed, or mapped on Windows
+            return False
+        return True
+
+    def clear(self):
+        with self._lock:
+            for _, path, _ in self._scan():
+                self._remove(path)
+            self.nbytes = 0
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and os.path.exists(self._path(key))
+
+    def __len__(self) -> int:
+        return len(self._scan())
@@ -0,0 +1,638 @@
+import typing as T
+import threading
+from collections import deque
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field
+from functools import partial
+from itertools import chain
+
+from .backends import (
+    Backend, ThreadBackend, ProcessBackend, submit_on_thread,
+)
+from .cache import Cache, node_key
+from .stream import Channel, start_pump
+from . import shm
+from ..core.port import StreamPortBase
+
+if T.TYPE_CHECKING:
+    from ..core.graph import GraphBase
+    from ..core.node import NodeBase
+    from ..core.port import PortBase
+
+
+@dataclass
+class ExecutionResult:
+    """Outcome of one run of a graph.
+
+    Attributes:
+        outputs: Output values of each finished node, keyed by node id,
+            one value per output port.
+        errors: Exceptions raised by failed nodes, keyed by node id.
+        skipped: Nodes not run because an upstream node failed.
+        cached: Nodes whose outputs were taken from the result cache.
+    """
+    outputs: T.Dict[int, T.Tuple[T.Any, ...]] = field(default_factory=dict)
+    errors: T.Dict[int, BaseException] = field(default_factory=dict)
+    skipped: T.List["NodeBase"] = field(default_factory=list)
+    cached: T.List["NodeBase"] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not (self.errors or self.skipped)
+
+
+def topological_order(nodes: T.Iterable["NodeBase"]) -> T.List["NodeBase"]:
+    """Order nodes so that every node comes after its predecessors.
+
+    Only edges between the given nodes are considered.
+
+    Raises:
+        ValueError: If the nodes contain a cycle.
+    """
+    nodes = list(nodes)
+    node_ids = {node.id for node in nodes}
+    in_count: T.Dict[int, int] = {}
+    for node in nodes:
+        in_count[node.id] = sum(
+            1 for n in node.predecessors() if n.id in node_ids)
+    order = [node for node in nodes if in_count[node.id] == 0]
+    for node in order:  # `order` grows while iterating
+        for succ in node.successors():
+            if succ.id not in node_ids:
+                continue
+            in_count[succ.id] -= 1
+            if in_count[succ.id] == 0:
+                order.append(succ)
+    if len(order) != len(nodes):
+        cyclic = [node for node in nodes if in_count[node.id] > 0]
+        raise ValueError(f"Graph contains a cycle through: {cyclic}")
+    return order
+
+
+def downstream(nodes: T.Iterable["NodeBase"]) -> T.List["NodeBase"]:
+    """The given nodes and every node reachable from them, in visit
+    order."""
+    cone: T.Dict[int, "NodeBase"] = {}
+    stack = list(nodes)
+    while stack:
+        node = stack.pop()
+        if node.id in cone:
+            continue
+        cone[node.id] = node
+        stack.extend(node.successors())
+    return list(cone.values())
+
+
+def with_missing_sources(
+        nodes: T.Iterable["NodeBase"],
+        outputs: T.Mapping[int, T.Any],
+        ) -> T.List["NodeBase"]:
+    """Add the upstream nodes whose outputs the given nodes need but
+    which are not stored.
+
+    That is nodes that never ran, whose outputs were released from
+    shared memory, and producers of streams, which are never stored.
+    """
+    result: T.Dict[int, "NodeBase"] = {node.id: node for node in nodes}
+    stack = list(result.values())
+    while stack:
+        node = stack.pop()
+        for port in node.input_ports:
+            for edge in port.edges:
+                s_port = edge.source_port
+                s_node = s_port.node
+                if s_node is None or s_node.id in result:
+                    continue
+                if (isinstance(s_port, StreamPortBase) or
+                        s_node.id not in outputs):
+                    result[s_node.id] = s_node
+                    stack.append(s_node)
+    return list(result.values())
+
+
+def has_stream_output(node: "NodeBase") -> bool:
+    return any(isinstance(p, StreamPortBase) for p in node.output_ports)
+
+
+def port_default(port: "PortBase") -> T.Any:
+    """Value of an input port that has no incoming edge."""
+    return getattr(port, "value", None)
+
+
+class _Run:
+    """State of one execution of a set of nodes."""
+
+    def __init__(
+            self, engine: "GraphExecutor",
+            nodes: T.List["NodeBase"]) -> None:
+        self.engine = engine
+        self.nodes = nodes = with_missing_sources(nodes, engine.outputs)
+        self.node_ids = {node.id for node in nodes}
+        self.result = ExecutionResult()
+        self.future: "Future[ExecutionResult]" = Future()
+        self._lock = threading.Lock()
+        # finished node futures waiting to be handled, see `_on_done`
+        self._done: T.Deque[T.Tuple["NodeBase", T.Optional[str], Future]] = \
+            deque()
+        self._draining = False
+        self._resolved = False
+        self._n_done = 0
+        self._remaining: T.Dict[int, int] = {}
+        self._blocked: T.Set[int] = set()
+        # channels of the stream edges, keyed by edge key
+        self._channels: T.Dict[T.Any, Channel] = {}
+        # shared memory blocks: edge key -> block name, and block name ->
+        # [consumers left, descriptor, producer id]
+        self._edge_blocks: T.Dict[T.Any, str] = {}
+        self._blocks: T.Dict[str, T.List[T.Any]] = {}
+        self._released_producers: T.Set[int] = set()
+        # read the unconnected port values on the calling thread,
+        # they may live in GUI widgets
+        self._defaults: T.Dict[T.Tuple[int, int], T.Any] = {}
+        for node in nodes:
+            for port in node.input_ports:
+                if not port.edges:
+                    self._defaults[(node.id, port.index)] = \
+                        port_default(port)
+
+    def start(self):
+        try:
+            topological_order(self.nodes)
+        except ValueError as e:
+            self._resolve(error=e)
+            return
+        if not self.nodes:
+            self._resolve()
+            return
+        ready = []
+        for node in self.nodes:
+            count = sum(
+                1 for n in node.predecessors() if n.id in self.node_ids)
+            self._remaining[node.id] = count
+            if count == 0:
+                ready.append(node)
+        try:
+            self._submit(ready)
+        except BaseException as e:
+            self._resolve(error=e)
+
+    def _submit(self, nodes: T.List["NodeBase"]):
+        # cache hits complete without a round trip through a backend,
+        # so their successors are handled in the same loop
+        cache = self.engine.cache
+        queue = list(nodes)
+        while queue:
+            node = queue.pop()
+            key = None
+            if (cache is not None and node.cacheable and
+                    not has_stream_output(node)):
+                key = self._cache_key(node)
+            outputs = None if key is None else cache.get(key)  # type: ignore
+            if outputs is None:
+                future = self.engine._submit_node(
+                    node, self._gather_inputs(node),
+                    self._reads_stream(node))
+                future.add_done_callback(partial(self._on_done, node, key))
+                continue
+            self.result.cached.append(node)
+            ready, finished = self._finish(node, outputs, None, key)
+            queue.extend(ready)
+            if finished:
+                self._complete()
+
+    def _reads_stream(self, node: "NodeBase") -> bool:
+        with self._lock:
+            return any(
+                edge.key in self._channels
+                for port in node.input_ports for edge in port.edges)
+
+    def _gather_inputs(self, node: "NodeBase") -> T.List[T.Any]:
+        outputs = self.engine.outputs
+        inputs = []
+        for port in node.input_ports:
+            if not port.edges:
+                inputs.append(self._defaults.get((node.id, port.index)))
+                continue
+            values = []
+            for edge in sorted(port.edges, key=lambda e: e.key):
+                channel = self._channels.get(edge.key)
+                if channel is not None:
+                    values.append(iter(channel))
+                    continue
+                s_port = edge.source_port
+                s_node = s_port.node
+                assert s_node is not None
+                values.append(outputs[s_node.id][s_port.index])
+            value = values[0] if len(values) == 1 else values
+            if node.affinity != "process":
+                value = shm.open_value(value)
+            inputs.append(value)
+        return inputs
+
+    def _cache_key(self, node: "NodeBase") -> T.Optional[str]:
+        keys = self.engine.output_keys
+        items: T.List[T.Any] = []
+        for port in node.input_ports:
+            if not port.edges:
+                items.append(self._defaults.get((node.id, port.index)))
+                continue
+            upstream = []
+            for edge in sorted(port.edges, key=lambda e: e.key):
+                s_port = edge.source_port
+                s_node = s_port.node
+                assert s_node is not None
+                s_key = keys.get(s_node.id)
+                if s_key is None:
+                    return None
+                upstream.append((s_key, s_port.index))
+            items.append(tuple(upstream))
+        return node_key(node, items)
+
+    def _on_done(
+            self, node: "NodeBase", key: T.Optional[str], future: Future):
+        # only queues the node: an error raised in a done callback would
+        # be swallowed by the future, and handling futures that are
+        # already done right away would recurse through `_submit`
+        with self._lock:
+            self._done.append((node, key, future))
+            if self._draining:
+                return
+            self._draining = True
+        self._drain()
+
+    def _drain(self):
+        """Handle the queued futures, until none is left."""
+        while True:
+            with self._lock:
+                if not self._done:
+                    self._draining = False
+                    return
+                node, key, future = self._done.popleft()
+            try:
+                self._handle_done(node, key, future)
+            except BaseException as e:
+                self._resolve(error=e)
+
+    def _handle_done(
+            self, node: "NodeBase", key: T.Optional[str], future: Future):
+        error = future.exception()
+        outputs = None
+        streaming = False
+        if error is None:
+            outputs = self._track_blocks(node, future.result())
+            if key is not None and not any(
+                    isinstance(v, shm.SharedArray) for v in outputs):
+                self.engine.cache.put(key, outputs)  # type: ignore
+            if has_stream_output(node):
+                outputs, streaming = self._start_streams(node, outputs)
+        if not streaming:
+            # else the node reads its inputs until its own streams end
+            self._close_input_streams(node)
+        ready, finished = self._finish(node, outputs, error, key)
+        self._submit(ready)
+        if finished:
+            self._complete()
+
+    def _complete(self):
+        # released outputs can not feed later runs, their producers will
+        # run again
+        for node_id in self._released_producers:
+            self.engine._forget(node_id)
+        self._resolve()
+
+    def _resolve(self, error: T.Optional[BaseException] = None):
+        """Set the result of the run, or fail it with an error of the
+        executor itself, once."""
+        with self._lock:
+            if self._resolved:
+                return
+            self._resolved = True
+            channels = list(self._channels.values())
+        if error is None:
+            self.future.set_result(self.result)
+            return
+        # unblock the producers of the streams
+        for channel in channels:
+            channel.close()
+        self.future.set_exception(error)
+
+    def _track_blocks(
+            self, node: "NodeBase", outputs: T.Tuple[T.Any, ...],
+            ) -> T.Tuple[T.Any, ...]:
+        if not any(isinstance(v, shm.SharedArray) for v in outputs):
+            return outputs
+        outputs = list(outputs)  # type: ignore
+        for port in node.output_ports:
+            desc = outputs[port.index]
+            if not isinstance(desc, shm.SharedArray):
+                continue
+            edges = [
+                e for e in port.edges
+                if e.target_port.node is not None and
+                e.target_port.node.id in self.node_ids]
+            if not edges:
+                # nothing will read the block, hand out a plain value
+                outputs[port.index] = shm.materialize(desc)  # type: ignore
+                shm.release(desc)
+                continue
+            with self._lock:
+                self._blocks[desc.name] = [len(edges), desc, node.id]
+                for e in edges:
+                    self._edge_blocks[e.key] = desc.name
+        return tuple(outputs)
+
+    def _release_inputs(self, node: "NodeBase"):
+        # called with the lock held
+        for port in node.input_ports:
+            for edge in port.edges:
+                name = self._edge_blocks.pop(edge.key, None)
+                if name is None:
+                    continue
+                entry = self._blocks[name]
+                entry[0] -= 1
+                if entry[0] == 0:
+                    del self._blocks[name]
+                    self._released_producers.add(entry[2])
+                    self._keep_view(entry[2], entry[1])
+                    shm.release(entry[1])
+
+    def _keep_view(self, node_id: int, desc: "shm.SharedArray"):
+        # the result keeps a view of the block, which stays mapped until
+        # the result is dropped, instead of a descriptor of a freed block
+        outputs = self.result.outputs.get(node_id)
+        if outputs is not None:
+            self.result.outputs[node_id] = tuple(
+                shm.open_shared(v) if v is desc else v for v in outputs)
+
+    def _start_streams(
+            self, node: "NodeBase", outputs: T.Tuple[T.Any, ...],
+            ) -> T.Tuple[T.Tuple[T.Any, ...], bool]:
+        # the chunks are not kept in the outputs, they are consumed once
+        stored = list(outputs)
+        streaming = False
+        for port in node.output_ports:
+            if not isinstance(port, StreamPortBase):
+                continue
+            edges = [
+                e for e in port.edges
+                if e.target_port.node is not None and
+                e.target_port.node.id in self.node_ids]
+            stored[port.index] = None
+            if not edges:
+                continue
+            node.status = "running"  # type: ignore
+            streaming = True
+            channels = start_pump(
+                node.type_name(), outputs[port.index], edges, port.maxsize,
+                partial(self._on_stream_end, node))
+            with self._lock:
+                self._channels.update(channels)
+        return tuple(stored), streaming
+
+    def _on_stream_end(
+            self, node: "NodeBase", error: T.Optional[BaseException]):
+        self._close_input_streams(node)
+        if error is not None:
+            with self._lock:
+                self.result.errors[node.id] = error
+        node.status = "normal" if error is None else "error"  # type: ignore
+
+    def _close_input_streams(self, node: "NodeBase"):
+        # unblocks producers whose consumer stopped reading early
+        for port in node.input_ports:
+            for edge in port.edges:
+                with self._lock:
+                    channel = self._channels.pop(edge.key, None)
+                if channel is not None:
+                    channel.close()
+
+    def _finish(
+            self, node: "NodeBase",
+            outputs: T.Optional[T.Tuple[T.Any, ...]],
+            error: T.Optional[BaseException],
+            key: T.Optional[str],
+            ) -> T.Tuple[T.List["NodeBase"], bool]:
+        ready: T.List["NodeBase"] = []
+        skipped: T.List["NodeBase"] = []
+        with self._lock:
+            if error is None:
+                assert outputs is not None
+                self.engine.outputs[node.id] = outputs
+                self.engine.output_keys[node.id] = key
+                self.result.outputs[node.id] = outputs
+            else:
+                self.result.errors[node.id] = error
+            self._release_successors(node, error is not None, ready, skipped)
+            for n in [node] + skipped:
+                self._release_inputs(n)
+            self._n_done += 1 + len(skipped)
+            finished = self._n_done == len(self.nodes)
+        return ready, finished
+
+    def _release_successors(
+            self, node: "NodeBase", failed: bool,
+            ready: T.List["NodeBase"], skipped: T.List["NodeBase"]):
+        stack = [(node, failed)]
+        while stack:
+            current, blocked = stack.pop()
+            for succ in current.successors():
+                if succ.id not in self.node_ids:
+                    continue
+                if blocked:
+                    self._blocked.add(succ.id)
+                self._remaining[succ.id] -= 1
+                if self._remaining[succ.id] > 0:
+                    continue
+                if succ.id in self._blocked:
+                    skipped.append(succ)
+                    self.result.skipped.append(succ)
+                    stack.append((succ, True))
+                else:
+                    ready.append(succ)
+
+
+class GraphExecutor:
+    """Run a graph as a dataflow, executing independent nodes in parallel.
+
+    Each node runs once all of its predecessors have finished; its
+    `process` method receives one argument per input port: the value
+    carried by the incoming edge, or the port's own value when it is not
+    connected. While a node runs its `status` is "running", then it goes
+    back to "normal", or to "error" if `process` raised. Nodes downstream
+    of a failure are skipped.
+
+    Nodes run on a thread pool, or in worker processes when their
+    `affinity` is "process" (see `ProcessBackend`).
+
+    The executor keeps the latest outputs of every node, so after an
+    edit only the affected nodes need to run again: `mark_dirty` flags a
+    node and everything downstream of it, and `submit_dirty` re-runs the
+    flagged nodes, feeding them the stored outputs of clean upstream
+    nodes. Edges added or removed in the graph mark their target node.
+    With a `ResultCache` or a `DiskCache`, nodes whose inputs did not
+    change are not run again at all.
+
+    Args:
+        graph: Graph to run.
+        max_workers: Size of the thread pool.
+            Default: chosen by `ThreadPoolExecutor`.
+        executor: Use this executor instead of creating a thread pool.
+            It is not shut down by `close`.
+        max_processes: Number of worker processes.
+            Default: chosen by `ProcessPoolExecutor`.
+        process_executor: Use this executor instead of creating a
+            process pool. It is not shut down by `close`.
+        cache: Cache of node outputs, may be shared between executors.
+            Default: no caching.
+        shared_memory_threshold: Pass arrays and bytes of at least this
+            many bytes to worker processes through shared memory.
+            Default: pickle them.
+
+    Example:
+        >>> with GraphExecutor(graph, max_workers=4) as executor:
+        ...     result = executor.run()
+    """
+
+    def __init__(
+            self,
+            graph: "GraphBase",
+            max_workers: T.Optional[int] = None,
+            executor: T.Optional[Executor] = None,
+            max_processes: T.Optional[int] = None,
+            process_executor: T.Optional[Executor] = None,
+            cache: T.Optional[Cache] = None,
+            shared_memory_threshold: T.Optional[int] = None,
+            ) -> None:
+        self.graph = graph
+        self.backends: T.Dict[str, Backend] = {
+            "thread": ThreadBackend(max_workers, executor),
+            "process": ProcessBackend(
+                max_processes, process_executor,
+                shared_memory_threshold=shared_memory_threshold),
+        }
+        # latest outputs of every node that finished, keyed by node id
+        self.outputs: T.Dict[int, T.Tuple[T.Any, ...]] = {}
+        # cache keys of those outputs, None when they can not be cached
+        self.output_keys: T.Dict[int, T.Optional[str]] = {}
+        self.cache = cache
+        self._dirty: T.Dict[int, "NodeBase"] = {}
+        self._dirty_lock = threading.Lock()
+        graph.edge_added.connect(self._on_edge_changed)
+        graph.edge_removed.connect(self._on_edge_changed)
+        graph.node_removed.connect(self._on_node_removed)
+        graph.batch_changed.connect(self._on_batch_changed)
+
+    def submit(
+            self, nodes: T.Optional[T.Iterable["NodeBase"]] = None,
+            ) -> "Future[ExecutionResult]":
+        """Start running the graph, return a future of the result.
+
+        Args:
+            nodes: Run only these nodes. Inputs coming from other nodes
+                are taken from their stored `outputs`, so these must
+                have run before. Default: all nodes of the graph.
+        """
+        if nodes is None:
+            nodes = self.graph.nodes
+        run = _Run(self, list(nodes))
+        run.start()
+        return run.future
+
+    @property
+    def dirty_nodes(self) -> T.List["NodeBase"]:
+        """Nodes whose outputs are missing or out of date."""
+        with self._dirty_lock:
+            dirty = list(self._dirty.values())
+        return dirty + [
+            node for node in self.graph.nodes
+            if node.id not in self.outputs and node.id not in self._dirty]
+
+    def mark_dirty(self, node: "NodeBase"):
+        """Flag a node and its downstream cone for re-execution."""
+        with self._dirty_lock:
+            for n in downstream([node]):
+                self._dirty[n.id] = n
+
+    def submit_dirty(self) -> "Future[ExecutionResult]":
+        """Re-run only the dirty nodes, and everything downstream of them.
+
+        The flags are cleared when the run starts; nodes that fail or
+        are skipped are flagged again when it finishes.
+        """
+        cone = downstream(self.dirty_nodes)
+        with self._dirty_lock:
+            for node in cone:
+                self._dirty.pop(node.id, None)
+        future = self.submit(cone)
+        future.add_done_callback(self._on_dirty_run_done)
+        return future
+
+    def run_dirty(
+            self, timeout: T.Optional[float] = None) -> ExecutionResult:
+        """Re-run the dirty nodes and wait for them to finish."""
+        return self.submit_dirty().result(timeout)
+
+    def _on_dirty_run_done(self, future: "Future[ExecutionResult]"):
+        if future.exception() is not None:
+            return
+        result = future.result()
+        for node_id in result.errors:
+            self._forget(node_id)
+        for node in result.skipped:
+            self._forget(node.id)
+
+    def _on_edge_changed(self, edge):
+        node = edge.target_port.node
+        if node is not None and node in self.graph.nodes:
+            self.mark_dirty(node)
+
+    def _forget(self, node_id: int):
+        self.outputs.pop(node_id, None)
+        self.output_keys.pop(node_id, None)
+
+    def _on_node_removed(self, node: "NodeBase"):
+        self._forget(node.id)
+        with self._dirty_lock:
+            self._dirty.pop(node.id, None)
+
+    def _on_batch_changed(self, changes):
+        for node in changes.removed_nodes:
+            self._on_node_removed(node)
+        for edge in chain(changes.added_edges, changes.removed_edges):
+            self._on_edge_changed(edge)
+
+    def run(self, timeout: T.Optional[float] = None) -> ExecutionResult:
+        """Run the graph and wait for it to finish."""
+        return self.submit().result(timeout)
+
+    def _submit_node(
+            self, node: "NodeBase", inputs: T.List[T.Any],
+            reads_stream: bool = False) -> Future:
+        if reads_stream and node.affinity == "thread":
+            # not on the pool: a consumer queued behind tasks waiting
+            # for the same stream would block its producer for good
+            return submit_on_thread(
+                f"easynode-stream-{node.type_name()}",
+                ThreadBackend._execute, node, inputs)
+        backend = self.backends.get(node.affinity)
+        if backend is None:
+            future: Future = Future()
+            future.set_exception(
+                ValueError(f"Unknown affinity of {node!r}: {node.affinity}"))
+            return future
+        return backend.submit(node, inputs)
+
+    def close(self):
+        graph = self.graph
+        graph.edge_added.disconnect(self._on_edge_changed)
+        graph.edge_removed.disconnect(self._on_edge_changed)
+        graph.node_removed.disconnect(self._on_node_removed)
+        graph.batch_changed.disconnect(self._on_batch_changed)
+        for backend in self.backends.values():
+            backend.close()
+
+    def __enter__(self) -> "GraphExecutor":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,167 @@
+"""Pass large port values between processes through shared memory.
+
+Instead of pickling a large NumPy array or bytes value through the
+worker pipe, it is copied once into a `multiprocessing.shared_memory`
+block and only a small `SharedArray` descriptor travels along the edge.
+Readers map the block without copying it.
+"""
+import typing as T
+import threading
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """Descriptor of a value stored in a shared memory block.
+
+    Attributes:
+        name: Name of the block.
+        kind: "ndarray" or "bytes".
+        shape: Array shape.
+        dtype: Array dtype, as a string.
+    """
+    name: str
+    kind: str
+    shape: T.Tuple[int, ...] = ()
+    dtype: str = "|u1"
+
+
+class _Block(shared_memory.SharedMemory):
+    def __del__(self):
+        # views of the block may outlive it at interpreter exit, then
+        # `close` fails and the mapping goes with the last of them
+        try:
+            self.close()
+        except (BufferError, OSError):
+            pass
+
+
+# blocks mapped by this process that views may still use: `close`
+# raises BufferError until the last view is gone, they are retried by
+# `collect`
+_mapped: T.List[_Block] = []
+_mapped_lock = threading.Lock()
+
+
+def _close(block: shared_memory.SharedMemory) -> bool:
+    try:
+        block.close()
+    except BufferError:
+        return False
+    return True
+
+
+def collect():
+    """Unmap the blocks opened by `open_shared` whose views are all
+    gone."""
+    with _mapped_lock:
+        _mapped[:] = [block for block in _mapped if not _close(block)]
+
+
+def _memory(block: shared_memory.SharedMemory) -> memoryview:
+    buf = block.buf
+    assert buf is not None
+    return buf
+
+
+def _is_array(value: T.Any) -> bool:
+    return type(value).__module__ == "numpy" and \
+        hasattr(value, "__array_interface__")
+
+
+def share(value: T.Any, threshold: int) -> T.Any:
+    """Copy a value into a new shared memory block.
+
+    Returns a `SharedArray`, or the value itself if it is smaller than
+    `threshold` bytes or can not be shared. The block must be freed
+    with `release`.
+    """
+    if isinstance(value, (bytes, bytearray)):
+        if len(value) < max(threshold, 1):
+            return value
+        block = shared_memory.SharedMemory(create=True, size=len(value))
+        _memory(block)[:len(value)] = value
+        desc = SharedArray(block.name, "bytes", (len(value),))
+    elif _is_array(value):
+        if value.nbytes < max(threshold, 1) or value.dtype.hasobject:
+            return value
+        import numpy as np
+        block = shared_memory.SharedMemory(create=True, size=value.nbytes)
+        dst: T.Any = np.ndarray(
+            value.shape, value.dtype, buffer=_memory(block))
+        dst[...] = value
+        del dst
+        desc = SharedArray(
+            block.name, "ndarray", tuple(value.shape), value.dtype.str)
+    else:
+        return value
+    block.close()
+    return desc
+
+
+def open_shared(desc: SharedArray) -> T.Any:
+    """Value of a block: a read-only array view, or a bytes copy.
+
+    The block stays mapped as long as the view or views of it are
+    alive, even after `release`.
+    """
+    collect()
+    block = _Block(name=desc.name)
+    if desc.kind == "bytes":
+        with _memory(block)[:desc.shape[0]] as view:
+            value = bytes(view)
+        block.close()
+        return value
+    import numpy as np
+    # `np.ndarray(buffer=...)` would only keep the mmap under the
+    # memoryview, which `close` unmaps; `frombuffer` keeps this slice of
+    # `block.buf`, which pins the mapping while the array and its views
+    # are alive
+    dtype = np.dtype(desc.dtype)
+    count = 1
+    for n in desc.shape:
+        count *= n
+    array: T.Any = np.frombuffer(
+        _memory(block)[:count * dtype.itemsize], dtype, count,
+    ).reshape(desc.shape)
+    array.flags.writeable = False
+    with _mapped_lock:
+        _mapped.append(block)
+    return array
+
+
+def materialize(desc: SharedArray) -> T.Any:
+    """Copy of the value of a block, independent of the block."""
+    value = open_shared(desc)
+    if desc.kind == "ndarray":
+        value = value.copy()
+    return value
+
+
+def release(desc: SharedArray):
+    """Free a block. Views already opened stay valid."""
+    try:
+        block = shared_memory.SharedMemory(name=desc.name)
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
+    collect()
+
+
+def share_all(values: T.Iterable[T.Any], threshold: int) -> T.List[T.Any]:
+    return [share(v, threshold) for v in values]
+
+
+def open_value(value: T.Any) -> T.Any:
+    """Open a descriptor, or the descriptors in a list of edge values."""
+    if isinstance(value, SharedArray):
+        return open_shared(value)
+    if isinstance(value, list):
+        return [open_value(v) for v in value]
+    return value
+
+
+def open_all(values: T.Iterable[T.Any]) -> T.List[T.Any]:
+    return [open_value(v) for v in values]
@@ -0,0 +1,125 @@
+import typing as T
+import queue
+import threading
+
+if T.TYPE_CHECKING:
+    from ..core.edge import EdgeBase
+
+
+class StreamClosed(Exception):
+    """Raised in a producer when all consumers of its stream stopped."""
+
+
+class _End:
+    def __init__(self, error: T.Optional[BaseException] = None) -> None:
+        self.error = error
+
+
+class Channel:
+    """Bounded queue of chunks carried by one stream edge.
+
+    The producer blocks while the queue is full, so a fast producer
+    runs at the pace of its slowest consumer.
+    """
+
+    # how often a blocked producer checks whether the consumer stopped
+    poll_interval = 0.1
+
+    def __init__(self, maxsize: int = 1) -> None:
+        self._queue: "queue.Queue[T.Any]" = queue.Queue(maxsize)
+        self._closed = threading.Event()
+
+    def put(self, chunk: T.Any):
+        while True:
+            if self._closed.is_set():
+                raise StreamClosed
+            try:
+                self._queue.put(chunk, timeout=self.poll_interval)
+                return
+            except queue.Full:
+                continue
+
+    def finish(self, error: T.Optional[BaseException] = None):
+        """Signal the end of the stream, or a failure of the producer."""
+        try:
+            self.put(_End(error))
+        except StreamClosed:
+            pass
+
+    def close(self):
+        """Stop consuming, unblocks the producer."""
+        self._closed.set()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed.is_set()
+
+    def __iter__(self) -> T.Iterator[T.Any]:
+        while True:
+            chunk = self._queue.get()
+            if isinstance(chunk, _End):
+                self.close()
+                if chunk.error is not None:
+                    raise chunk.error
+                return
+            yield chunk
+
+
+def pump(
+        chunks: T.Iterable[T.Any],
+        channels: T.List[Channel],
+        on_end: T.Callable[[T.Optional[BaseException]], None],
+        ):
+    """Feed the chunks of a producer to all of its channels.
+
+    Stops early when every consumer closed its channel. `on_end` is
+    called with the producer's exception, if any, before the consumers
+    see it.
+    """
+    iterator = iter(chunks)
+    try:
+        for chunk in iterator:
+            live = 0
+            for channel in channels:
+                try:
+                    channel.put(chunk)
+                    live += 1
+                except StreamClosed:
+                    pass
+            if live == 0:
+                break
+    except BaseException as e:
+        on_end(e)
+        for channel in channels:
+            channel.finish(e)
+        return
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+    on_end(None)
+    for channel in channels:
+        channel.finish()
+
+
+def start_pump(
+        name: str,
+        chunks: T.Iterable[T.Any],
+        edges: T.Iterable["EdgeBase"],
+        maxsize: int,
+        on_end: T.Callable[[T.Optional[BaseException]], None],
+        ) -> T.Dict[T.Any, Channel]:
+    """Stream the chunks to each edge from a new thread.
+
+    The pump runs on its own thread rather than on the executor's pool,
+    so that consumers waiting for chunks can never starve it.
+
+    Returns:
+        The channel of each edge, keyed by edge key.
+    """
+    channels = {edge.key: Channel(maxsize) for edge in edges}
+    thread = threading.Thread(
+        target=pump, args=(chunks, list(channels.values()), on_end),
+        name=f"easynode-stream-{name}", daemon=True)
+    thread.start()
+    return channels
@@ -2,6 +2,7 @@ import typing as T
 from qtpy import QtWidgets, QtGui, QtCore
 
 from ..setting import EdgeItemSetting  # type: ignore
+from .lazy_items import placeholder_port_pos
 
 if T.TYPE_CHECKING:
     from ..model import Edge, Port  # type: ignore
@@ -113,17 +114,22 @@ class EdgeItem(EdgeItemBase):
             self.edge.selected_changed.emit(value)
         return super().itemChange(change, value)
 
-    @property
-    def source_pos(self) -> QtCore.QPointF:
-        item = self.edge.source_port.item
+    @staticmethod
+    def _port_pos(port: "Port") -> QtCore.QPointF:
+        item = port.item
+        if item is None and port.node is not None and port.node.item is None:
+            # the node item is not created yet, see `LazyItems`
+            return placeholder_port_pos(port)
         assert item is not None
         return item.scenePos()
 
+    @property
+    def source_pos(self) -> QtCore.QPointF:
+        return self._port_pos(self.edge.source_port)
+
     @property
     def target_pos(self) -> QtCore.QPointF:
-        item = self.edge.target_port.item
-        assert item is not None
-        return item.scenePos()
+        return self._port_pos(self.edge.target_port)
 
     def paint(
             self,
@@ -131,10 +137,12 @@ class EdgeItem(EdgeItemBase):
             option: QtWidgets.QStyleOptionGraphicsItem,
             widget: T.Optional[QtWidgets.QWidget] = None
             ) -> None:
-        if self.edge.source_port.item is None:
-            return
-        if self.edge.target_port.item is None:
-            return
+        # port items are created on the first paint of their node item
+        for port in (self.edge.source_port, self.edge.target_port):
+            node = port.node
+            if port.item is None and node is not None and \
+                    node.item is not None:
+                return
         super().paint(painter, option, widget)
 
 
@@ -0,0 +1,184 @@
+"""Node items created when their node comes into view."""
+import typing as T
+
+from qtpy import QtCore, QtGui
+
+from ..setting import NodeItemSetting, PortSetting
+from ..utils.spatial import Rect, SpatialIndex
+
+if T.TYPE_CHECKING:
+    from ..model import Graph, Node, Port, Edge  # type: ignore
+
+
+def placeholder_size(node: "Node") -> T.Tuple[float, float]:
+    """Estimated (width, height) of the item of a node, without the
+    width of its title and widgets."""
+    setting = node.item_setting or NodeItemSetting()
+    rows = max(len(node.input_ports), len(node.output_ports))
+    width = setting.default_width + 2 * setting.outline_width
+    height = (
+        setting.title_area_height
+        + setting.outline_radius
+        + setting.space_between_title_and_content
+        + rows * setting.port_setting.height
+    )
+    return width, height
+
+
+def placeholder_port_pos(port: "Port") -> QtCore.QPointF:
+    """Estimated scene position of a port of a node without item, where
+    `Port.create_item` would put it."""
+    node = port.node
+    assert node is not None
+    setting = node.item_setting or NodeItemSetting()
+    port_setting = port._setting or setting.port_setting or PortSetting()
+    x, y = node.attrs.get('pos', (0.0, 0.0))
+    y += setting.title_area_height + setting.status_bar_height
+    y += setting.space_between_title_and_content
+    y += port_setting.height * port.index
+    y += port_setting.height / 2
+    y -= port_setting.item_setting.radius / 2
+    if port.type == 'out':
+        x += placeholder_size(node)[0]
+    return QtCore.QPointF(x, y)
+
+
+class LazyItems(QtCore.QObject):
+    """Create the items of the nodes of a graph only when they come into
+    view.
+
+    A node added with a position in `attrs['pos']` first gets a
+    placeholder: a rectangle of its estimated size, kept in a spatial
+    index. The scene paints the placeholders in its background, and
+    the pending nodes in the area it paints get their `NodeItem` on the
+    next event loop iteration, so the number of items follows what has
+    been looked at, not the size of the graph. An edge gets its item
+    once one of its nodes has one.
+
+    Nodes without a position are created right away, as are the nodes
+    that already have an item (e.g. re-added by undo).
+
+    Args:
+        graph: Graph whose nodes are deferred.
+        margin: Space around the painted area in which nodes are
+            created in advance.
+        min_scale: Below this zoom factor of the view, only the
+            placeholders are painted.
+    """
+
+    def __init__(
+            self,
+            graph: "Graph",
+            margin: float = 200.0,
+            min_scale: float = 0.25,
+            ) -> None:
+        super().__init__(graph)
+        self.graph = graph
+        self.margin = margin
+        self.min_scale = min_scale
+        self.index = SpatialIndex()
+        self.pending: T.Dict[int, "Node"] = {}
+        self._exposed: T.List[Rect] = []
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._create_exposed)
+        self._pen = QtGui.QPen(QtGui.QColor("#FF888888"), 0)
+        self._brush = QtGui.QBrush(QtGui.QColor("#FF444444"))
+
+    def __len__(self) -> int:
+        return len(self.pending)
+
+    def __contains__(self, node: "Node") -> bool:
+        return node.id in self.pending
+
+    def defers(self, node: "Node") -> bool:
+        """Whether a node added to the graph waits for its item."""
+        return node.item is None and 'pos' in node.attrs
+
+    def rect(self, node: "Node") -> Rect:
+        """Placeholder rectangle of a pending node."""
+        return self.index.rects[node.id]
+
+    def add(self, node: "Node"):
+        x, y = node.attrs['pos']
+        w, h = placeholder_size(node)
+        self.index.insert(node.id, (x, y, x + w, y + h))
+        self.pending[node.id] = node
+
+    def remove(self, node: "Node"):
+        self.index.remove(node.id)
+        del self.pending[node.id]
+
+    def move(self, node: "Node", x: float, y: float):
+        """Move the placeholder of a pending node."""
+        node.attrs['pos'] = [x, y]
+        x0, y0, x1, y1 = self.index.rects[node.id]
+        self.index.insert(node.id, (x, y, x + x1 - x0, y + y1 - y0))
+
+    def create_items(self, nodes: T.Iterable["Node"]):
+        """Create the items of these nodes, if they are pending, and of
+        their edges."""
+        graph = self.graph
+        scene = graph.scene
+        if scene is None:
+            return
+        es = scene.editor.setting  # type: ignore
+        for node in nodes:
+            if node.id not in self.pending:
+                continue
+            self.remove(node)
+            graph._add_item(node.create_item(es.node_item_setting))
+            edges = T.cast(
+                T.List["Edge"], node.input_edges + node.output_edges)
+            for edge in edges:
+                if edge.item is None:
+                    graph._add_item(edge.create_item(es.edge_item_setting))
+
+    def create_all(self):
+        """Create the items of all the pending nodes."""
+        self.create_items(list(self.pending.values()))
+
+    def expose(self, rect: QtCore.QRectF, scale: float):
+        """Create the pending nodes in a painted area of the scene,
+        from the event loop."""
+        if scale < self.min_scale or not self.pending:
+            return
+        m = self.margin
+        self._exposed.append((
+            rect.left() - m, rect.top() - m,
+            rect.right() + m, rect.bottom() + m))
+        self._timer.start()
+
+    def _create_exposed(self) -> None:
+        found: T.Set[int] = set()
+        for rect in self._exposed:
+            found |= self.index.query(rect)
+        self._exposed.clear()
+        self.create_items([self.pending[i] for i in found])
+
+    def paint(self, painter: QtGui.QPainter, rect: QtCore.QRectF):
+        """Paint the placeholders in an area of the scene, and the
+        edges between them."""
+        found = self.index.query(
+            (rect.left(), rect.top(), rect.right(), rect.bottom()))
+        if not found:
+            return
+        rects, lines = [], []
+        for node_id in found:
+            x0, y0, x1, y1 = self.index.rects[node_id]
+            rects.append(QtCore.QRectF(x0, y0, x1 - x0, y1 - y0))
+            node = self.pending[node_id]
+            # each edge once, from its source if that is painted
+            edges = T.cast(T.List["Edge"], node.output_edges + [
+                edge for edge in node.input_edges
+                if edge.source_port.node.id not in found])  # type: ignore
+            for edge in edges:
+                if edge.item is None:
+                    lines.append(QtCore.QLineF(
+                        placeholder_port_pos(edge.source_port),
+                        placeholder_port_pos(edge.target_port)))
+        painter.setPen(self._pen)
+        painter.setBrush(self._brush)
+        painter.drawRects(rects)  # type: ignore
+        painter.drawLines(lines)  # type: ignore
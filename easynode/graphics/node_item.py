@@ -55,11 +55,15 @@ class NodeItem(QtWidgets.QGraphicsItem):
         self.setZValue(1)
         self._movement_state = MovementState.mouse_released
         self._movement_start_pos = QtCore.QPointF(0, 0)
+        node.status_changed.connect(self._on_status_changed)
 
     @property
     def view(self) -> "GraphicsView":
         return self.scene().views()[0]
 
+    def _on_status_changed(self, status: str):
+        self.update()
+
     def show_node_menu(self, pos: QtCore.QPoint):
         menu = self.node.create_menu()
         menu.exec_(pos)
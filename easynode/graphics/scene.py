@@ -68,3 +68,8 @@ class GraphicsScene(QtWidgets.QGraphicsScene):
             painter.drawLines(lines_dense)  # type: ignore
             painter.setPen(self.pen_grid_loose)
             painter.drawLines(lines_loose)  # type: ignore
+        lazy_items = self.graph.lazy_items
+        if lazy_items is not None:
+            lazy_items.paint(painter, rect)  # type: ignore
+            lazy_items.expose(
+                QtCore.QRectF(rect), painter.worldTransform().m11())
@@ -1,5 +1,6 @@
 import typing as T
 import json
+from itertools import chain
 
 from qtpy import QtWidgets, QtGui, QtCore
 from .port_item import PortItem
@@ -326,21 +327,22 @@ class GraphicsView(QtWidgets.QGraphicsView):
         """Remove all selected items."""
         from ..command import RemoveItemsCommand  # type: ignore
         graph = self.scene().graph
-        deleted_items = set()  # remove deleted items
         items = self.scene().selectedItems()
-        for item in items:
-            if isinstance(item, NodeItem):
-                node = item.node
-                for edge in node.input_edges + node.output_edges:
-                    # mark connected edges
-                    deleted_items.add(edge.item)
-                deleted_items.add(node.item)
-                graph.remove_node(node)
-            elif isinstance(item, EdgeItem):
-                edge = item.edge
-                deleted_items.add(edge.item)
-                graph.remove_edge(edge)
-        deleted_items = list(deleted_items)
+        nodes = [item.node for item in items if isinstance(item, NodeItem)]
+        sub_graph = graph.sub_graph(nodes)
+        edges = {
+            id(item.edge): item.edge for item in items
+            if isinstance(item, EdgeItem)
+        }
+        # inner and boundary edges go away with the nodes
+        for edge in chain(sub_graph.edges, sub_graph.boundary_edges):
+            edges[id(edge)] = edge
+        deleted_items: T.List[QtWidgets.QGraphicsItem] = [
+            node.item for node in nodes]
+        deleted_items.extend(edge.item for edge in edges.values())
+        with graph.batch():
+            graph.remove_nodes(*nodes)
+            graph.remove_edges(*edges.values())
         self.undo_stack.push(
             RemoveItemsCommand(self, deleted_items))
 
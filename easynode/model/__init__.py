@@ -1,7 +1,7 @@
 from .node import Node
 from .edge import Edge
 from .graph import Graph
-from .port import Port, DataPort
+from .port import Port, DataPort, StreamPort
 
 
-__all__ = ["Node", "Edge", "Graph", "Port", "DataPort"]
+__all__ = ["Node", "Edge", "Graph", "Port", "DataPort", "StreamPort"]
@@ -2,6 +2,7 @@ import typing as T
 
 from qtpy import QtCore
 
+from ..core.edge import EdgeBase, EdgeKey  # noqa: F401
 from ..graphics.edge_item import EdgeItem
 from ..setting import EdgeItemSetting
 
@@ -10,9 +11,12 @@ if T.TYPE_CHECKING:
     from .graph import Graph
 
 
-class Edge(QtCore.QObject):
+class Edge(QtCore.QObject, EdgeBase):
     selected_changed = QtCore.Signal(bool)
 
+    source_port: "Port"
+    target_port: "Port"
+
     def __init__(
             self, source_port: "Port", target_port: "Port",
             item_setting: T.Optional[EdgeItemSetting] = None,
@@ -23,6 +27,7 @@ class Edge(QtCore.QObject):
         self.item: T.Optional[EdgeItem] = None
         self.graph: T.Optional["Graph"] = None
         self.item_setting = item_setting
+        self._key: T.Optional[EdgeKey] = None
 
     def create_item(
             self,
@@ -34,21 +39,3 @@ class Edge(QtCore.QObject):
             item.update_path()
         self.item = item
         return item
-
-    def __eq__(self, other: object) -> bool:
-        if not isinstance(other, Edge):
-            return NotImplemented
-        return (
-            (self.source_port == other.source_port) and
-            (self.target_port == other.target_port)
-        )
-
-    def __hash__(self):
-        s_port = self.source_port
-        t_port = self.target_port
-        s_node = s_port.node
-        t_node = t_port.node
-        return hash((
-            (id(s_node), s_port.index),
-            (id(t_node), t_port.index)
-        ))
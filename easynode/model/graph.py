@@ -1,9 +1,13 @@
 import typing as T
-from qtpy import QtCore
+from qtpy import QtCore, QtWidgets
 import json
 
 from .node import Node
 from .edge import Edge
+from ..core.graph import (  # noqa: F401
+    ElementsView, GraphChanges, GraphBase, _BatchState,
+    SubGraph as _SubGraphBase,
+)
 from ..utils import layout_graph
 from ..utils.serialization import (
     serialize_nodes_and_edges,
@@ -12,84 +16,103 @@ from ..utils.serialization import (
 
 if T.TYPE_CHECKING:
     from ..graphics.scene import GraphicsScene
+    from ..graphics.lazy_items import LazyItems
+    from ..utils.incremental import IncrementalLayout
+    from ..utils.journal import Journal
+    from ..utils.layout_runner import LayoutRunner
     from ..node_editor import NodeEditor
 
 
-class Graph(QtCore.QObject):
+class Graph(QtCore.QObject, GraphBase):
     elements_changed = QtCore.Signal()
     node_added = QtCore.Signal(Node)
     node_removed = QtCore.Signal(Node)
     edge_added = QtCore.Signal(Edge)
     edge_removed = QtCore.Signal(Edge)
+    batch_changed = QtCore.Signal(GraphChanges)
+    nodes_changed = QtCore.Signal(list)
+    port_value_changed = QtCore.Signal(object)
 
     def __init__(
             self,
             scene: T.Optional["GraphicsScene"] = None,
             ) -> None:
         super().__init__()
-        self.nodes: T.List[Node] = []
-        self.edges: T.List[Edge] = []
+        self._init_store()
         self.scene: T.Optional["GraphicsScene"] = scene
+        # state of the "incremental" auto layout
+        self.incremental_layout: T.Optional["IncrementalLayout"] = None
+        # runs the background auto layouts
+        self.layout_runner: T.Optional["LayoutRunner"] = None
+        # node items created when they come into view
+        self.lazy_items: T.Optional["LazyItems"] = None
+        # autosave of the changes
+        self.journal: T.Optional["Journal"] = None
+
+    def _commit_batch(self, batch: _BatchState):
+        if self.scene and batch.pending_items:
+            for item in batch.pending_items.values():
+                self.scene.addItem(item)
+        super()._commit_batch(batch)
+
+    def _add_item(self, item: QtWidgets.QGraphicsItem):
+        assert self.scene is not None
+        if self._batch is not None:
+            self._batch.pending_items[id(item)] = item
+        else:
+            self.scene.addItem(item)
 
-    def add_node(self, node: Node):
-        self.nodes.append(node)
+    def _remove_item(self, item: QtWidgets.QGraphicsItem):
+        assert self.scene is not None
+        if self._batch is not None:
+            if self._batch.pending_items.pop(id(item), None) is not None:
+                return
+        self.scene.removeItem(item)
+
+    def _attach_node(self, node: Node):
+        node.port_value_changed.connect(self.port_value_changed)
+        if self.lazy_items is not None and self.lazy_items.defers(node):
+            self.lazy_items.add(node)
+            return
         if self.scene:
             editor = self.scene.editor  # type: ignore
             setting = editor.setting.node_item_setting
             if node.item is None:
                 node.create_item(setting)
             assert node.item is not None
-            self.scene.addItem(node.item)
-        self.node_added.emit(node)
-        self.elements_changed.emit()  # type: ignore
+            self._add_item(node.item)
 
-    def add_nodes(self, *nodes: Node):
-        for node in nodes:
-            self.add_node(node)
-
-    def remove_node(self, node: Node):
-        if node not in self.nodes:
+    def _detach_node(self, node: Node):
+        node.port_value_changed.disconnect(self.port_value_changed)
+        if self.lazy_items is not None and node in self.lazy_items:
+            self.lazy_items.remove(node)
             return
-        self.nodes.remove(node)
         if self.scene:
             assert node.item is not None
-            self.scene.removeItem(node.item)
-        for edge in node.input_edges + node.output_edges:
-            self.remove_edge(edge)
-        self.node_removed.emit(node)
-        self.elements_changed.emit()  # type: ignore
-
-    def add_edge(self, edge: Edge):
-        if edge in self.edges:
-            return
-        self.edges.append(edge)
+            self._remove_item(node.item)
+
+    def _attach_edge(self, edge: Edge):
         edge.source_port.edge_added.emit(edge)
         edge.target_port.edge_added.emit(edge)
+        lazy_items = self.lazy_items
+        if lazy_items is not None and edge.item is None:
+            s_node, t_node = edge.source_port.node, edge.target_port.node
+            if s_node in lazy_items and t_node in lazy_items:  # type: ignore
+                # created with the first of its nodes
+                return
         if self.scene:
             editor = self.scene.editor  # type: ignore
             setting = editor.setting.edge_item_setting
             if edge.item is None:
                 edge.create_item(setting)
             assert edge.item is not None
-            self.scene.addItem(edge.item)
-        self.edge_added.emit(edge)
-        self.elements_changed.emit()  # type: ignore
-
-    def add_edges(self, *edges: Edge):
-        for edge in edges:
-            self.add_edge(edge)
+            self._add_item(edge.item)
 
-    def remove_edge(self, edge: Edge):
-        if edge not in self.edges:
-            return
-        self.edges.remove(edge)
+    def _detach_edge(self, edge: Edge):
         edge.source_port.edge_removed.emit(edge)
         edge.target_port.edge_removed.emit(edge)
-        if self.scene:
-            assert edge.item is not None
-            self.scene.removeItem(edge.item)
-        self.edge_removed.emit(edge)
-        self.elements_changed.emit()  # type: ignore
+        if self.scene and edge.item is not None:
+            self._remove_item(edge.item)
 
     def create_items(self):
         if self.scene:
@@ -101,22 +124,73 @@ class Graph(QtCore.QObject):
                 edge.create_item(es.edge_item_setting)
                 self.scene.addItem(edge.item)
 
+    def enable_lazy_items(
+            self,
+            margin: float = 200.0,
+            min_scale: float = 0.25,
+            ) -> "LazyItems":
+        """Create the items of the nodes added from now on only when
+        they come into view, see `LazyItems`."""
+        from ..graphics.lazy_items import LazyItems
+        if self.lazy_items is None:
+            self.lazy_items = LazyItems(self, margin, min_scale)
+        return self.lazy_items
+
+    def enable_journal(
+            self,
+            path: str,
+            interval: int = 1000,
+            max_ratio: float = 0.5,
+            resume: bool = False,
+            ) -> "Journal":
+        """Autosave the graph to `path` by appending its changes to a
+        journal, see `Journal`."""
+        from ..utils.journal import Journal
+        if self.journal is not None:
+            self.journal.close()
+        self.journal = Journal(
+            self, path, interval, max_ratio, resume, parent=self)
+        return self.journal
+
     def auto_layout(
             self,
             direction: str = "LR",
             padding_level: int = 100,
             padding_node: int = 20,
-            ) -> None:
-        if self.scene:
-            layout_graph(
-                self, direction=direction,
-                padding_level=padding_level,
-                padding_node=padding_node
-            )
-        else:
+            mode: str = "levels",
+            pinned: T.Iterable[Node] = (),
+            iterations: int = 100,
+            background: bool = False,
+            ) -> T.Optional["LayoutRunner"]:
+        """Lay out the nodes, see `layout_graph`.
+
+        With `background`, the layout is computed in a worker thread
+        and applied when done, and the `LayoutRunner` is returned to
+        follow its progress or cancel it. Incremental layouts always
+        run right away.
+        """
+        if not self.scene:
             raise ValueError("Scene is not set")
+        if background and mode != "incremental":
+            if self.layout_runner is None:
+                from ..utils.layout_runner import LayoutRunner
+                self.layout_runner = LayoutRunner(self, parent=self)
+            self.layout_runner.start(
+                mode, direction=direction,
+                padding_level=padding_level, padding_node=padding_node,
+                pinned=pinned, iterations=iterations)
+            return self.layout_runner
+        layout_graph(
+            self, direction=direction,
+            padding_level=padding_level,
+            padding_node=padding_node,
+            mode=mode,
+            pinned=pinned,
+            iterations=iterations,
+        )
+        return None
 
-    def sub_graph(self, nodes: T.List[Node]) -> "SubGraph":
+    def sub_graph(self, nodes: T.Iterable[Node]) -> "SubGraph":
         return SubGraph(nodes)
 
     def serialize(self) -> str:
@@ -128,29 +202,41 @@ class Graph(QtCore.QObject):
             data_str: str,
             editor: "NodeEditor",
             add_to_editor: bool = True,
+            lazy: bool = False,
             ) -> 'Graph':
         data = json.loads(data_str)
-        return deserialize_graph(data, editor, add_to_editor)
+        return deserialize_graph(data, editor, add_to_editor, lazy)
 
+    def serialize_binary(self, compression: T.Optional[str] = None) -> bytes:
+        from ..utils.binary_format import dump_graph_binary
+        return dump_graph_binary(self.nodes, self.edges, compression)
 
-class SubGraph:
-    def __init__(
+    @staticmethod
+    def deserialize_binary(
+            blob: bytes,
+            editor: "NodeEditor",
+            add_to_editor: bool = True,
+            lazy: bool = False,
+            ) -> 'Graph':
+        from ..utils.binary_format import deserialize_graph_binary
+        return deserialize_graph_binary(blob, editor, add_to_editor, lazy)
+
+    def apply_patch(
             self,
-            nodes: T.List[Node],
+            patch: T.Dict[str, T.Any],
+            editor: "NodeEditor",
             ) -> None:
-        self.nodes = nodes
-        self.edges = self.get_edges()
+        """Apply a patch made by `easynode.utils.graph_diff.diff`, with
+        the node factories of the editor."""
+        from ..utils.graph_diff import apply_patch
+        from ..utils.serialization import SettingsTable, deserialize_node
+        settings = SettingsTable(patch.get('settings'))
+        apply_patch(
+            self, patch,
+            load=lambda data: deserialize_node(data, editor, settings))
 
-    def get_edges(self) -> T.List[Edge]:
-        edges = set()
-        for node in self.nodes:
-            for edge in node.input_edges + node.output_edges:
-                s_node = edge.source_port.node
-                t_node = edge.target_port.node
-                if (s_node in self.nodes) and (t_node in self.nodes):
-                    edges.add(edge)
-        return list(edges)
 
+class SubGraph(_SubGraphBase):
     def _get_nodes_item_bounding_rect(self) -> QtCore.QRectF:
         rect = QtCore.QRectF()
         for node in self.nodes:
@@ -163,20 +249,23 @@ class SubGraph:
             graph: Graph,
             pos: T.Optional[QtCore.QPointF] = None,
             ) -> None:
-        graph.add_nodes(*self.nodes)
-        if pos is not None:
-            bounding_rect = self._get_nodes_item_bounding_rect()
-            top_left = bounding_rect.topLeft()
-            for node in self.nodes:
-                assert node.item is not None
-                attr_pos = node.attrs.get("pos")
-                if attr_pos is not None:
-                    p = QtCore.QPointF(*attr_pos)
-                    node.item.setPos(p)
-                offset = node.item.pos() - top_left
-                new_pos = pos + offset
-                node.item.setPos(new_pos)
-        graph.add_edges(*self.edges)
+        with graph.batch():
+            graph.add_nodes(*self.nodes)
+            if graph.lazy_items is not None:
+                graph.lazy_items.create_items(self.nodes)
+            if pos is not None:
+                bounding_rect = self._get_nodes_item_bounding_rect()
+                top_left = bounding_rect.topLeft()
+                for node in self.nodes:
+                    assert node.item is not None
+                    attr_pos = node.attrs.get("pos")
+                    if attr_pos is not None:
+                        p = QtCore.QPointF(*attr_pos)
+                        node.item.setPos(p)
+                    offset = node.item.pos() - top_left
+                    new_pos = pos + offset
+                    node.item.setPos(new_pos)
+            graph.add_edges(*self.edges)
         scene = graph.scene
         assert scene is not None
         scene.clearSelection()
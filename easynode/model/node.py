@@ -5,22 +5,29 @@ from collections import OrderedDict
 from qtpy import QtCore, QtWidgets
 
 from .port import Port
+from .edge import Edge
+from ..core.node import NodeBase
 from ..graphics.node_item import NodeItem
 from ..setting import NodeItemSetting
 
 if T.TYPE_CHECKING:
     from qtpy.QtWidgets import QWidget
-    from .edge import Edge
 
 
-class Node(QtCore.QObject):
+class Node(QtCore.QObject, NodeBase):
     selected_changed = QtCore.Signal(bool)
     position_changed = QtCore.Signal(QtCore.QPointF)
     renamed = QtCore.Signal(str)
+    status_changed = QtCore.Signal(str)
+    # emitted with the DataPort whose value was edited
+    port_value_changed = QtCore.Signal(object)
 
     _instance_count = 0
-    input_ports: T.List[Port] = []
-    output_ports: T.List[Port] = []
+    input_ports: T.List[Port] = []  # type: ignore
+    output_ports: T.List[Port] = []  # type: ignore
+    edge_class = Edge
+    affinity: str = "thread"
+    cacheable: bool = True
     item_setting: NodeItemSetting = NodeItemSetting()
     theme_color: str = "#ffffff"
 
@@ -36,11 +43,12 @@ class Node(QtCore.QObject):
             **attrs
             ) -> None:
         super().__init__()
-        self.status = "normal"
+        self._status = "normal"
         if name is None:
             name = self.type_name() + ": " + str(self._instance_count)
         self._name = name
         self.__class__._instance_count += 1
+        self._init_adjacency()
         self._init_ports()
         self.widget: T.Optional["QWidget"] = self.create_widget()
         self.item: T.Optional["NodeItem"] = None
@@ -49,45 +57,13 @@ class Node(QtCore.QObject):
         self.attrs = attrs
         self.position_changed.connect(self._on_position_changed)
 
-    @classmethod
-    def type_name(cls) -> str:
-        return cls.__name__
-
     def create_widget(self) -> T.Optional["QWidget"]:
         return None
 
-    def create_edge(
-            self, other: "Node",
-            source_port_idx: int, target_port_idx: int) -> "Edge":
-        from .edge import Edge
-        source_port = self.output_ports[source_port_idx]
-        target_port = other.input_ports[target_port_idx]
-        e = Edge(source_port, target_port)
-        return e
-
-    def _init_ports(self):
-        cls = self.__class__
-        input_ports = [
-            port.blueprint_copy() for port in cls.input_ports
-        ]
-        output_ports = [
-            port.blueprint_copy() for port in cls.output_ports
-        ]
-        self.input_ports = input_ports
-        self.output_ports = output_ports
-        for tp, ports in zip(("in", "out"), (input_ports, output_ports)):
-            for port in ports:
-                port.type = tp
-                port.node = self
-
     def _on_position_changed(self, pos: QtCore.QPointF):
         pos_attr = [pos.x(), pos.y()]
         self.attrs['pos'] = pos_attr
 
-    @property
-    def id(self) -> int:
-        return id(self)
-
     @property
     def name(self) -> str:
         return self._name
@@ -97,6 +73,17 @@ class Node(QtCore.QObject):
         self._name = value
         self.renamed.emit(value)
 
+    @property
+    def status(self) -> str:
+        return self._status
+
+    @status.setter
+    def status(self, value: str):
+        # may be set from executor threads, slots connected through
+        # the signal run on the GUI thread
+        self._status = value
+        self.status_changed.emit(value)
+
     def __repr__(self) -> str:
         cls_name = self.__class__.__name__
         return f"{cls_name}({self.name})"
@@ -114,20 +101,6 @@ class Node(QtCore.QObject):
         self.item = item
         return item
 
-    @property
-    def input_edges(self) -> T.List["Edge"]:
-        edges: T.List["Edge"] = []
-        for port in self.input_ports:
-            edges.extend(port.edges)
-        return edges
-
-    @property
-    def output_edges(self) -> T.List["Edge"]:
-        edges: T.List["Edge"] = []
-        for port in self.output_ports:
-            edges.extend(port.edges)
-        return edges
-
     def on_edit_name(self):
         dialog = QtWidgets.QInputDialog()
         dialog.setWindowTitle("Edit name")
@@ -2,6 +2,7 @@ import typing as T
 
 from qtpy import QtCore, QtWidgets
 
+from ..core.port import PortBase, DataPortBase, StreamPortBase
 from ..graphics.port_item import PortItem
 from .edge import Edge
 from ..setting import PortSetting
@@ -15,7 +16,7 @@ if T.TYPE_CHECKING:
     from .node import Node
 
 
-class Port(QtCore.QObject):
+class Port(QtCore.QObject, PortBase):
     edge_added = QtCore.Signal(Edge)
     edge_removed = QtCore.Signal(Edge)
 
@@ -28,7 +29,8 @@ class Port(QtCore.QObject):
         self.node: T.Optional["Node"] = None
         self.item: T.Optional["PortItem"] = None
         self.type: T.Optional[str] = None  # 'in' or 'out'
-        self.edges: T.Set["Edge"] = set()
+        self._index: T.Optional[int] = None  # assigned by the node
+        self.edges: T.Set["Edge"] = set()  # type: ignore
         self.edge_added.connect(self.on_edge_added)
         self.edge_removed.connect(self.on_edge_removed)
         self._setting = setting
@@ -47,21 +49,6 @@ class Port(QtCore.QObject):
             else:
                 return PortSetting()
 
-    def on_edge_added(self, edge: Edge):
-        self.edges.add(edge)
-
-    def on_edge_removed(self, edge: Edge):
-        self.edges.remove(edge)
-
-    @property
-    def index(self) -> int:
-        if self.node is None:
-            raise ValueError("Node is not set")
-        if self.type == "in":
-            return self.node.input_ports.index(self)
-        else:
-            return self.node.output_ports.index(self)
-
     def create_item(self):
         assert self.node is not None
         node_item = self.node.item
@@ -81,7 +68,7 @@ class Port(QtCore.QObject):
         self.item = item
 
 
-class DataPort(Port):
+class DataPort(Port, DataPortBase):
     def __init__(
             self, name: str,
             data_type: type = object,
@@ -104,15 +91,29 @@ class DataPort(Port):
             self.data_default, self.widget_args, self.setting)
 
     @property
-    def is_active(self) -> bool:
-        return len(self.edges) == 0
+    def value(self) -> T.Any:
+        if self.widget is not None:
+            return self.widget.value
+        return self.widget_init_value
+
+    @value.setter
+    def value(self, value: T.Any):
+        if self.widget is not None:
+            self.widget.value = value
+        else:
+            self.widget_init_value = value
+            self._on_value_changed(value)
 
-    def on_edge_added(self, edge: Edge):
+    def _on_value_changed(self, value: T.Any):
+        if self.node is not None:
+            self.node.port_value_changed.emit(self)
+
+    def on_edge_added(self, edge: Edge):  # type: ignore
         super().on_edge_added(edge)
         if (not self.is_active) and (self.widget):
             self.widget.setEnabled(False)
 
-    def on_edge_removed(self, edge: Edge):
+    def on_edge_removed(self, edge: Edge):  # type: ignore
         super().on_edge_removed(edge)
         if self.is_active and (self.widget):
             self.widget.setEnabled(True)
@@ -130,4 +131,21 @@ class DataPort(Port):
             self.widget = TextPortWidget(self, kwargs)
         if self.widget_init_value is not None:
             self.widget.value = self.widget_init_value
+        if not self.is_active:
+            # connected before the item was created
+            self.widget.setEnabled(False)
+        self.widget.value_changed.connect(self._on_value_changed)
         return self.widget
+
+
+class StreamPort(Port, StreamPortBase):
+    def __init__(
+            self, name: str,
+            maxsize: int = 1,
+            setting: T.Optional["PortSetting"] = None,
+            ) -> None:
+        super().__init__(name, setting)
+        self.maxsize = maxsize
+
+    def blueprint_copy(self) -> "StreamPort":
+        return self.__class__(self.name, self.maxsize, self._setting)
@@ -9,6 +9,11 @@ from .widgets.custom_tab import CustomTabWidget
 from .model.node import Node
 from .model.graph import Graph
 
+if T.TYPE_CHECKING:
+    from .utils.graph_loader import GraphLoader
+    from .utils.journal import Journal
+    from .utils.sqlite_store import GraphStore
+
 
 class NodeEditor(QtWidgets.QWidget):
     scene_added = QtCore.Signal(GraphicsScene)
@@ -124,10 +129,98 @@ class NodeEditor(QtWidgets.QWidget):
         else:
             app.setStyleSheet(style_sheet)  # type: ignore
 
-    def load_graph(self, data_str: str):
-        Graph.deserialize(data_str, self, add_to_editor=True)
+    def load_graph(self, data_str: str, lazy: bool = False):
+        Graph.deserialize(data_str, self, add_to_editor=True, lazy=lazy)
+
+    def load_graph_from_json_file(self, file_path: str, lazy: bool = False):
+        """Load a JSON graph file into a new scene. The file is parsed
+        incrementally, it is never held in memory as a whole.
+
+        With `lazy`, node items are created when they come into view,
+        see `Graph.enable_lazy_items`.
+        """
+        from .utils.json_stream import JsonGraphReader
+        from .utils.serialization import (
+            SettingsTable, deserialize_node, iter_graph_chunks,
+        )
+        graph: T.Optional[Graph] = None
+        settings = SettingsTable()
+        with open(file_path, 'rb') as f:
+            chunks = iter_graph_chunks(
+                JsonGraphReader(f),
+                lambda data: deserialize_node(data, self, settings),
+                settings=settings)
+            for nodes, edges in chunks:
+                if graph is None:
+                    self.add_scene_and_view()
+                    graph = self.current_scene.graph
+                    if lazy:
+                        graph.enable_lazy_items()
+                with graph.batch():
+                    graph.add_nodes(*nodes)
+                    graph.add_edges(*edges)
+        if graph is None:
+            self.add_scene_and_view()
 
-    def load_graph_from_json_file(self, file_path: str):
-        with open(file_path, 'r') as f:
-            data_str = f.read()
-        self.load_graph(data_str)
+    def load_graph_from_binary_file(
+            self, file_path: str, lazy: bool = False):
+        """Load a graph saved with `Graph.serialize_binary` into a new
+        scene."""
+        with open(file_path, 'rb') as f:
+            Graph.deserialize_binary(
+                f.read(), self, add_to_editor=True, lazy=lazy)
+
+    def load_journaled_graph(
+            self, file_path: str,
+            lazy: bool = False,
+            interval: int = 1000,
+            ) -> "Journal":
+        """Load a graph autosaved by a `Journal`, its snapshot then the
+        changes of its journal, into a new scene, and go on recording
+        its changes."""
+        from .utils.graph_diff import read_patches
+        self.load_graph_from_json_file(file_path, lazy=lazy)
+        graph = self.current_scene.graph
+        for patch in read_patches(file_path):
+            graph.apply_patch(patch, self)
+        return graph.enable_journal(file_path, interval, resume=True)
+
+    def open_sqlite_graph(
+            self, file_path: str,
+            region: T.Optional[T.Tuple[float, float, float, float]] = None,
+            lazy: bool = False,
+            ) -> "GraphStore":
+        """Load a graph from a SQLite database into a new scene, the
+        nodes in the rectangle `region` (x0, y0, x1, y1) only if given.
+        `GraphStore.save` of the returned store writes the changes made
+        in the scene since."""
+        from .utils.serialization import deserialize_node
+        from .utils.sqlite_store import GraphStore
+        store = GraphStore(file_path)
+        self.add_scene_and_view()
+        graph = self.current_scene.graph
+        if lazy:
+            graph.enable_lazy_items()
+
+        def load(data: T.Dict[str, T.Any]) -> Node:
+            return deserialize_node(data, self, store.settings)
+
+        if region is None:
+            store.load_graph(graph=graph, load=load)
+        else:
+            store.load_region(*region, graph=graph, load=load)
+        store.track(graph)
+        return store
+
+    def start_loading_json_file(
+            self, file_path: str,
+            chunk_size: int = 1000,
+            lazy: bool = False) -> "GraphLoader":
+        """Load a JSON graph file into a new scene chunk by chunk, from
+        the event loop. Connect to the returned loader's `progress` and
+        `finished` signals to follow it."""
+        from .utils.graph_loader import GraphLoader
+        loader = GraphLoader(
+            self, file_path, chunk_size, lazy=lazy, parent=self)
+        loader.start()
+        return loader
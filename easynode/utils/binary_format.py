@@ -0,0 +1,504 @@
+"""Compact binary graph format.
+
+A file is an 8-byte header, the magic bytes, the format version and the
+compression of the payload, followed by the payload:
+
+- the string table: every distinct string of the graph, once,
+- the nodes, as columns of indexes into the string table (type name,
+  name, port layout, port values, attrs and item setting) and of
+  positions,
+- the edges, as columns of node indexes and port indexes,
+- the index of the settings table (see `SettingsTable`), since
+  version 2,
+- the `uid`s of the nodes, as a column, since version 3.
+
+Port layouts, port values, attrs and the settings table are stored as
+JSON texts in the string table, so nodes of the same type share one
+entry. Columns are `array.array`s written in little-endian
+order.
+
+Core nodes are saved and loaded on a fast path: the port layout and
+values of a node are looked up by the values of its port attributes
+instead of serialized each time, and nodes of classes that keep the default
+`__init__` are built in bulk with `Node._restore_many`.
+
+This module does not import qtpy, like `serialization`.
+"""
+import typing as T
+import bz2
+import gc
+import json
+import lzma
+import math
+import struct
+import sys
+import zlib
+from array import array
+from contextlib import contextmanager
+
+from ..core.node import Node as CoreNode
+from ..core.port import DataPortBase, StreamPortBase
+from ..setting import NodeItemSetting
+from .serialization import (
+    FactoryTable, SettingsTable, generic_node_class, serialize_node,
+    serialize_port, _node_from_factory,
+)
+
+if T.TYPE_CHECKING:
+    from ..node_editor import NodeEditor
+    from ..model.graph import Graph
+    from .. import core
+
+
+MAGIC = b"ENGB"
+VERSION = 3
+
+# compression name -> (code, compress, decompress)
+COMPRESSIONS: T.Dict[T.Optional[str], T.Tuple[
+        int, T.Callable[[bytes], bytes], T.Callable[[bytes], bytes]]] = {
+    None: (0, bytes, bytes),
+    "zlib": (1, zlib.compress, zlib.decompress),
+    "bz2": (2, bz2.compress, bz2.decompress),
+    "lzma": (3, lzma.compress, lzma.decompress),
+}
+
+_HEADER = struct.Struct("<4sHBx")
+_COUNT = struct.Struct("<I")
+_SWAP = sys.byteorder == "big"
+
+# typecodes of the node and edge columns
+_NODE_COLUMNS = (
+    ("type_name", "I"), ("name", "I"), ("ports", "I"), ("values", "I"),
+    ("attrs", "I"), ("setting", "I"), ("x", "d"), ("y", "d"),
+)
+_EDGE_COLUMNS = (
+    ("source", "I"), ("source_port", "H"),
+    ("target", "I"), ("target_port", "H"),
+)
+
+
+class _Strings:
+    """String table, interning each distinct string once."""
+
+    def __init__(self) -> None:
+        self.index: T.Dict[str, int] = {}
+
+    def __call__(self, s: str) -> int:
+        i = self.index.get(s)
+        if i is None:
+            i = self.index[s] = len(self.index)
+        return i
+
+    def json(self, value: T.Any) -> int:
+        return self(json.dumps(value, sort_keys=True))
+
+
+def _write_array(out: T.List[bytes], a: array):
+    if _SWAP:
+        a = array(a.typecode, a)
+        a.byteswap()
+    out.append(a.tobytes())
+
+
+def _read_array(
+        buf: memoryview, pos: int, typecode: str,
+        count: int) -> T.Tuple[array, int]:
+    a = array(typecode)
+    end = pos + a.itemsize * count
+    a.frombytes(buf[pos:end])
+    if _SWAP:
+        a.byteswap()
+    return a, end
+
+
+@contextmanager
+def _gc_paused() -> T.Iterator[None]:
+    """Pause the cyclic garbage collector, which otherwise runs over and
+    over while many nodes are built."""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _port_key(port: T.Any, settings: SettingsTable) -> T.Tuple:
+    """Key of the serialized layout of a core port, from the values of
+    its attributes and the index of its setting in `settings`."""
+    # a port without setting has the default one
+    key = (type(port), port.name, settings.add(port._setting))
+    if isinstance(port, DataPortBase):
+        return key + (
+            port.data_type, _value_key(port.data_range),
+            _value_key(port.data_default), _value_key(port.widget_args))
+    if isinstance(port, StreamPortBase):
+        return key + (port.maxsize,)
+    return key
+
+
+def _value_key(value: T.Any) -> T.Tuple:
+    """Key of a value, equal for values saved as the same JSON."""
+    cls = type(value)
+    # floats by repr, as 0.0 == -0.0 and 1 == 1.0 == True
+    if cls is float:
+        return (float, repr(value))
+    if value is None or cls is int or cls is str or cls is bool:
+        return (cls, value)
+    return (cls, json.dumps(value, sort_keys=True))
+
+
+def dump_graph_binary(
+        nodes: T.Iterable["core.NodeBase"],
+        edges: T.Iterable["core.EdgeBase"],
+        compression: T.Optional[str] = None,
+        ) -> bytes:
+    """Serialize nodes and edges to the binary format.
+
+    Args:
+        nodes: Nodes to save.
+        edges: Edges to save, between the saved nodes.
+        compression: None, "zlib", "bz2" or "lzma".
+    """
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unknown compression: {compression}")
+    strings = _Strings()
+    settings = SettingsTable()
+    columns = {name: array(code) for name, code in _NODE_COLUMNS}
+    index: T.Dict[int, int] = {}
+    uids = array("q")
+    # string indexes of the core node fast path, by class, port layout
+    # key, value keys and setting index
+    type_names: T.Dict[type, int] = {}
+    layouts: T.Dict[T.Tuple, int] = {}
+    value_lists: T.Dict[T.Tuple, int] = {}
+    setting_refs: T.Dict[T.Optional[int], int] = {}
+    empty = strings.json({})
+    for i, node in enumerate(nodes):
+        index[id(node)] = i
+        uids.append(node.uid)
+        if isinstance(node, CoreNode):
+            cls = type(node)
+            type_i = type_names.get(cls)
+            if type_i is None:
+                type_i = type_names[cls] = strings(node.type_name())
+            in_ports, out_ports = node.input_ports, node.output_ports
+            key = (
+                tuple([_port_key(p, settings) for p in in_ports]),
+                tuple([_port_key(p, settings) for p in out_ports]))
+            ports_i = layouts.get(key)
+            if ports_i is None:
+                layout = [
+                    [serialize_port(p, settings)  # type: ignore
+                     for p in ports]
+                    for ports in (in_ports, out_ports)]
+                for port_data in layout[0]:
+                    port_data.pop("widget_value", None)
+                ports_i = layouts[key] = strings.json(layout)
+            values = [
+                p.value if isinstance(p, DataPortBase) else None
+                for p in in_ports]
+            values_key = tuple(map(_value_key, values))
+            values_i = value_lists.get(values_key)
+            if values_i is None:
+                values_i = value_lists[values_key] = strings.json(values)
+            ref = settings.add(node.item_setting)
+            setting_i = setting_refs.get(ref)
+            if setting_i is None:
+                setting_i = setting_refs[ref] = strings.json(ref)
+            name = node.name
+            attrs = node.attrs
+        else:
+            data = serialize_node(node, settings)  # type: ignore
+            values = []
+            for port in data['input_ports']:
+                values.append(port.pop("widget_value", None))
+            type_i = strings(data['type_name'])
+            ports_i = strings.json(
+                [data['input_ports'], data['output_ports']])
+            values_i = strings.json(values)
+            setting_i = strings.json(data['setting'])
+            name = data['name']
+            attrs = data['attrs']
+        pos = attrs.get('pos')
+        if isinstance(pos, (list, tuple)) and len(pos) == 2:
+            x, y = pos
+            if len(attrs) == 1:
+                attrs_i = empty
+            else:
+                attrs = dict(attrs)
+                del attrs['pos']
+                attrs_i = strings.json(attrs)
+        else:
+            x = y = math.nan
+            attrs_i = strings.json(attrs) if attrs else empty
+        columns['type_name'].append(type_i)
+        columns['name'].append(strings(name))
+        columns['ports'].append(ports_i)
+        columns['values'].append(values_i)
+        columns['attrs'].append(attrs_i)
+        columns['setting'].append(setting_i)
+        columns['x'].append(x)
+        columns['y'].append(y)
+    edge_columns = {name: array(code) for name, code in _EDGE_COLUMNS}
+    for edge in edges:
+        s_port, t_port = edge.source_port, edge.target_port
+        edge_columns['source'].append(index[id(s_port.node)])
+        edge_columns['source_port'].append(s_port.index)
+        edge_columns['target'].append(index[id(t_port.node)])
+        edge_columns['target_port'].append(t_port.index)
+
+    settings_i = strings.json(settings.entries)
+    out: T.List[bytes] = []
+    encoded = [s.encode("utf-8") for s in strings.index]
+    out.append(_COUNT.pack(len(encoded)))
+    _write_array(out, array("I", [len(s) for s in encoded]))
+    out.extend(encoded)
+    out.append(_COUNT.pack(len(columns['name'])))
+    for name, _ in _NODE_COLUMNS:
+        _write_array(out, columns[name])
+    out.append(_COUNT.pack(len(edge_columns['source'])))
+    for name, _ in _EDGE_COLUMNS:
+        _write_array(out, edge_columns[name])
+    out.append(_COUNT.pack(settings_i))
+    _write_array(out, uids)
+    code, compress, _ = COMPRESSIONS[compression]
+    header = _HEADER.pack(MAGIC, VERSION, code)
+    return header + compress(b"".join(out))
+
+
+class BinaryGraphData:
+    """Decoded tables of a binary graph.
+
+    Attributes:
+        strings: String table.
+        nodes: Node columns, by name.
+        edges: Edge columns, by name.
+        settings: Settings table.
+        uids: Node uids, None before version 3.
+    """
+
+    def __init__(self, blob: bytes) -> None:
+        if len(blob) < _HEADER.size:
+            raise ValueError("Not a binary graph: too short")
+        magic, version, code = _HEADER.unpack_from(blob)
+        if magic != MAGIC:
+            raise ValueError("Not a binary graph: bad magic bytes")
+        if version > VERSION:
+            raise ValueError(f"Unsupported binary graph version: {version}")
+        for _, (c, _, decompress) in COMPRESSIONS.items():
+            if c == code:
+                break
+        else:
+            raise ValueError(f"Unknown compression code: {code}")
+        buf = memoryview(decompress(blob[_HEADER.size:]))
+        pos = 0
+
+        def count() -> int:
+            nonlocal pos
+            n, = _COUNT.unpack_from(buf, pos)
+            pos += _COUNT.size
+            return n
+
+        n = count()
+        lengths, pos = _read_array(buf, pos, "I", n)
+        self.strings: T.List[str] = []
+        for length in lengths:
+            self.strings.append(str(buf[pos:pos + length], "utf-8"))
+            pos += length
+        n = count()
+        self.nodes: T.Dict[str, array] = {}
+        for name, typecode in _NODE_COLUMNS:
+            self.nodes[name], pos = _read_array(buf, pos, typecode, n)
+        n = count()
+        self.edges: T.Dict[str, array] = {}
+        for name, typecode in _EDGE_COLUMNS:
+            self.edges[name], pos = _read_array(buf, pos, typecode, n)
+        # version 1 has the settings inline
+        self.settings = SettingsTable(
+            json.loads(self.strings[count()]) if version >= 2 else None)
+        self.uids: T.Optional[array] = None
+        if version >= 3:
+            self.uids, pos = _read_array(buf, pos, "q", len(self))
+
+    def __len__(self) -> int:
+        return len(self.nodes['name'])
+
+    def load(
+            self,
+            get_factory: T.Callable[[T.Dict[str, T.Any]], T.Callable],
+            ) -> T.Tuple[T.List[T.Any], T.List[T.Any]]:
+        """Build the nodes and edges.
+
+        Args:
+            get_factory: Gets the factory of a node from its serialized
+                data, called once per type name and port layout.
+        """
+        strings = self.strings
+        columns = self.nodes
+        empty = strings.index("{}") if "{}" in strings else -1
+        null = strings.index("null") if "null" in strings else -1
+        # the columns decoded at once, then the nodes built by type name
+        # and port layout
+        names = [strings[i] for i in columns['name']]
+        attrs_list = [
+            {'pos': [x, y]} if attrs_i == empty and x == x
+            else _load_attrs(strings[attrs_i], x, y)
+            for attrs_i, x, y in zip(
+                columns['attrs'], columns['x'], columns['y'])]
+        groups: T.Dict[T.Tuple[int, int], T.List[int]] = {}
+        for i, key in enumerate(zip(columns['type_name'], columns['ports'])):
+            members = groups.get(key)
+            if members is None:
+                members = groups[key] = []
+            members.append(i)
+        values = columns['values']
+        nodes: T.List[T.Any] = [None] * len(names)
+        for (type_i, ports_i), members in groups.items():
+            layout = json.loads(strings[ports_i])
+            factory = get_factory({
+                "type_name": strings[type_i],
+                "name": "",
+                "input_ports": layout[0],
+                "output_ports": layout[1],
+            })
+            restore = _fast_builder(factory)
+            if restore is not None:
+                built = restore(
+                    [names[i] for i in members],
+                    [attrs_list[i] for i in members])
+                factory._instance_count += len(built)  # type: ignore
+                blueprints = factory.input_ports  # type: ignore
+                # values index -> [(input port index, value), ...]
+                value_pairs: T.Dict[int, T.List[T.Any]] = {}
+                for i, node in zip(members, built):
+                    nodes[i] = node
+                    pairs = value_pairs.get(values[i])
+                    if pairs is None:
+                        pairs = value_pairs[values[i]] = [
+                            (j, v) for j, v in enumerate(
+                                json.loads(strings[values[i]]))
+                            if v is not None and j < len(blueprints) and
+                            isinstance(blueprints[j], DataPortBase)]
+                    for j, v in pairs:
+                        node.input_ports[j].value = v
+                continue
+            # input ports with their values, shared by equal nodes
+            ports: T.Dict[int, T.List[T.Dict[str, T.Any]]] = {}
+            for i in members:
+                inputs = ports.get(values[i])
+                if inputs is None:
+                    inputs = ports[values[i]] = [
+                        dict(p, widget_value=v) for p, v in zip(
+                            layout[0], json.loads(strings[values[i]]))]
+                node = nodes[i] = _node_from_factory({
+                    "type_name": strings[type_i],
+                    "name": names[i],
+                    "input_ports": inputs,
+                    "output_ports": layout[1],
+                }, factory)
+                node.attrs = attrs_list[i]
+        setting_refs: T.Dict[int, T.Any] = {}
+        for node, setting_i in zip(nodes, columns['setting']):
+            if setting_i == null:
+                continue
+            if setting_i not in setting_refs:
+                setting_refs[setting_i] = json.loads(strings[setting_i])
+            ref = setting_refs[setting_i]
+            if ref is not None:
+                node.item_setting = self.settings.get(
+                    NodeItemSetting, ref)
+        if self.uids is not None:
+            for node, uid in zip(nodes, self.uids):
+                node.uid = uid
+        edges = []
+        e = self.edges
+        for s, sp, t, tp in zip(
+                e['source'], e['source_port'], e['target'], e['target_port']):
+            source, target = nodes[s], nodes[t]
+            edge = source.edge_class(
+                source.output_ports[sp], target.input_ports[tp])
+            # `EdgeBase.key`, known here
+            edge._key = ((id(source), sp), (id(target), tp))
+            edges.append(edge)
+        return nodes, edges
+
+
+def _load_attrs(text: str, x: float, y: float) -> T.Dict[str, T.Any]:
+    attrs = json.loads(text)
+    if x == x:  # not NaN
+        attrs['pos'] = [x, y]
+    return attrs
+
+
+def _fast_builder(
+        factory: T.Callable,
+        ) -> T.Optional[T.Callable[..., T.List[T.Any]]]:
+    """`Node._restore_many` of a core node class that keeps the default
+    construction, None for other factories."""
+    if isinstance(factory, type) and issubclass(factory, CoreNode) and \
+            factory.__init__ is CoreNode.__init__ and \
+            factory._init_ports is CoreNode._init_ports:
+        return factory._restore_many
+    return None
+
+
+def load_graph_binary(
+        blob: bytes,
+        factory_table: T.Optional[FactoryTable] = None,
+        ) -> "core.Graph":
+    """Load a binary graph into a headless `easynode.core.Graph`.
+
+    Types found in `factory_table` are built with their factory, others
+    become instances of `generic_node_class`.
+    """
+    from ..core.graph import Graph
+    table = factory_table or {}
+    graph_data = BinaryGraphData(blob)
+
+    def get_factory(data):
+        return table.get(data['type_name']) or \
+            generic_node_class(data, graph_data.settings)
+
+    graph = Graph()
+    with _gc_paused():
+        nodes, edges = graph_data.load(get_factory)
+        graph._add_loaded(nodes, edges)
+    return graph
+
+
+def deserialize_graph_binary(
+        blob: bytes,
+        editor: "NodeEditor",
+        add_to_editor: bool = True,
+        lazy: bool = False,
+        ) -> "Graph":
+    """Load a binary graph with the factories of the editor, like
+    `deserialize_graph`."""
+
+    def get_factory(data):
+        type_name = data['type_name']
+        if type_name not in editor.factory_table:
+            raise ValueError(f"Unknown node type: {type_name}")
+        return editor.factory_table[type_name]
+
+    with _gc_paused():
+        nodes, edges = BinaryGraphData(blob).load(get_factory)
+    if add_to_editor:
+        editor.add_scene_and_view()
+        graph = editor.current_scene.graph
+        if lazy:
+            graph.enable_lazy_items()
+    else:
+        from ..model.graph import Graph
+        graph = Graph()
+    with graph.batch():
+        graph.add_nodes(*nodes)
+        graph.add_edges(*edges)
+    return graph
+
+
+def is_binary_graph(head: bytes) -> bool:
+    """Whether data starts like a binary graph."""
+    return head[:len(MAGIC)] == MAGIC
@@ -0,0 +1,278 @@
+"""Force-directed graph layout with a Barnes–Hut approximation.
+
+Nodes repel each other and edges pull their ends together
+(Fruchterman–Reingold forces). Repulsion uses a quadtree: far away
+groups of nodes act as a single mass at their center, so an iteration
+costs O(N log N) instead of O(N^2).
+
+The quadtree is linear: nodes are sorted by Morton code, so the cells
+of each depth are runs of the sorted codes, and the tree is walked for
+all nodes at once, one depth at a time.
+"""
+import typing as T
+
+import numpy as np
+
+from .layout import GraphSnapshot, Progress
+
+if T.TYPE_CHECKING:
+    from ..core import NodeBase
+
+
+MAX_DEPTH = 16
+
+
+def _spread_bits(v: np.ndarray) -> np.ndarray:
+    """Insert a zero bit between the (16 lowest) bits of `v`."""
+    v = v.astype(np.uint64)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x00FF00FF)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x0F0F0F0F)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x33333333)
+    v = (v | (v << np.uint64(1))) & np.uint64(0x55555555)
+    return v
+
+
+class _QuadTree:
+    """Cells of each depth: mass, center of mass, mean radius, the
+    cell of each node, the range of child cells and the parent cell."""
+
+    def __init__(
+            self, pos: np.ndarray, radius: np.ndarray,
+            depth: int) -> None:
+        lo = pos.min(axis=0)
+        self.width = float((pos.max(axis=0) - lo).max()) * (1 + 1e-9) + 1e-9
+        grid = np.floor(
+            (pos - lo) / self.width * (1 << depth)).astype(np.int64)
+        code = _spread_bits(grid[:, 0]) | (_spread_bits(grid[:, 1]) << 1)
+        order = np.argsort(code, kind="stable")
+        code = code[order]
+        self.pos, self.node_radius, self.order = pos, radius, order
+        self.depth = depth
+        self.mass: T.List[np.ndarray] = []
+        self.center: T.List[np.ndarray] = []
+        self.radius: T.List[np.ndarray] = []
+        self.node_cell: T.List[np.ndarray] = []
+        keys = []
+        for d in range(depth + 1):
+            key = code >> np.uint64(2 * (depth - d))
+            start = np.flatnonzero(
+                np.concatenate(([True], key[1:] != key[:-1])))
+            cell_sorted = np.cumsum(
+                np.concatenate(([0], key[1:] != key[:-1])))
+            cell = np.empty(len(pos), dtype=np.int64)
+            cell[order] = cell_sorted
+            mass = np.bincount(cell).astype(np.float64)
+            center = np.stack([
+                np.bincount(cell, weights=pos[:, 0]),
+                np.bincount(cell, weights=pos[:, 1]),
+            ], axis=1) / mass[:, None]
+            self.mass.append(mass)
+            self.center.append(center)
+            self.radius.append(np.bincount(cell, weights=radius) / mass)
+            self.node_cell.append(cell)
+            keys.append(key[start])
+        # children of the cells of depth d, in the cells of depth d + 1
+        self.child_start: T.List[np.ndarray] = []
+        self.child_end: T.List[np.ndarray] = []
+        for d in range(depth):
+            parent = keys[d + 1] >> np.uint64(2)
+            self.child_start.append(
+                np.searchsorted(parent, keys[d], "left"))
+            self.child_end.append(np.searchsorted(parent, keys[d], "right"))
+        self.parent = [np.zeros(1, dtype=np.int64)] + [
+            np.repeat(np.arange(len(start)), end - start)
+            for start, end in zip(self.child_start, self.child_end)]
+
+    def repulsion(self, k: float, theta: float) -> np.ndarray:
+        """Repulsive displacement of each node.
+
+        The tree is walked with pairs of cells: a pair of far apart
+        cells interacts through their centers of mass, the force being
+        applied to every node of the cell, and the other pairs are
+        split into pairs of their children.
+        """
+        field = [np.zeros((len(mass), 2)) for mass in self.mass]
+        a = b = np.zeros(1, dtype=np.int64)
+        for d in range(self.depth + 1):
+            last = d == self.depth
+            mass_a, mass_b = self.mass[d][a], self.mass[d][b]
+            delta = self.center[d][a] - self.center[d][b]
+            dist = np.hypot(delta[:, 0], delta[:, 1])
+            if last:
+                # nodes sharing a cell of the deepest level are paired
+                # one by one below
+                accept = a != b
+            else:
+                # two single nodes are exact, far cells approximated
+                width = self.width / (1 << d)
+                accept = (a != b) & (
+                    ((mass_a == 1) & (mass_b == 1)) | (width < theta * dist))
+            # distance between the node borders, not their centers
+            gap = np.maximum(
+                dist[accept] - self.radius[d][a[accept]] -
+                self.radius[d][b[accept]], 0.01 * k)
+            scale = k * k * mass_b[accept] / (
+                gap * np.maximum(dist[accept], 1e-9))
+            for axis in (0, 1):
+                field[d][:, axis] += np.bincount(
+                    a[accept], weights=delta[accept, axis] * scale,
+                    minlength=len(field[d]))
+            if last:
+                break
+            # pair the children of the other pairs
+            a, b = a[~accept], b[~accept]
+            start_a, start_b = self.child_start[d][a], self.child_start[d][b]
+            n_a = self.child_end[d][a] - start_a
+            n_b = self.child_end[d][b] - start_b
+            count = n_a * n_b
+            pair = np.repeat(np.arange(len(a)), count)
+            j = np.arange(len(pair)) - \
+                np.repeat(np.cumsum(count) - count, count)
+            a = start_a[pair] + j // n_b[pair]
+            b = start_b[pair] + j % n_b[pair]
+            if len(a) == 0:
+                break
+        # forces on a cell apply to its children
+        for d in range(self.depth):
+            field[d + 1] += field[d][self.parent[d + 1]]
+        return field[self.depth][self.node_cell[self.depth]] + \
+            self._near(k)
+
+    def _near(self, k: float) -> np.ndarray:
+        """Exact repulsion between the nodes of each deepest cell."""
+        pos, radius = self.pos, self.node_radius
+        near = np.zeros_like(pos)
+        mass = self.mass[self.depth].astype(np.int64)
+        # the nodes of a deepest cell are a run of the sorted nodes
+        start = np.cumsum(mass) - mass
+        multi = np.flatnonzero(mass > 1)
+        if len(multi) == 0:
+            return near
+        m, start = mass[multi], start[multi]
+        count = m * m
+        cell = np.repeat(np.arange(len(multi)), count)
+        j = np.arange(len(cell)) - np.repeat(np.cumsum(count) - count, count)
+        a = self.order[start[cell] + j // m[cell]]
+        b = self.order[start[cell] + j % m[cell]]
+        a, b = a[a != b], b[a != b]
+        delta = pos[a] - pos[b]
+        dist = np.hypot(delta[:, 0], delta[:, 1])
+        gap = np.maximum(dist - radius[a] - radius[b], 0.01 * k)
+        scale = k * k / (gap * np.maximum(dist, 1e-9))
+        for axis in (0, 1):
+            near[:, axis] = np.bincount(
+                a, weights=delta[:, axis] * scale, minlength=len(pos))
+        return near
+
+
+def force_layout(
+        nodes: T.Sequence["NodeBase"],
+        sizes: T.Mapping[int, T.Tuple[float, float]],
+        positions: T.Optional[T.Mapping[int, T.Tuple[float, float]]] = None,
+        pinned: T.Iterable[int] = (),
+        iterations: int = 100,
+        padding: float = 20.0,
+        theta: float = 0.8,
+        gravity: float = 0.05,
+        start_pos: T.Tuple[float, float] = (10.0, 10.0),
+        seed: int = 0,
+        ) -> T.Dict[int, T.Tuple[float, float]]:
+    """Force-directed layout.
+
+    Args:
+        nodes: Nodes to place, only the edges between them are used.
+        sizes: (width, height) of each node, keyed by node id.
+        positions: Current top-left positions, keyed by node id. Nodes
+            without one, or all at the same place, start at random
+            positions.
+        pinned: Ids of the nodes that keep their position.
+        iterations: Iteration budget.
+        padding: Space kept between the borders of connected nodes.
+        theta: Barnes–Hut opening ratio, larger is faster and coarser.
+        gravity: Pull towards the center, keeps components together.
+        start_pos: Top-left corner of the layout, if no node is pinned.
+        seed: Seed of the random initial positions.
+
+    Returns:
+        Top-left position of each node, keyed by node id.
+    """
+    return force_positions(
+        GraphSnapshot.from_nodes(list(nodes), sizes, positions),
+        pinned=pinned, iterations=iterations, padding=padding,
+        theta=theta, gravity=gravity, start_pos=start_pos, seed=seed)
+
+
+def force_positions(
+        snap: GraphSnapshot,
+        pinned: T.Iterable[int] = (),
+        iterations: int = 100,
+        padding: float = 20.0,
+        theta: float = 0.8,
+        gravity: float = 0.05,
+        start_pos: T.Tuple[float, float] = (10.0, 10.0),
+        seed: int = 0,
+        progress: T.Optional[Progress] = None,
+        ) -> T.Dict[int, T.Tuple[float, float]]:
+    """`force_layout` on a snapshot, reporting its progress after each
+    iteration."""
+    n = len(snap)
+    if n == 0:
+        return {}
+    wh = np.array(snap.sizes, dtype=np.float64).reshape(n, 2)
+    radius = np.hypot(wh[:, 0], wh[:, 1]) / 2
+    # ideal distance between the borders of neighbors
+    k = float(radius.mean()) + padding
+    rng = np.random.default_rng(seed)
+    pos = rng.uniform(0, k * np.sqrt(n) * 2, (n, 2))
+    pinned = set(pinned)
+    fixed = np.array([node_id in pinned for node_id in snap.ids])
+    for i, p in enumerate(snap.positions):
+        if p is not None:
+            pos[i] = np.asarray(p) + wh[i] / 2
+    free = ~fixed
+    if free.sum() > 1 and np.ptp(pos[free], axis=0).max() < k:
+        # all at one place, e.g. just created: start from scratch
+        pos[free] = rng.uniform(0, k * np.sqrt(n) * 2, (int(free.sum()), 2))
+    # coincident nodes would not push each other apart
+    pos += rng.uniform(-1e-3, 1e-3, pos.shape) * k * free[:, None]
+    src_l, dst_l = [], []
+    for s, targets in enumerate(snap.out):
+        for t, _ in targets:
+            if s != t:
+                src_l.append(s)
+                dst_l.append(t)
+    src = np.array(src_l, dtype=np.int64)
+    dst = np.array(dst_l, dtype=np.int64)
+    depth = min(MAX_DEPTH, max(1, int(np.ceil(np.log2(n) / 2)) + 1))
+    temperature = k * np.sqrt(n) / 2
+    for it in range(iterations):
+        if not free.any():
+            break
+        tree = _QuadTree(pos, radius, depth)
+        disp = tree.repulsion(k, theta)
+        if len(src):
+            delta = pos[dst] - pos[src]
+            dist = np.maximum(np.hypot(delta[:, 0], delta[:, 1]), 1e-9)
+            gap = np.maximum(dist - radius[src] - radius[dst], 0.0)
+            pull = delta * (gap * gap / (k * dist))[:, None]
+            for axis in (0, 1):
+                disp[:, axis] += np.bincount(
+                    src, weights=pull[:, axis], minlength=n)
+                disp[:, axis] -= np.bincount(
+                    dst, weights=pull[:, axis], minlength=n)
+        disp -= gravity * (pos - pos.mean(axis=0))
+        # move at most by the temperature, which cools down linearly
+        step = temperature * (1 - it / iterations)
+        length = np.maximum(np.hypot(disp[:, 0], disp[:, 1]), 1e-9)
+        disp *= (np.minimum(length, step) / length)[:, None]
+        disp[fixed] = 0
+        pos += disp
+        if progress is not None:
+            progress((it + 1) / iterations)
+    top_left = pos - wh / 2
+    if not fixed.any():
+        top_left += np.asarray(start_pos) - top_left.min(axis=0)
+    return {
+        node_id: (float(top_left[i, 0]), float(top_left[i, 1]))
+        for i, node_id in enumerate(snap.ids)
+    }
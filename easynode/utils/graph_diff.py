@@ -0,0 +1,602 @@
+"""Diffs and patches between graphs, keyed by the `uid`s of the nodes
+and edges.
+
+A patch is a JSON-compatible dict:
+
+    {
+        "type": "patch",
+        "settings": [...],  # settings table of the added nodes
+        "removed_edges": [[source uid, port, target uid, port], ...],
+        "removed_nodes": [uid, ...],
+        "added_nodes": [serialized node, ...],
+        "changed_nodes": [
+            {"id": uid, "name": ..., "attrs": ...,
+             "values": [[input port index, value], ...]},
+            ...
+        ],
+        "added_edges": [[source uid, port, target uid, port], ...],
+    }
+
+Changed nodes only hold the fields that changed. Edges of removed nodes
+are not listed, they go with their nodes. Applying a patch to a graph
+costs O(changes); computing one compares every node, which is much
+cheaper than serializing the graph.
+
+This module does not import qtpy, like `serialization`.
+"""
+import typing as T
+import json
+import os
+from copy import deepcopy
+
+from ..core.edge import EdgeUid
+from ..core.node import new_uid
+from ..core.port import DataPortBase
+from .serialization import (
+    FactoryTable, SettingsTable, load_node, serialize_node,
+    serialize_nodes_and_edges,
+)
+
+if T.TYPE_CHECKING:
+    from ..core import NodeBase
+
+
+PATCHES_SUFFIX = ".patches"
+
+# (type name, name, [attrs, input port values] as JSON)
+NodeState = T.Tuple[str, str, str]
+
+_encode = json.JSONEncoder(sort_keys=True).encode
+
+
+def _state(
+        type_name: str, name: str, attrs: T.Any,
+        values: T.List[T.Any]) -> NodeState:
+    return type_name, name, _encode([attrs, values])
+
+
+def _port_values(node: T.Any) -> T.List[T.Any]:
+    # as `serialize_port` writes them, None for other ports
+    return [
+        port.value if isinstance(port, DataPortBase) else None
+        for port in node.input_ports]
+
+
+def node_change(node: T.Any) -> T.Dict[str, T.Any]:
+    """Entry of "changed_nodes" setting all the fields of a node."""
+    return {
+        "id": node.uid,
+        "name": node.name,
+        "attrs": node.attrs,
+        "values": [
+            [i, port.value] for i, port in enumerate(node.input_ports)
+            if isinstance(port, DataPortBase)],
+    }
+
+
+class GraphState:
+    """What a diff compares of a graph, taken from the nodes of a graph
+    or from its serialized data.
+
+    Attributes:
+        nodes: State of each node, by uid.
+        edges: Uids of the edges.
+    """
+
+    def __init__(
+            self,
+            nodes: T.Dict[int, NodeState],
+            edges: T.Set[EdgeUid],
+            sources: T.Mapping[int, T.Any],
+            settings: T.Optional[T.List[T.Dict[str, T.Any]]] = None,
+            ) -> None:
+        self.nodes = nodes
+        self.edges = edges
+        # uid -> node or serialized node, to write the added nodes
+        self._sources = sources
+        # settings table of the serialized nodes
+        self._settings = settings or []
+
+    @classmethod
+    def of_graph(cls, graph: T.Any) -> "GraphState":
+        nodes: T.Dict[int, NodeState] = {}
+        sources: T.Dict[int, "NodeBase"] = {}
+        for node in graph.nodes:
+            uid = node.uid
+            nodes[uid] = _state(
+                node.type_name(), node.name, node.attrs, _port_values(node))
+            sources[uid] = node
+        edges = {edge.uid for edge in graph.edges}
+        return cls(nodes, edges, sources)
+
+    @classmethod
+    def of_data(cls, data: T.Dict[str, T.Any]) -> "GraphState":
+        """State of a graph serialized by `serialize_nodes_and_edges`."""
+        nodes: T.Dict[int, NodeState] = {}
+        sources: T.Dict[int, T.Dict[str, T.Any]] = {}
+        for node_data in data['nodes']:
+            values = [
+                port.get('widget_value')
+                for port in node_data['input_ports']]
+            uid = node_data['id']
+            nodes[uid] = _state(
+                node_data['type_name'], node_data['name'],
+                node_data['attrs'], values)
+            sources[uid] = node_data
+        edges = {
+            (e['source']['node_id'], e['source']['port_idx'],
+             e['target']['node_id'], e['target']['port_idx'])
+            for e in data['edges']}
+        return cls(nodes, edges, sources, data.get('settings'))
+
+    def node_data(
+            self, uid: int, settings: SettingsTable) -> T.Dict[str, T.Any]:
+        """Serialized node, with its settings added to `settings`."""
+        source = self._sources[uid]
+        if not isinstance(source, dict):
+            return serialize_node(source, settings)  # type: ignore
+
+        def ref(setting: T.Any) -> T.Optional[int]:
+            if setting is None:
+                return None
+            if not isinstance(setting, dict):
+                setting = self._settings[setting]
+            return settings.add_entry(setting)
+
+        data = dict(source, setting=ref(source.get('setting')))
+        for key in ("input_ports", "output_ports"):
+            data[key] = [
+                dict(port, setting=ref(port.get('setting')))
+                for port in source[key]]
+        return data
+
+
+def diff(old: GraphState, new: GraphState) -> T.Dict[str, T.Any]:
+    """Patch that turns the `old` graph into the `new` one."""
+    settings = SettingsTable()
+    removed_nodes: T.List[int] = []
+    # uids of nodes whose type changed, removed and added again
+    replaced: T.Set[int] = set()
+    for uid, state in old.nodes.items():
+        new_state = new.nodes.get(uid)
+        if new_state is None:
+            removed_nodes.append(uid)
+        elif new_state[0] != state[0]:
+            removed_nodes.append(uid)
+            replaced.add(uid)
+    added_nodes = []
+    changed_nodes = []
+    for uid, state in new.nodes.items():
+        old_state = old.nodes.get(uid)
+        if old_state is None or uid in replaced:
+            added_nodes.append(new.node_data(uid, settings))
+        elif old_state != state:
+            change: T.Dict[str, T.Any] = {"id": uid}
+            if old_state[1] != state[1]:
+                change['name'] = state[1]
+            if old_state[2] != state[2]:
+                old_attrs, old_values = json.loads(old_state[2])
+                attrs, values = json.loads(state[2])
+                if old_attrs != attrs:
+                    change['attrs'] = attrs
+                if old_values != values:
+                    change['values'] = [
+                        [i, value] for i, (old_value, value)
+                        in enumerate(zip(old_values, values))
+                        if old_value != value]
+            changed_nodes.append(change)
+    gone = set(removed_nodes)
+    removed_edges = [
+        e for e in old.edges - new.edges
+        if e[0] not in gone and e[2] not in gone]
+    added_edges = [
+        e for e in new.edges
+        if e not in old.edges or e[0] in replaced or e[2] in replaced]
+    return {
+        "type": "patch",
+        "settings": settings.entries,
+        "removed_edges": [list(e) for e in sorted(removed_edges)],
+        "removed_nodes": removed_nodes,
+        "added_nodes": added_nodes,
+        "changed_nodes": changed_nodes,
+        "added_edges": [list(e) for e in sorted(added_edges)],
+    }
+
+
+def diff_graphs(old: T.Any, new: T.Any) -> T.Dict[str, T.Any]:
+    """Patch that turns the graph `old` into the graph `new`."""
+    return diff(GraphState.of_graph(old), GraphState.of_graph(new))
+
+
+def is_empty_patch(patch: T.Dict[str, T.Any]) -> bool:
+    return not any(
+        patch[key] for key in (
+            "removed_edges", "removed_nodes", "added_nodes",
+            "changed_nodes", "added_edges"))
+
+
+class ChangeSet:
+    """Changes of a graph since the last `clear`, found from its signals
+    instead of by comparing every node.
+
+    Once `connect`ed, follows the added and removed nodes and edges, the
+    nodes passed to `Graph.mark_changed`, and the port values edited in
+    the editor. Changes cancel out, e.g. a node added then removed
+    leaves nothing.
+
+    Args:
+        on_change: Called after each recorded change.
+    """
+
+    def __init__(
+            self,
+            on_change: T.Optional[T.Callable[[], None]] = None,
+            ) -> None:
+        self.on_change = on_change
+        self.graph: T.Any = None
+        # uid -> node
+        self.added_nodes: T.Dict[int, T.Any] = {}
+        self.removed_nodes: T.Set[int] = set()
+        self.changed_nodes: T.Dict[int, T.Any] = {}
+        self.added_edges: T.Set[EdgeUid] = set()
+        self.removed_edges: T.Set[EdgeUid] = set()
+
+    def __bool__(self) -> bool:
+        return bool(
+            self.added_nodes or self.removed_nodes or self.changed_nodes
+            or self.added_edges or self.removed_edges)
+
+    def _signals(self, graph: T.Any) -> T.List[T.Tuple[T.Any, T.Callable]]:
+        signals = [
+            (graph.node_added, self.node_added),
+            (graph.node_removed, self.node_removed),
+            (graph.edge_added, self.edge_added),
+            (graph.edge_removed, self.edge_removed),
+            (graph.batch_changed, self.batch_changed),
+            (graph.nodes_changed, self.nodes_changed),
+        ]
+        if hasattr(graph, "port_value_changed"):
+            signals.append((graph.port_value_changed, self.port_changed))
+        return signals
+
+    def connect(self, graph: T.Any):
+        """Follow the changes of a graph."""
+        self.graph = graph
+        for signal, slot in self._signals(graph):
+            signal.connect(slot)
+
+    def disconnect(self):
+        if self.graph is None:
+            return
+        for signal, slot in self._signals(self.graph):
+            signal.disconnect(slot)
+        self.graph = None
+
+    def _changed(self):
+        if self.on_change is not None:
+            self.on_change()
+
+    def node_added(self, node: T.Any):
+        uid = node.uid
+        if uid in self.removed_nodes:
+            # e.g. undo of a deletion, its state may have changed since
+            self.removed_nodes.discard(uid)
+            self.changed_nodes[uid] = node
+        else:
+            self.added_nodes[uid] = node
+        self._changed()
+
+    def node_removed(self, node: T.Any):
+        uid = node.uid
+        self.changed_nodes.pop(uid, None)
+        if self.added_nodes.pop(uid, None) is None:
+            self.removed_nodes.add(uid)
+        self._changed()
+
+    def edge_added(self, edge: T.Any):
+        uid = edge.uid
+        if uid in self.removed_edges:
+            self.removed_edges.discard(uid)
+        else:
+            self.added_edges.add(uid)
+        self._changed()
+
+    def edge_removed(self, edge: T.Any):
+        uid = edge.uid
+        if uid in self.added_edges:
+            self.added_edges.discard(uid)
+        else:
+            self.removed_edges.add(uid)
+        self._changed()
+
+    def batch_changed(self, changes: T.Any):
+        for edge in changes.removed_edges:
+            self.edge_removed(edge)
+        for node in changes.removed_nodes:
+            self.node_removed(node)
+        for node in changes.added_nodes:
+            self.node_added(node)
+        for edge in changes.added_edges:
+            self.edge_added(edge)
+
+    def nodes_changed(self, nodes: T.List[T.Any]):
+        graph_nodes = self.graph.nodes if self.graph is not None else ()
+        for node in nodes:
+            if node in graph_nodes and node.uid not in self.added_nodes:
+                self.changed_nodes[node.uid] = node
+        self._changed()
+
+    def port_changed(self, port: T.Any):
+        if port.node is not None:
+            self.nodes_changed([port.node])
+
+    def clear(self):
+        self.added_nodes.clear()
+        self.removed_nodes.clear()
+        self.changed_nodes.clear()
+        self.added_edges.clear()
+        self.removed_edges.clear()
+
+    def to_patch(self) -> T.Dict[str, T.Any]:
+        """Patch of the changes, with the current state of the added and
+        changed nodes."""
+        settings = SettingsTable()
+        added_nodes = [
+            serialize_node(node, settings)
+            for node in self.added_nodes.values()]
+        return {
+            "type": "patch",
+            "settings": settings.entries,
+            "removed_edges": [list(e) for e in sorted(self.removed_edges)],
+            "removed_nodes": sorted(self.removed_nodes),
+            "added_nodes": added_nodes,
+            "changed_nodes": [
+                node_change(node) for node in self.changed_nodes.values()],
+            "added_edges": [list(e) for e in sorted(self.added_edges)],
+        }
+
+
+def _move_node(graph: T.Any, node: T.Any, pos: T.Any):
+    item = getattr(node, "item", None)
+    if item is not None:
+        item.setPos(*pos)
+        return
+    lazy_items = getattr(graph, "lazy_items", None)
+    if lazy_items is not None and node in lazy_items:
+        lazy_items.move(node, *pos)
+
+
+def apply_patch(
+        graph: T.Any,
+        patch: T.Dict[str, T.Any],
+        factory_table: T.Optional[FactoryTable] = None,
+        load: T.Optional[T.Callable[[T.Dict[str, T.Any]], T.Any]] = None,
+        ) -> None:
+    """Apply a patch to a graph, in one batch.
+
+    Elements of the patch that are missing from the graph are skipped,
+    and so are added nodes and edges whose uid is already in the graph,
+    so a patch applied twice leaves the graph as applied once.
+
+    Args:
+        graph: Core or Qt graph.
+        patch: Patch made by `diff`.
+        factory_table: Node factories, see `load_node`.
+        load: Builds the added nodes from their serialized data,
+            instead of `load_node` with `factory_table`.
+    """
+    settings = SettingsTable(patch.get('settings'))
+    build = load or (
+        lambda data: load_node(data, factory_table, settings))
+
+    with graph.batch():
+        for e in patch['removed_edges']:
+            edge = graph.edge_by_uid(tuple(e))
+            if edge is not None:
+                graph.remove_edge(edge)
+        for uid in patch['removed_nodes']:
+            node = graph.node_by_uid(uid)
+            if node is not None:
+                graph.remove_node(node)
+        for data in patch['added_nodes']:
+            if graph.node_by_uid(data['id']) is None:
+                graph.add_node(build(data))
+        for change in patch['changed_nodes']:
+            node = graph.node_by_uid(change['id'])
+            if node is None:
+                continue
+            if 'name' in change:
+                node.name = change['name']
+            if 'attrs' in change:
+                attrs = deepcopy(change['attrs'])
+                if 'pos' in attrs and attrs['pos'] != node.attrs.get('pos'):
+                    _move_node(graph, node, attrs['pos'])
+                node.attrs = attrs
+            for i, value in change.get('values', ()):
+                node.input_ports[i].value = value
+        for e in patch['added_edges']:
+            s_uid, s_idx, t_uid, t_idx = e
+            source = graph.node_by_uid(s_uid)
+            target = graph.node_by_uid(t_uid)
+            if source is None or target is None or \
+                    graph.edge_by_uid(tuple(e)) is not None:
+                continue
+            graph.add_edge(source.create_edge(target, s_idx, t_idx))
+
+
+def _write_file(path: str, text: str):
+    """Replace the file `path` at once, through a temporary file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+def save_snapshot(graph: T.Any, path: str) -> int:
+    """Write the whole graph to the file `path`, replacing it at once,
+    and start a new patches file.
+
+    The snapshot and the first line of its patches file hold the same
+    random "generation", so that the patches of the previous snapshot,
+    left by a crash between the two writes, are not applied to this
+    one (see `read_patches`).
+
+    Returns:
+        Size of the file.
+    """
+    generation = new_uid()
+    # first, so that it is read without parsing the nodes
+    data: T.Dict[str, T.Any] = {"generation": generation}
+    data.update(serialize_nodes_and_edges(graph.nodes, graph.edges))
+    _write_file(path, json.dumps(data))
+    _write_file(
+        path + PATCHES_SUFFIX,
+        json.dumps({"type": "snapshot", "generation": generation}) + "\n")
+    return os.path.getsize(path)
+
+
+def snapshot_generation(path: str) -> T.Optional[int]:
+    """Generation of the graph file `path` written by `save_snapshot`,
+    None for other files."""
+    from .json_stream import JsonGraphReader
+    with open(path, "rb") as f:
+        for key, value in JsonGraphReader(f):
+            return value if key == "generation" else None
+    return None
+
+
+def append_patch(path: str, patch: T.Dict[str, T.Any]) -> int:
+    """Save a patch after the graph file `path`.
+
+    Returns:
+        Number of bytes written.
+    """
+    line = (json.dumps(patch) + "\n").encode("utf-8")
+    with open(path + PATCHES_SUFFIX, "ab") as f:
+        f.write(line)
+    return len(line)
+
+
+def patches_are_current(path: str) -> bool:
+    """Whether the patches file of the graph file `path` was started by
+    the snapshot in `path`, so new patches can be appended to it."""
+    generation = None
+    try:
+        with open(path + PATCHES_SUFFIX, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline() or "{}")
+    except FileNotFoundError:
+        header = {}
+    except ValueError:
+        return False
+    if header.get('type') == "snapshot":
+        generation = header['generation']
+    return generation == snapshot_generation(path)
+
+
+def read_patches(path: str) -> T.List[T.Dict[str, T.Any]]:
+    """Patches saved after the graph file `path`, by `append_patch`.
+
+    A last line cut short, by a crash while it was written, is ignored.
+    So are all the patches when they were saved after another snapshot
+    than the one in `path`, see `save_snapshot`.
+    """
+    patches: T.List[T.Dict[str, T.Any]] = []
+    try:
+        f = open(path + PATCHES_SUFFIX, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return patches
+    generation = None
+    with f:
+        for i, line in enumerate(f):
+            if not line.endswith("\n"):
+                break
+            patch = json.loads(line)
+            if i == 0 and patch.get('type') == "snapshot":
+                generation = patch['generation']
+            else:
+                patches.append(patch)
+    if generation != snapshot_generation(path):
+        return []
+    return patches
+
+
+def load_patched_graph(
+        path: str,
+        factory_table: T.Optional[FactoryTable] = None,
+        ) -> T.Any:
+    """Load a graph file into a headless `easynode.core.Graph`, with the
+    patches saved after it."""
+    from .serialization import load_graph_file
+    graph = load_graph_file(path, factory_table)
+    for patch in read_patches(path):
+        apply_patch(graph, patch, factory_table)
+    return graph
+
+
+class IncrementalSaver:
+    """Save a graph to a JSON file, then only the changes.
+
+    The first save writes the whole graph. The next ones append the
+    patch since the previous save to "<path>.patches", one JSON line
+    per save, until the patches grow larger than `max_ratio` times the
+    graph file: the whole graph is written again then, and a new patches
+    file started. Load with `load_patched_graph`, or load the file and
+    apply `read_patches`.
+
+    Args:
+        graph: Core or Qt graph to save.
+        path: Path of the graph file.
+        max_ratio: Size of the patches, relative to the graph file,
+            above which the next save writes the whole graph.
+    """
+
+    def __init__(
+            self,
+            graph: T.Any,
+            path: str,
+            max_ratio: float = 0.5,
+            ) -> None:
+        self.graph = graph
+        self.path = path
+        self.max_ratio = max_ratio
+        self._state: T.Optional[GraphState] = None
+        self._file_size = 0
+        self._patches_size = 0
+
+    @property
+    def patches_path(self) -> str:
+        return self.path + PATCHES_SUFFIX
+
+    def mark_saved(self):
+        """Take the current graph as saved, e.g. after loading it from
+        the file and its patches."""
+        self._state = GraphState.of_graph(self.graph)
+        self._file_size = os.path.getsize(self.path)
+        try:
+            self._patches_size = os.path.getsize(self.patches_path)
+        except FileNotFoundError:
+            self._patches_size = 0
+
+    def save(self) -> T.Optional[T.Dict[str, T.Any]]:
+        """Save the changes since the previous save.
+
+        Returns:
+            The appended patch, or None when the whole graph was
+            written.
+        """
+        if self._state is None or \
+                self._patches_size > self.max_ratio * self._file_size:
+            self.save_all()
+            return None
+        state = GraphState.of_graph(self.graph)
+        patch = diff(self._state, state)
+        self._state = state
+        if not is_empty_patch(patch):
+            self._patches_size += append_patch(self.path, patch)
+        return patch
+
+    def save_all(self):
+        """Write the whole graph and start a new patches file."""
+        self._file_size = save_snapshot(self.graph, self.path)
+        self._state = GraphState.of_graph(self.graph)
+        self._patches_size = 0
@@ -0,0 +1,112 @@
+"""Load large graph files without freezing the editor.
+
+Unlike the other serialization modules, this module requires qtpy.
+"""
+import typing as T
+
+from qtpy import QtCore
+
+from .json_stream import JsonGraphReader
+from .serialization import SettingsTable, deserialize_node, iter_graph_chunks
+
+if T.TYPE_CHECKING:
+    from ..node_editor import NodeEditor
+    from ..model.graph import Graph
+
+
+class GraphLoader(QtCore.QObject):
+    """Load a JSON graph file into a new scene, one chunk at a time.
+
+    The file is parsed incrementally, and each chunk of nodes and edges
+    is added to the graph from a zero-delay timer, so the event loop
+    runs between chunks and the editor stays responsive.
+
+    Args:
+        editor: Editor to load the graph into.
+        file_path: Path of the JSON graph file.
+        chunk_size: Number of nodes or edges added per chunk.
+        lazy: Create the node items when they come into view, see
+            `Graph.enable_lazy_items`.
+        parent: Parent QObject.
+    """
+    # fraction of the file read
+    progress = QtCore.Signal(float)
+    # the loaded graph
+    finished = QtCore.Signal(object)
+    # the exception raised while loading
+    failed = QtCore.Signal(object)
+
+    def __init__(
+            self,
+            editor: "NodeEditor",
+            file_path: str,
+            chunk_size: int = 1000,
+            lazy: bool = False,
+            parent: T.Optional[QtCore.QObject] = None,
+            ) -> None:
+        super().__init__(parent)
+        self.editor = editor
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.lazy = lazy
+        self.graph: T.Optional["Graph"] = None
+        self._file: T.Optional[T.BinaryIO] = None
+        self._reader: T.Optional[JsonGraphReader] = None
+        self._chunks: T.Optional[T.Iterator] = None
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._load_chunk)
+
+    @property
+    def is_loading(self) -> bool:
+        return self._chunks is not None
+
+    def start(self) -> "Graph":
+        """Open the file and a new scene, and start loading. Returns
+        the graph being filled."""
+        self._file = open(self.file_path, "rb")
+        self._reader = JsonGraphReader(self._file)
+        settings = SettingsTable()
+        self._chunks = iter_graph_chunks(
+            self._reader,
+            lambda data: deserialize_node(data, self.editor, settings),
+            self.chunk_size, settings)
+        self.editor.add_scene_and_view()
+        self.graph = self.editor.current_scene.graph
+        if self.lazy:
+            self.graph.enable_lazy_items()
+        self._timer.start()
+        return self.graph
+
+    def cancel(self):
+        """Stop loading, the nodes loaded so far stay."""
+        self._close()
+
+    def _close(self):
+        self._timer.stop()
+        self._chunks = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _load_chunk(self):
+        if self._chunks is None:
+            return
+        assert self.graph is not None and self._reader is not None
+        try:
+            nodes, edges = next(self._chunks)
+        except StopIteration:
+            self._close()
+            self.progress.emit(1.0)
+            self.finished.emit(self.graph)
+            return
+        except Exception as e:
+            self._close()
+            self.failed.emit(e)
+            return
+        with self.graph.batch():
+            self.graph.add_nodes(*nodes)
+            self.graph.add_edges(*edges)
+        self.progress.emit(self._reader.progress)
+        self._timer.start()
@@ -0,0 +1,245 @@
+"""Incremental layout: place new nodes without moving the others."""
+import typing as T
+
+from .layout import compute_levels
+from .spatial import Rect, SpatialIndex
+
+if T.TYPE_CHECKING:
+    from ..core import NodeBase
+
+
+class IncrementalLayout:
+    """Layout state kept between calls, to place the nodes added since
+    the last call next to their neighbors.
+
+    Nodes already placed keep their position. A new node goes one level
+    after its placed predecessors (or before its successors), centered
+    on its placed neighbors, and is moved along its level to the
+    closest spot where it overlaps no other node. A spatial index keeps
+    the overlap checks local, so the cost of an update depends on the
+    number of new nodes, not on the size of the graph.
+
+    Args:
+        direction: Direction of layout. Options: "LR", "TB".
+        padding_level: Space between a node and its neighbors on the
+            next level.
+        padding_node: Space kept around every node.
+        start_pos: Position of the first node, when nothing is placed.
+    """
+
+    max_tries = 64
+
+    def __init__(
+            self,
+            direction: str = "LR",
+            padding_level: float = 100.0,
+            padding_node: float = 20.0,
+            start_pos: T.Tuple[float, float] = (10.0, 10.0),
+            ) -> None:
+        self.direction = direction
+        self.padding_level = padding_level
+        self.padding_node = padding_node
+        self.start_pos = start_pos
+        self.positions: T.Dict[int, T.Tuple[float, float]] = {}
+        self.sizes: T.Dict[int, T.Tuple[float, float]] = {}
+        self.index = SpatialIndex()
+        # bounds of the placed nodes, recomputed lazily when a node on
+        # the border is removed or moved
+        self._extent: T.Optional[Rect] = None
+        self._extent_stale = False
+        self._invalid: T.Set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self.positions)
+
+    def __contains__(self, node_id: int) -> bool:
+        return node_id in self.positions
+
+    def reset(
+            self,
+            positions: T.Mapping[int, T.Tuple[float, float]],
+            sizes: T.Mapping[int, T.Tuple[float, float]]):
+        """Take the positions of a complete layout as the state."""
+        self.positions.clear()
+        self.sizes.clear()
+        self.index = SpatialIndex(self.index.cell_size)
+        self._extent = None
+        self._extent_stale = False
+        self._invalid.clear()
+        for node_id, pos in positions.items():
+            self._set(node_id, pos, sizes[node_id])
+
+    def invalidate(self, *node_ids: int):
+        """Place these nodes again on the next update."""
+        self._invalid.update(node_ids)
+
+    def _set(
+            self, node_id: int, pos: T.Tuple[float, float],
+            size: T.Tuple[float, float]):
+        self.positions[node_id] = pos
+        self.sizes[node_id] = size
+        rect = (pos[0], pos[1], pos[0] + size[0], pos[1] + size[1])
+        old = self.index.rects.get(node_id)
+        if old is not None:
+            self._shrink(old)
+        self.index.insert(node_id, rect)
+        if self._extent_stale:
+            return
+        e = self._extent or rect
+        self._extent = (
+            min(e[0], rect[0]), min(e[1], rect[1]),
+            max(e[2], rect[2]), max(e[3], rect[3]))
+
+    def _forget(self, node_id: int):
+        del self.positions[node_id]
+        del self.sizes[node_id]
+        self._shrink(self.index.rects[node_id])
+        self.index.remove(node_id)
+
+    def _shrink(self, rect: Rect):
+        """Mark the extent stale if `rect`, about to go, is on its
+        border."""
+        e = self._extent
+        if e is not None and (
+                rect[0] <= e[0] or rect[1] <= e[1] or
+                rect[2] >= e[2] or rect[3] >= e[3]):
+            self._extent_stale = True
+
+    def extent(self) -> T.Optional[Rect]:
+        """Bounds of the placed nodes, None when nothing is placed."""
+        if self._extent_stale:
+            rects = self.index.rects.values()
+            self._extent = (
+                min(r[0] for r in rects), min(r[1] for r in rects),
+                max(r[2] for r in rects), max(r[3] for r in rects),
+            ) if rects else None
+            self._extent_stale = False
+        return self._extent
+
+    def _overlaps(self, node_id: int, pos, size) -> bool:
+        p = self.padding_node
+        found = self.index.query((
+            pos[0] - p, pos[1] - p, pos[0] + size[0] + p, pos[1] + size[1] + p,
+        ))
+        found.discard(node_id)
+        return bool(found)
+
+    def update(
+            self,
+            nodes: T.Iterable["NodeBase"],
+            sizes: T.Mapping[int, T.Tuple[float, float]],
+            positions: T.Optional[
+                T.Mapping[int, T.Tuple[float, float]]] = None,
+            ) -> T.Dict[int, T.Tuple[float, float]]:
+        """Bring the state up to date with the graph and place the new
+        nodes.
+
+        Args:
+            nodes: All nodes of the graph. Nodes missing from the state
+                are placed, placed nodes missing here are forgotten.
+            sizes: (width, height) of each node, keyed by node id. A
+                placed node that grew over another one is placed again.
+            positions: Current top-left positions, keyed by node id,
+                to follow the nodes moved by hand.
+
+        Returns:
+            The new positions of the placed nodes, keyed by node id.
+        """
+        nodes = list(nodes)
+        present = {node.id for node in nodes}
+        for node_id in list(self.positions):
+            if node_id not in present:
+                self._forget(node_id)
+        to_place = []
+        for node in nodes:
+            node_id = node.id
+            if node_id not in self.positions or node_id in self._invalid:
+                to_place.append(node)
+                continue
+            pos, size = self.positions[node_id], sizes[node_id]
+            if positions is not None and positions[node_id] != pos:
+                pos = positions[node_id]
+                self._set(node_id, pos, size)
+            elif size != self.sizes[node_id]:
+                self._set(node_id, pos, size)
+                if self._overlaps(node_id, pos, size):
+                    to_place.append(node)
+        self._invalid.clear()
+        for node in to_place:
+            if node.id in self.positions:
+                self._forget(node.id)
+        # predecessors first, so new chains flow along the levels
+        levels, _ = compute_levels(to_place)
+        to_place.sort(key=lambda n: levels[n.id])
+        placed = {}
+        for node in to_place:
+            size = sizes[node.id]
+            pos = self._free_spot(node.id, self._target(node, size), size)
+            self._set(node.id, pos, size)
+            placed[node.id] = pos
+        return placed
+
+    def _target(
+            self, node: "NodeBase",
+            size: T.Tuple[float, float]) -> T.Tuple[float, float]:
+        """Top-left position next to the placed neighbors."""
+        # a: coordinate along the levels, b: across them
+        ax = 1 if self.direction == "TB" else 0
+        bx = 1 - ax
+        preds = [
+            n.id for n in node.predecessors()
+            if n.id in self.positions and n.id != node.id]
+        succs = [
+            n.id for n in node.successors()
+            if n.id in self.positions and n.id != node.id]
+        neighbors = preds + succs
+        if not neighbors:
+            e = self.extent()
+            if e is None:
+                return self.start_pos
+            # under everything, at the start of the levels
+            pos = [0.0, 0.0]
+            pos[ax] = e[ax]
+            pos[bx] = e[bx + 2] + self.padding_node
+            return pos[0], pos[1]
+        if preds:
+            a = max(
+                self.positions[i][ax] + self.sizes[i][ax]
+                for i in preds) + self.padding_level
+        else:
+            a = min(
+                self.positions[i][ax]
+                for i in succs) - self.padding_level - size[ax]
+        b = sum(
+            self.positions[i][bx] + self.sizes[i][bx] / 2
+            for i in neighbors) / len(neighbors) - size[bx] / 2
+        pos = [0.0, 0.0]
+        pos[ax], pos[bx] = a, b
+        return pos[0], pos[1]
+
+    def _free_spot(
+            self, node_id: int, target: T.Tuple[float, float],
+            size: T.Tuple[float, float]) -> T.Tuple[float, float]:
+        """Closest position along the level of `target` where the node
+        overlaps no other node, trying further levels if it is full."""
+        ax = 1 if self.direction == "TB" else 0
+        bx = 1 - ax
+        step = (size[bx] + self.padding_node) / 2
+        shift = size[ax] + self.padding_level
+        pos = list(target)
+        for _ in range(self.max_tries // 8):
+            b = pos[bx]
+            for i in range(self.max_tries):
+                # 0, +1, -1, +2, -2, ... steps away
+                offset = (i + 1) // 2 * (1 if i % 2 else -1)
+                pos[bx] = b + offset * step
+                if not self._overlaps(node_id, pos, size):
+                    return pos[0], pos[1]
+            pos[bx] = b
+            pos[ax] += shift
+        # nothing free nearby, under everything
+        e = self.extent()
+        assert e is not None
+        pos[ax] = target[ax]
+        pos[bx] = e[bx + 2] + self.padding_node
+        return pos[0], pos[1]
@@ -0,0 +1,122 @@
+"""Autosave of a graph as a snapshot file followed by a journal of its
+changes, for crash recovery.
+
+Unlike the other serialization modules, this module requires qtpy.
+"""
+import typing as T
+import os
+
+from qtpy import QtCore
+
+from .graph_diff import (
+    PATCHES_SUFFIX, ChangeSet, append_patch, patches_are_current,
+    save_snapshot,
+)
+
+if T.TYPE_CHECKING:
+    from ..model import Graph
+
+
+def _drop_partial_line(path: str):
+    """Cut a last line without newline, left by a crash while it was
+    written, so that the next line is appended after a complete one."""
+    try:
+        f = open(path, "rb+")
+    except FileNotFoundError:
+        return
+    with f:
+        data = f.read()
+        if data and not data.endswith(b"\n"):
+            f.truncate(data.rfind(b"\n") + 1)
+
+
+class Journal(QtCore.QObject):
+    """Record the changes of a graph and append them to a journal file.
+
+    The file `path` holds a snapshot of the whole graph, and "<path>.patches"
+    the changes made after it, one `graph_diff` patch per line. The
+    changes are followed by a `ChangeSet`: the added and removed nodes
+    and edges, the edited port values, and the nodes moved or renamed by
+    the undoable commands of `easynode.command`. They are written
+    together `interval` ms after the first one, so an autosave costs
+    O(edit) instead of O(graph). When the journal grows larger than
+    `max_ratio` times the snapshot, the next write is a new snapshot
+    instead.
+
+    Other changes, e.g. auto layouts, are saved with the next change of
+    the node or the next snapshot. Recover with
+    `NodeEditor.load_journaled_graph`.
+
+    Args:
+        graph: Graph to record.
+        path: Path of the snapshot file.
+        interval: Delay of the writes, in ms.
+        max_ratio: Size of the journal, relative to the snapshot,
+            above which a new snapshot is written.
+        resume: The graph was loaded from `path` and its journal, append
+            to them instead of starting with a snapshot. A journal left
+            from a previous snapshot is replaced by a new one.
+        parent: Parent QObject.
+    """
+
+    def __init__(
+            self,
+            graph: "Graph",
+            path: str,
+            interval: int = 1000,
+            max_ratio: float = 0.5,
+            resume: bool = False,
+            parent: T.Optional[QtCore.QObject] = None,
+            ) -> None:
+        super().__init__(parent)
+        self.graph = graph
+        self.path = path
+        self.max_ratio = max_ratio
+        self.changes = ChangeSet(on_change=self._schedule)
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(interval)
+        self._timer.timeout.connect(self.flush)
+        if resume and os.path.exists(path) and patches_are_current(path):
+            _drop_partial_line(self.patches_path)
+            self._snapshot_size = os.path.getsize(path)
+            self._journal_size = (
+                os.path.getsize(self.patches_path)
+                if os.path.exists(self.patches_path) else 0)
+        else:
+            self.snapshot()
+        self.changes.connect(graph)
+
+    @property
+    def patches_path(self) -> str:
+        return self.path + PATCHES_SUFFIX
+
+    def _schedule(self):
+        if self.changes and not self._timer.isActive():
+            self._timer.start()
+
+    def flush(self) -> None:
+        """Write the changes recorded since the previous write."""
+        if not self.changes:
+            return
+        if self._journal_size > self.max_ratio * self._snapshot_size:
+            self.snapshot()
+            return
+        self._journal_size += append_patch(
+            self.path, self.changes.to_patch())
+        self.changes.clear()
+        self._timer.stop()
+
+    def snapshot(self) -> None:
+        """Write the whole graph and start a new journal."""
+        self._snapshot_size = save_snapshot(self.graph, self.path)
+        self._journal_size = 0
+        self.changes.clear()
+        self._timer.stop()
+
+    def close(self) -> None:
+        """Write the pending changes and stop recording."""
+        self.flush()
+        self.changes.disconnect()
+        if self.graph.journal is self:
+            self.graph.journal = None
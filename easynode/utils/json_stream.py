@@ -0,0 +1,134 @@
+"""Incremental reading of large JSON graph files.
+
+The standard `json` module only parses complete documents. Here the
+top-level object is read key by key from a file, and the items of its
+"nodes" and "edges" arrays are decoded one at a time with
+`json.JSONDecoder.raw_decode`, so only a block of the file and one item
+are held in memory at once.
+"""
+import typing as T
+import codecs
+import json
+import os
+
+
+# top-level keys whose arrays are read item by item
+STREAMED_KEYS = frozenset({"nodes", "edges"})
+
+_WHITESPACE = " \t\n\r"
+
+
+class JsonGraphReader:
+    """Iterate over a JSON graph file as `(key, value)` pairs.
+
+    Items of the streamed arrays are yielded one by one, as `("nodes",
+    node_data)` and `("edges", edge_data)`. The other top-level keys are
+    yielded with their whole value.
+
+    Args:
+        fp: File opened in binary mode.
+        block_size: Number of bytes read at a time.
+
+    Attributes:
+        bytes_read: Bytes read from the file so far.
+        total_bytes: Size of the file, None if it is not seekable.
+    """
+
+    def __init__(self, fp: T.BinaryIO, block_size: int = 2**20) -> None:
+        self.fp = fp
+        self.block_size = block_size
+        self.bytes_read = 0
+        self.total_bytes: T.Optional[int] = None
+        try:
+            self.total_bytes = os.fstat(fp.fileno()).st_size
+        except (AttributeError, OSError, ValueError):
+            pass
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+
+    @property
+    def progress(self) -> float:
+        """Fraction of the file read, 0 if its size is unknown."""
+        if not self.total_bytes:
+            return 1.0 if self._eof else 0.0
+        return min(self.bytes_read / self.total_bytes, 1.0)
+
+    def _fill(self) -> bool:
+        """Read another block, False at the end of the file."""
+        if self._eof:
+            return False
+        block = self.fp.read(self.block_size)
+        self.bytes_read += len(block)
+        if not block:
+            self._eof = True
+            self._buf += self._decoder.decode(b"", final=True)
+            return False
+        # drop the consumed text, once it is most of the buffer
+        if self._pos > len(self._buf) // 2:
+            self._buf = self._buf[self._pos:]
+            self._pos = 0
+        self._buf += self._decoder.decode(block)
+        return True
+
+    def _peek(self) -> str:
+        """Next non-whitespace character, "" at the end of the file."""
+        while True:
+            buf, pos = self._buf, self._pos
+            while pos < len(buf) and buf[pos] in _WHITESPACE:
+                pos += 1
+            self._pos = pos
+            if pos < len(buf):
+                return buf[pos]
+            if not self._fill():
+                return ""
+
+    def _expect(self, chars: str) -> str:
+        c = self._peek()
+        if c == "" or c not in chars:
+            raise ValueError(
+                f"Expected one of {chars!r} at offset {self._pos}, "
+                f"got {c!r}")
+        self._pos += 1
+        return c
+
+    def _value(self) -> T.Any:
+        """Decode the next complete value, reading more as needed."""
+        self._peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # a number may go on in the next block
+            if end == len(self._buf) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def __iter__(self) -> T.Iterator[T.Tuple[str, T.Any]]:
+        self._expect("{")
+        if self._peek() == "}":
+            return
+        while True:
+            key = self._value()
+            if not isinstance(key, str):
+                raise ValueError(f"Expected a key at offset {self._pos}")
+            self._expect(":")
+            if key in STREAMED_KEYS and self._peek() == "[":
+                self._pos += 1
+                if self._peek() == "]":
+                    self._pos += 1
+                else:
+                    while True:
+                        yield key, self._value()
+                        if self._expect(",]") == "]":
+                            break
+            else:
+                yield key, self._value()
+            if self._expect(",}") == "}":
+                return
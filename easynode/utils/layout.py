@@ -1,41 +1,236 @@
 import typing as T
+import heapq
+from collections import deque
+from dataclasses import dataclass, field
 
 if T.TYPE_CHECKING:
     from ..model import Graph, Node
+    from ..core import NodeBase, EdgeBase
 
 
-def determine_levels(graph: "Graph") -> T.Dict[int, int]:
-    """Determine levels of nodes in graph."""
-    levels: T.Dict[int, int] = {}
-
-    def get_level(node: "Node") -> int:
-        if node.id in levels:
-            return levels[node.id]
-        if len(node.input_edges) == 0:
-            levels[node.id] = 0
-            return 0
-        input_nodes = [
-            e.source_port.node
-            for e in node.input_edges
-        ]
-        level = max([get_level(n) for n in input_nodes]) + 1  # type: ignore
-        levels[node.id] = level
-        return level
+Position = T.Tuple[float, float]
+# called with the fraction of the work done, may raise to stop
+Progress = T.Callable[[float], None]
+# nodes handled between two progress reports of the linear steps
+PROGRESS_STEP = 4096
 
-    for node in graph.nodes:
-        get_level(node)
+
+class LayoutCancelled(Exception):
+    """Raised by a progress callback to stop a layout."""
+
+
+def index_edges(
+        nodes: T.Sequence["NodeBase"],
+        ) -> T.List[T.List[T.Tuple[int, "EdgeBase"]]]:
+    """Output edges of each node between the given nodes, as
+    `(target index, edge)` pairs."""
+    index = {node.id: i for i, node in enumerate(nodes)}
+    out: T.List[T.List[T.Tuple[int, "EdgeBase"]]] = []
+    for node in nodes:
+        targets = []
+        for edge in node.iter_output_edges():
+            target = edge.target_port.node
+            j = None if target is None else index.get(target.id)
+            if j is not None:
+                targets.append((j, edge))
+        out.append(targets)
+    return out
+
+
+def compute_levels(
+        nodes: T.Iterable["NodeBase"],
+        break_cycles: bool = True,
+        ) -> T.Tuple[T.Dict[int, int], T.List["EdgeBase"]]:
+    """Longest-path level of each node, in O(N + E).
+
+    Nodes without predecessors are on level 0, and every other node is
+    one level after its furthest predecessor. Only edges between the
+    given nodes are considered.
+
+    Cycles are broken greedily: when every remaining node still waits
+    for a predecessor, the one with the fewest pending incoming edges
+    is placed anyway (ties go to the node reached furthest from the
+    sources, then to the most outgoing edges), and its pending edges
+    are reported as feedback edges.
+
+    Args:
+        nodes: Nodes to level.
+        break_cycles: Break cycles instead of raising.
+
+    Returns:
+        The levels keyed by node id, and the feedback edges.
+
+    Raises:
+        ValueError: If the nodes contain a cycle and `break_cycles` is
+            False.
+    """
+    nodes = list(nodes)
+    levels, feedback = levels_from_edges(
+        nodes, index_edges(nodes), break_cycles)
+    return {node.id: lvl for node, lvl in zip(nodes, levels)}, feedback
+
+
+def levels_from_edges(
+        nodes: T.Sequence[T.Any],
+        out: T.Sequence[T.Sequence[T.Tuple[int, T.Any]]],
+        break_cycles: bool = True,
+        progress: T.Optional[Progress] = None,
+        ) -> T.Tuple[T.List[int], T.List[T.Any]]:
+    """`compute_levels` on edges from `index_edges` (or
+    `GraphSnapshot.out`), levels by index. `progress` is called every
+    `PROGRESS_STEP` nodes."""
+    n = len(nodes)
+    pending = [0] * n
+    for targets in out:
+        for j, _ in targets:
+            pending[j] += 1
+    levels = [0] * n
+    done = [False] * n
+    n_done = 0
+    feedback: T.List[T.Any] = []
+    queue = deque(i for i in range(n) if pending[i] == 0)
+    # candidates for breaking a cycle, and the input edges, only built
+    # once a cycle is found
+    heap: T.List[T.Tuple[int, int, int, int]] = []
+    inputs: T.Optional[T.List[T.List[T.Tuple[int, T.Any]]]] = None
+
+    def push(i: int):
+        heapq.heappush(heap, (pending[i], -levels[i], -len(out[i]), i))
+
+    while n_done < n:
+        if not queue:
+            if inputs is None:
+                if not break_cycles:
+                    remaining = [nodes[i] for i in range(n) if not done[i]]
+                    raise ValueError(
+                        f"Graph contains a cycle through: {remaining}")
+                inputs = [[] for _ in range(n)]
+                for i, targets in enumerate(out):
+                    for j, edge in targets:
+                        inputs[j].append((i, edge))
+                for i in range(n):
+                    if not done[i]:
+                        push(i)
+            count, level, _, j = heapq.heappop(heap)
+            if done[j] or count != pending[j] or -level != levels[j]:
+                continue  # stale entry
+            for i, edge in inputs[j]:
+                if not done[i]:
+                    feedback.append(edge)
+            pending[j] = 0
+            queue.append(j)
+        i = queue.popleft()
+        done[i] = True
+        n_done += 1
+        if progress is not None and n_done % PROGRESS_STEP == 0:
+            progress(n_done / n)
+        level = levels[i] + 1
+        for j, _ in out[i]:
+            if done[j]:  # feedback edge, or a self loop
+                continue
+            if levels[j] < level:
+                levels[j] = level
+            pending[j] -= 1
+            if pending[j] == 0:
+                queue.append(j)
+            elif inputs is not None:
+                push(j)
+    return levels, feedback
+
+
+@dataclass
+class GraphSnapshot:
+    """Plain copy of what the layouts need from a graph. It holds no
+    reference to the graph, so a layout can run on it in another thread
+    while the graph is being edited.
+
+    Nodes are referred to by their index in `ids`.
+
+    Attributes:
+        ids: Node ids.
+        sizes: (width, height) of each node.
+        positions: Top-left position of each node, None if unknown.
+        n_inputs: Number of input ports of each node.
+        n_outputs: Number of output ports of each node.
+        out: Output edges of each node, as `(target index, (source port
+            index, target port index))` pairs.
+    """
+    ids: T.List[int] = field(default_factory=list)
+    sizes: T.List[Position] = field(default_factory=list)
+    positions: T.List[T.Optional[Position]] = field(default_factory=list)
+    n_inputs: T.List[int] = field(default_factory=list)
+    n_outputs: T.List[int] = field(default_factory=list)
+    out: T.List[T.List[T.Tuple[int, T.Tuple[int, int]]]] = \
+        field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def from_nodes(
+            cls,
+            nodes: T.Sequence["NodeBase"],
+            sizes: T.Mapping[int, Position],
+            positions: T.Optional[T.Mapping[int, Position]] = None,
+            ) -> "GraphSnapshot":
+        """Snapshot of nodes, only the edges between them are kept."""
+        positions = positions or {}
+        snap = cls()
+        for node, targets in zip(nodes, index_edges(nodes)):
+            snap.ids.append(node.id)
+            snap.sizes.append(sizes[node.id])
+            snap.positions.append(positions.get(node.id))
+            snap.n_inputs.append(len(node.input_ports))
+            snap.n_outputs.append(len(node.output_ports))
+            snap.out.append([
+                (j, (edge.source_port.index, edge.target_port.index))
+                for j, edge in targets
+            ])
+        return snap
+
+
+def node_geometry(
+        graph: "Graph",
+        node: "Node") -> T.Tuple[Position, T.Tuple[float, float]]:
+    """Position and size of the item of a node, or of its placeholder
+    if the item is not created yet (see `LazyItems`)."""
+    if node.item is None and graph.lazy_items is not None:
+        x0, y0, x1, y1 = graph.lazy_items.rect(node)
+        return (x0, y0), (x1 - x0, y1 - y0)
+    assert node.item is not None
+    rect = node.item.boundingRect()
+    pos = node.item.pos()
+    return (pos.x(), pos.y()), (rect.width(), rect.height())
+
+
+def snapshot_graph(graph: "Graph") -> GraphSnapshot:
+    """Snapshot of a graph and of the sizes and positions of its node
+    items."""
+    nodes = list(graph.nodes)
+    sizes, positions = {}, {}
+    for node in nodes:
+        positions[node.id], sizes[node.id] = node_geometry(graph, node)
+    return GraphSnapshot.from_nodes(nodes, sizes, positions)
+
+
+def determine_levels(
+        graph: "Graph", break_cycles: bool = True) -> T.Dict[int, int]:
+    """Determine levels of nodes in graph.
+
+    See `compute_levels`.
+    """
+    levels, _ = compute_levels(graph.nodes, break_cycles)
     return levels
 
 
 def node_sort_key(node: "Node") -> int:
     """Sort key for nodes."""
-    out_edges = node.output_edges
-    if len(out_edges) == 0:
+    if node.out_degree == 0:
         return 0
-    return max([  # type: ignore
+    return max(
         e.target_port.index
-        for e in out_edges
-    ])
+        for e in node.iter_output_edges()
+    )
 
 
 def get_level_to_nodes(
@@ -54,50 +249,203 @@ def get_level_to_nodes(
     return level_to_nodes
 
 
-def layout_graph(
-        graph: "Graph",
+def stacked_positions(
+        snap: GraphSnapshot,
         direction: str = "LR",
         padding_level: float = 100.0,
         padding_node: float = 20.0,
-        start_pos: T.Tuple[float, float] = (10.0, 10.0),
-        ) -> None:
-    """Layout graph.
+        start_pos: Position = (10.0, 10.0),
+        progress: T.Optional[Progress] = None,
+        ) -> T.Dict[int, Position]:
+    """Positions of the "levels" mode: the nodes of each level are
+    stacked, sorted by the highest target port index of their output
+    edges (see `node_sort_key`).
 
-    Args:
-        graph: Graph.
-        direction: Direction of layout. Options: "LR", "TB".
-            Default: "LR".
-        padding_level: Padding between levels.
-            Default: 100.0
-        padding_node: Padding between nodes.
-            Default: 20.0
-        start_pos: Start position of layout.
-            Default: (0.0, 0.0)
+    `progress` is called every `PROGRESS_STEP` nodes, half of the work
+    is the levels.
     """
-    level_to_nodes = get_level_to_nodes(graph)
-    # layout nodes
+    report = progress or (lambda fraction: None)
+    n = len(snap)
+    levels, _ = levels_from_edges(
+        snap.ids, snap.out, progress=lambda f: report(f / 2))
+    level_to_nodes: T.Dict[int, T.List[int]] = {}
+    for i, level in enumerate(levels):
+        level_to_nodes.setdefault(level, []).append(i)
+    positions: T.Dict[int, Position] = {}
     level_offset = 0.0
-    level_nodes = list(level_to_nodes.items())
-    level_nodes.sort(key=lambda x: x[0])
-    for _, nodes in level_nodes:
+    for _, nodes in sorted(level_to_nodes.items()):
+        nodes.sort(key=lambda i: max(
+            (port for _, (_, port) in snap.out[i]), default=0))
         node_offset = 0.0
         max_size = 0.0
-        for node in nodes:
-            assert node.item is not None
-            width = node.item.boundingRect().width()
-            height = node.item.boundingRect().height()
+        for i in nodes:
+            placed = len(positions)
+            if placed and placed % PROGRESS_STEP == 0:
+                report(0.5 + placed / n / 2)
+            width, height = snap.sizes[i]
             if direction == "TB":
-                node.item.setPos(
+                positions[snap.ids[i]] = (
                     start_pos[0] + node_offset,
                     start_pos[1] + level_offset
                 )
                 node_offset += width + padding_node
                 max_size = max(max_size, height)
             else:  # "LR"
-                node.item.setPos(
+                positions[snap.ids[i]] = (
                     start_pos[0] + level_offset,
                     start_pos[1] + node_offset
                 )
                 node_offset += height + padding_node
                 max_size = max(max_size, width)
         level_offset += max_size + padding_level
+    return positions
+
+
+def compute_positions(
+        snap: GraphSnapshot,
+        mode: str = "levels",
+        direction: str = "LR",
+        padding_level: float = 100.0,
+        padding_node: float = 20.0,
+        start_pos: Position = (10.0, 10.0),
+        pinned: T.Iterable[int] = (),
+        iterations: int = 100,
+        progress: T.Optional[Progress] = None,
+        ) -> T.Dict[int, Position]:
+    """Positions of the nodes of a snapshot, keyed by node id. Only
+    uses the snapshot, so it can run in a worker thread.
+
+    See `layout_graph` for the arguments, `pinned` holds node ids here.
+    `progress` is called with the fraction of the work done, and may
+    raise to stop the layout.
+    """
+    if mode == "levels":
+        positions = stacked_positions(
+            snap, direction, padding_level, padding_node, start_pos,
+            progress)
+    elif mode == "sugiyama":
+        from .sugiyama import sugiyama_positions
+        positions = sugiyama_positions(
+            snap, direction=direction, padding_level=padding_level,
+            padding_node=padding_node, start_pos=start_pos,
+            progress=progress)
+    elif mode == "force":
+        from .force import force_positions
+        positions = force_positions(
+            snap, pinned=pinned, iterations=iterations,
+            padding=padding_node, start_pos=start_pos, progress=progress)
+    else:
+        raise ValueError(f"Unknown layout mode: {mode}")
+    if progress is not None:
+        progress(1.0)
+    return positions
+
+
+def apply_positions(graph: "Graph", positions: T.Mapping[int, Position]):
+    """Move the node items, in one scene update.
+
+    Positions of nodes no longer in the graph are ignored. The scene
+    index is rebuilt once at the end instead of on every move, and the
+    views repaint once.
+    """
+    scene = graph.scene
+    lazy_items = graph.lazy_items
+    if lazy_items is not None:
+        for node in graph.nodes:
+            if node.id in positions and node in lazy_items:
+                lazy_items.move(node, *positions[node.id])
+    if scene is None:
+        for node in graph.nodes:
+            if node.id in positions and node.item is not None:
+                node.item.setPos(*positions[node.id])
+        return
+    from qtpy import QtWidgets
+    views = scene.views()
+    index_method = scene.itemIndexMethod()
+    for view in views:
+        view.setUpdatesEnabled(False)
+    scene.setItemIndexMethod(
+        QtWidgets.QGraphicsScene.ItemIndexMethod.NoIndex)
+    try:
+        for node in graph.nodes:
+            if node.id in positions and node.item is not None:
+                node.item.setPos(*positions[node.id])
+    finally:
+        scene.setItemIndexMethod(index_method)
+        for view in views:
+            view.setUpdatesEnabled(True)
+        scene.update()
+
+
+def layout_graph(
+        graph: "Graph",
+        direction: str = "LR",
+        padding_level: float = 100.0,
+        padding_node: float = 20.0,
+        start_pos: Position = (10.0, 10.0),
+        mode: str = "levels",
+        pinned: T.Iterable["Node"] = (),
+        iterations: int = 100,
+        ) -> None:
+    """Layout graph.
+
+    Args:
+        graph: Graph.
+        direction: Direction of layout. Options: "LR", "TB".
+            Default: "LR".
+        padding_level: Padding between levels.
+            Default: 100.0
+        padding_node: Padding between nodes.
+            Default: 20.0
+        start_pos: Start position of layout.
+            Default: (0.0, 0.0)
+        mode: "levels" stacks the nodes of each level, "sugiyama"
+            also orders them to reduce edge crossings and aligns them
+            with their neighbors, "force" is a force-directed layout
+            for graphs that are not pipelines, "incremental" only
+            places the nodes added since the last incremental layout,
+            next to their neighbors, and leaves the others in place.
+            Default: "levels"
+        pinned: Nodes that keep their position, in "force" mode.
+        iterations: Iteration budget of the "force" mode.
+            Default: 100
+    """
+    if mode == "incremental":
+        _layout_incremental(
+            graph, direction, padding_level, padding_node, start_pos)
+        return
+    positions = compute_positions(
+        snapshot_graph(graph), mode, direction=direction,
+        padding_level=padding_level, padding_node=padding_node,
+        start_pos=start_pos, pinned=[node.id for node in pinned],
+        iterations=iterations)
+    apply_positions(graph, positions)
+
+
+def _layout_incremental(
+        graph: "Graph",
+        direction: str,
+        padding_level: float,
+        padding_node: float,
+        start_pos: Position,
+        ) -> None:
+    from .incremental import IncrementalLayout
+    state = graph.incremental_layout
+    if state is None:
+        # the first call lays out the whole graph
+        layout_graph(
+            graph, direction=direction, padding_level=padding_level,
+            padding_node=padding_node, start_pos=start_pos)
+    sizes, current = {}, {}
+    for node in graph.nodes:
+        current[node.id], sizes[node.id] = node_geometry(graph, node)
+    if state is None:
+        state = graph.incremental_layout = IncrementalLayout(
+            direction, padding_level, padding_node, start_pos)
+        state.reset(current, sizes)
+        return
+    state.direction = direction
+    state.padding_level = padding_level
+    state.padding_node = padding_node
+    state.start_pos = start_pos
+    apply_positions(graph, state.update(graph.nodes, sizes, current))
@@ -0,0 +1,156 @@
+"""Compute graph layouts in a worker thread.
+
+Unlike the other layout modules, this module requires qtpy.
+"""
+import typing as T
+import threading
+
+from qtpy import QtCore
+
+from .layout import (
+    LayoutCancelled, Position, apply_positions, compute_positions,
+    snapshot_graph,
+)
+
+if T.TYPE_CHECKING:
+    from ..model.graph import Graph
+    from ..model.node import Node
+
+
+class LayoutRunner(QtCore.QObject):
+    """Lay out a graph without blocking the GUI thread.
+
+    `start` takes a snapshot of the node sizes, positions and edges,
+    and computes the layout on it in a worker thread, so the graph can
+    be edited meanwhile. The positions are applied in one scene update
+    once the layout is done. Nodes removed meanwhile are skipped, and
+    nodes added meanwhile stay where they are: the results are matched
+    to the nodes by `uid`, which a new node can not share with a removed
+    one, unlike `id`.
+
+    Starting a layout while another one runs cancels the older one,
+    which emits `cancelled` right away.
+
+    Args:
+        graph: Qt graph to lay out.
+        parent: Parent QObject.
+    """
+    # fraction of the work done, on the GUI thread
+    progress = QtCore.Signal(float)
+    # the positions applied, keyed by node id
+    finished = QtCore.Signal(object)
+    cancelled = QtCore.Signal()
+    # the exception raised by the layout
+    failed = QtCore.Signal(object)
+    _progress = QtCore.Signal(int, float)
+    _done = QtCore.Signal(int, object, object)
+
+    def __init__(
+            self,
+            graph: "Graph",
+            parent: T.Optional[QtCore.QObject] = None,
+            ) -> None:
+        super().__init__(parent)
+        self.graph = graph
+        self._job = 0
+        self._cancel: T.Optional[threading.Event] = None
+        self._thread: T.Optional[threading.Thread] = None
+        self._progress.connect(self._on_progress)
+        self._done.connect(self._on_done)
+
+    @property
+    def is_running(self) -> bool:
+        return self._thread is not None
+
+    def start(
+            self,
+            mode: str = "levels",
+            direction: str = "LR",
+            padding_level: float = 100.0,
+            padding_node: float = 20.0,
+            start_pos: Position = (10.0, 10.0),
+            pinned: T.Iterable["Node"] = (),
+            iterations: int = 100,
+            ):
+        """Start a layout, see `layout_graph` for the arguments. The
+        "incremental" mode is not supported, it is cheap enough to run
+        on the GUI thread."""
+        if mode == "incremental":
+            raise ValueError("Incremental layouts run on the GUI thread")
+        replaced = self.is_running
+        self.cancel()
+        snap = snapshot_graph(self.graph)
+        uids = {node.id: node.uid for node in self.graph.nodes}
+        pinned_ids = [node.id for node in pinned]
+        self._job += 1
+        job = self._job
+        cancel = self._cancel = threading.Event()
+
+        def report(fraction: float):
+            if cancel.is_set():
+                raise LayoutCancelled()
+            # called on the worker thread, the signal is queued
+            self._progress.emit(job, fraction)
+
+        def run():
+            try:
+                positions = compute_positions(
+                    snap, mode, direction=direction,
+                    padding_level=padding_level, padding_node=padding_node,
+                    start_pos=start_pos, pinned=pinned_ids,
+                    iterations=iterations, progress=report)
+            except Exception as e:
+                self._done.emit(job, None, e)
+            else:
+                self._done.emit(job, {
+                    uids[node_id]: pos
+                    for node_id, pos in positions.items()}, None)
+
+        self._thread = threading.Thread(
+            target=run, name="easynode-layout", daemon=True)
+        self._thread.start()
+        if replaced:
+            # the older job's own result is ignored when it arrives
+            self.cancelled.emit()
+
+    def cancel(self):
+        """Stop the running layout at its next progress report, then
+        emit `cancelled`. Nothing is moved."""
+        if self._cancel is not None:
+            self._cancel.set()
+
+    def wait(self, timeout: T.Optional[float] = None) -> bool:
+        """Wait for the worker thread. The result is applied by the
+        event loop afterwards. Returns False on timeout."""
+        thread = self._thread
+        if thread is None:
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+
+    def _on_progress(self, job: int, fraction: float):
+        if job == self._job:
+            self.progress.emit(fraction)
+
+    def _on_done(
+            self, job: int,
+            uid_positions: T.Optional[T.Dict[int, Position]],
+            error: T.Optional[Exception]):
+        if job != self._job:
+            return  # replaced by a newer layout
+        cancelled = self._cancel is not None and self._cancel.is_set()
+        self._cancel = None
+        self._thread = None
+        if isinstance(error, LayoutCancelled) or cancelled:
+            self.cancelled.emit()
+        elif error is not None:
+            self.failed.emit(error)
+        else:
+            assert uid_positions is not None
+            positions = {}
+            for uid, pos in uid_positions.items():
+                node = self.graph.node_by_uid(uid)
+                if node is not None:
+                    positions[node.id] = pos
+            apply_positions(self.graph, positions)
+            self.finished.emit(positions)
@@ -1,7 +1,11 @@
-from qtpy import QtCore
+import typing as T
 
+if T.TYPE_CHECKING:
+    from qtpy import QtCore
 
-def point2pointf(point: QtCore.QPoint) -> QtCore.QPointF:
+
+def point2pointf(point: "QtCore.QPoint") -> "QtCore.QPointF":
+    from qtpy import QtCore
     return QtCore.QPointF(point.x(), point.y())
 
 
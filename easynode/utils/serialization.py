@@ -1,48 +1,149 @@
+"""Serialization of graphs to and from JSON-compatible dicts.
+
+This module does not import qtpy, the functions work with both the Qt
+model (`easynode.model`) and the headless core (`easynode.core`).
+"""
 import typing as T
+import json
 from dataclasses import asdict
 
+from ..core.port import DataPortBase, StreamPortBase
+from ..setting import (
+    NodeItemSetting, PortSetting, T1, dataclass_from_dict,
+)
+
 if T.TYPE_CHECKING:
     from ..node_editor import NodeEditor
     from ..model.port import Port
     from ..model.node import Node
     from ..model.edge import Edge
     from ..model.graph import SubGraph, Graph
+    from .. import core
+
+
+class SettingsTable:
+    """Distinct settings of a serialized graph, each stored once.
+
+    Nodes and ports refer to their setting by its index in `entries`.
+    When loading, each entry becomes a single instance shared by all
+    the nodes or ports referring to it. A reference may also be the
+    setting dict itself, as written before the table existed.
+
+    Args:
+        entries: Serialized settings, when loading.
+    """
+
+    def __init__(
+            self,
+            entries: T.Optional[T.List[T.Dict[str, T.Any]]] = None,
+            ) -> None:
+        self.entries: T.List[T.Dict[str, T.Any]] = list(entries or [])
+        self._index: T.Dict[str, int] = {}
+        # id -> (setting, index), the setting is kept so its id is not
+        # reused by another object
+        self._seen: T.Dict[int, T.Tuple[T.Any, int]] = {}
+        # last setting of each class, default settings are created on
+        # access so equal ones often follow each other
+        self._last: T.Dict[type, T.Tuple[T.Any, int]] = {}
+        self._instances: T.Dict[T.Tuple[type, int], T.Any] = {}
+        # index -> JSON text of the entry
+        self._keys: T.Dict[int, str] = {}
+
+    def add(self, setting: T.Any) -> T.Optional[int]:
+        """Index of a setting, added to the table if it is new."""
+        if setting is None:
+            return None
+        seen = self._seen.get(id(setting))
+        if seen is not None:
+            return seen[1]
+        last = self._last.get(type(setting))
+        if last is not None and last[0] == setting:
+            return last[1]
+        index = self.add_entry(asdict(setting))
+        self._seen[id(setting)] = self._last[type(setting)] = \
+            (setting, index)
+        return index
 
+    def add_entry(self, data: T.Dict[str, T.Any]) -> int:
+        """Index of a serialized setting, added to the table if it is
+        new."""
+        key = json.dumps(data, sort_keys=True)
+        index = self._index.get(key)
+        if index is None:
+            index = self._index[key] = len(self.entries)
+            self.entries.append(data)
+        return index
 
-def serialize_port(port: "Port") -> T.Dict[str, T.Any]:
-    from ..model.port import DataPort
+    def entry_key(self, ref: T.Any) -> T.Optional[str]:
+        """JSON text of the setting of a reference, equal for equal
+        settings of different tables."""
+        if ref is None:
+            return None
+        if isinstance(ref, dict):
+            return json.dumps(ref, sort_keys=True)
+        key = self._keys.get(ref)
+        if key is None:
+            key = self._keys[ref] = json.dumps(
+                self.entries[ref], sort_keys=True)
+        return key
+
+    def get(self, klass: T.Type[T1], ref: T.Any) -> T.Optional[T1]:
+        """Setting instance of a reference, shared for equal references."""
+        if ref is None:
+            return None
+        if isinstance(ref, dict):
+            return dataclass_from_dict(klass, ref)
+        setting = self._instances.get((klass, ref))
+        if setting is None:
+            setting = dataclass_from_dict(klass, self.entries[ref])
+            self._instances[klass, ref] = setting
+        return setting
+
+
+def serialize_port(
+        port: "Port",
+        settings: T.Optional[SettingsTable] = None,
+        ) -> T.Dict[str, T.Any]:
     data: T.Dict[str, T.Any] = {
         "name": port.name,
         "type": port.type,
-        "setting": asdict(port.setting),
+        "setting": asdict(port.setting) if settings is None
+        else settings.add(port.setting),
     }
-    if isinstance(port, DataPort):
-        widget_value = None
-        if port.widget is not None:
-            widget_value = port.widget.value
+    if isinstance(port, DataPortBase):
         data.update({
             "data_type": port.data_type.__name__,
             "data_range": port.data_range,
             "data_default": port.data_default,
             "widget_args": port.widget_args,
-            "widget_value": widget_value,
+            "widget_value": port.value,
         })
+    elif isinstance(port, StreamPortBase):
+        data["stream_maxsize"] = port.maxsize
     return data
 
 
-def serialize_node(node: "Node") -> T.Dict[str, T.Any]:
+def serialize_node(
+        node: "Node",
+        settings: T.Optional[SettingsTable] = None,
+        ) -> T.Dict[str, T.Any]:
     attrs = node.attrs.copy()
-    if node.item is not None:
-        attrs['pos'] = [node.item.pos().x(), node.item.pos().y()]
-    setting = None
-    if node.item_setting is not None:
+    item = getattr(node, "item", None)
+    if item is not None:
+        attrs['pos'] = [item.pos().x(), item.pos().y()]
+    setting: T.Any = None
+    if settings is not None:
+        setting = settings.add(node.item_setting)
+    elif node.item_setting is not None:
         setting = asdict(node.item_setting)
     return {
-        "id": id(node),
+        "id": node.uid,
         "type_name": node.type_name(),
         "name": node.name,
-        "input_ports": [serialize_port(p) for p in node.input_ports],
-        "output_ports": [serialize_port(p) for p in node.output_ports],
+        "input_ports": [
+            serialize_port(p, settings) for p in node.input_ports],
+        "output_ports": [
+            serialize_port(p, settings) for p in node.output_ports],
         "attrs": node.attrs,
         "setting": setting,
     }
@@ -50,32 +151,41 @@ def serialize_node(node: "Node") -> T.Dict[str, T.Any]:
 
 def deserialize_node(
         data: T.Dict[str, T.Any],
-        editor: "NodeEditor"
+        editor: "NodeEditor",
+        settings: T.Optional[SettingsTable] = None,
         ) -> "Node":
+    """Build a node with the factories of the editor, like `load_node`.
+    Settings are looked up in `settings`, the table of the serialized
+    graph."""
     type_name = data['type_name']
-    if type_name in editor.factory_table:
-        node = deserialize_node_with_factory(data, editor)
-    else:
+    if type_name not in editor.factory_table:
         raise ValueError(f"Unknown node type: {type_name}")
-    node.attrs = data['attrs']
-    return node
+    return load_node(  # type: ignore
+        data, editor.factory_table, settings)
 
 
 def deserialize_node_with_factory(
         data: T.Dict[str, T.Any],
         editor: "NodeEditor",
         ) -> "Node":
-    from ..model.port import DataPort
     type_name = data['type_name']
     factory = editor.factory_table[type_name]
+    return _node_from_factory(data, factory)
+
+
+def _node_from_factory(
+        data: T.Dict[str, T.Any],
+        factory: T.Callable[[], T.Any],
+        ) -> T.Any:
     node = factory()
     node.name = data['name']
     for port in node.input_ports:
-        if isinstance(port, DataPort):
+        if isinstance(port, DataPortBase):
             port_data = data['input_ports'][port.index]
             assert isinstance(port_data, dict)
             widget_value = port_data.get("widget_value")
-            port.widget_init_value = widget_value
+            if widget_value is not None:
+                port.value = widget_value
     return node
 
 
@@ -86,11 +196,11 @@ def serialize_edge(edge: "Edge") -> T.Dict[str, T.Any]:
     assert t_port.node is not None
     return {
         "source": {
-            "node_id": id(s_port.node),
+            "node_id": s_port.node.uid,
             "port_idx": s_port.index,
         },
         "target": {
-            "node_id": id(t_port.node),
+            "node_id": t_port.node.uid,
             "port_idx": t_port.index,
         },
     }
@@ -100,29 +210,35 @@ def deserialize_edges(
         edges_data: T.List[T.Dict[str, T.Any]],
         id2node: T.Dict[int, "Node"],
         ) -> T.List["Edge"]:
-    from ..model.edge import Edge
     edges = []
     for edge_data in edges_data:
         s_data = edge_data['source']
         t_data = edge_data['target']
-        source_node = id2node[s_data['node_id']]
-        target_node = id2node[t_data['node_id']]
+        try:
+            source_node = id2node[s_data['node_id']]
+            target_node = id2node[t_data['node_id']]
+        except KeyError as e:
+            raise ValueError(f"Edge refers to an unknown node: {e}") from None
         source_port = source_node.output_ports[s_data['port_idx']]
         target_port = target_node.input_ports[t_data['port_idx']]
-        edge = Edge(source_port, target_port)
+        edge = source_node.edge_class(source_port, target_port)
         edges.append(edge)
-        source_port.edge_added.emit(edge)
-        target_port.edge_added.emit(edge)
+        # the nodes are brand new, so nothing else listens to the ports
+        source_port.on_edge_added(edge)
+        target_port.on_edge_added(edge)
     return edges
 
 
 def serialize_nodes_and_edges(
-        nodes: T.List["Node"],
-        edges: T.List["Edge"],
+        nodes: T.Iterable["Node"],
+        edges: T.Iterable["Edge"],
         ) -> T.Dict[str, T.Any]:
-    nodes_data = [serialize_node(node) for node in nodes]
+    settings = SettingsTable()
+    nodes_data = [serialize_node(node, settings) for node in nodes]
     edges_data = [serialize_edge(edge) for edge in edges]
+    # before the nodes, so that streamed readers get it first
     return {
+        "settings": settings.entries,
         "nodes": nodes_data,
         "edges": edges_data,
     }
@@ -146,8 +262,9 @@ def deserialize_nodes_and_edges(
         ) -> T.Tuple[T.List["Node"], T.List["Edge"]]:
     nodes: T.List["Node"] = []
     id2node: T.Dict[int, "Node"] = {}
+    settings = SettingsTable(data.get('settings'))
     for node_data in data['nodes']:
-        node = deserialize_node(node_data, editor)
+        node = deserialize_node(node_data, editor, settings)
         nodes.append(node)
         id2node[node_data['id']] = node
     edges = deserialize_edges(data['edges'], id2node)
@@ -167,15 +284,223 @@ def deserialize_graph(
         data: T.Dict[str, T.Any],
         editor: "NodeEditor",
         add_to_editor: bool = True,
+        lazy: bool = False,
         ) -> "Graph":
+    """Build a graph from serialized data. With `lazy`, node items are
+    created when they come into view, see `Graph.enable_lazy_items`."""
     nodes, edges = deserialize_nodes_and_edges(data, editor)
     if add_to_editor:
         editor.add_scene_and_view()
         scene = editor.current_scene
         graph = scene.graph
+        if lazy:
+            graph.enable_lazy_items()
     else:
         from ..model.graph import Graph
         graph = Graph()
-    graph.add_nodes(*nodes)
-    graph.add_edges(*edges)
+    with graph.batch():
+        graph.add_nodes(*nodes)
+        graph.add_edges(*edges)
+    return graph
+
+
+# node type name -> callable creating a node of that type
+FactoryTable = T.Mapping[str, T.Callable[..., T.Any]]
+
+_DATA_TYPES: T.Dict[str, type] = {
+    t.__name__: t for t in (int, float, str, bool)}
+_generic_node_classes: T.Dict[T.Tuple, T.Type["core.Node"]] = {}
+
+
+def _value_key(value: T.Any) -> T.Any:
+    # JSON text, except for the common values that are their own key;
+    # bools and floats are not, as 1 == 1.0 == True
+    if value is None or type(value) is str or type(value) is int:
+        return value
+    return json.dumps(value, sort_keys=True)
+
+
+def _port_from_data(
+        data: T.Dict[str, T.Any],
+        settings: T.Optional[SettingsTable] = None,
+        ) -> "core.Port":
+    from ..core.port import Port, DataPort, StreamPort
+    setting = (settings or SettingsTable()).get(PortSetting, data['setting'])
+    if "stream_maxsize" in data:
+        return StreamPort(data['name'], data['stream_maxsize'], setting)
+    if "data_type" not in data:
+        return Port(data['name'], setting)
+    return DataPort(
+        data['name'],
+        data_type=_DATA_TYPES.get(data['data_type'], object),
+        data_range=data['data_range'],
+        data_default=data['data_default'],
+        widget_args=data['widget_args'],
+        setting=setting,
+    )
+
+
+def generic_node_class(
+        data: T.Dict[str, T.Any],
+        settings: T.Optional[SettingsTable] = None,
+        ) -> T.Type["core.Node"]:
+    """Get a core node class whose ports match the serialized node.
+
+    Classes are cached by type name and port layout, settings included,
+    so nodes of the same type share one class, also across files.
+    """
+    from ..core.node import Node
+    table = settings or SettingsTable()
+
+    def port_sig(ports: T.List[T.Dict[str, T.Any]]) -> T.Tuple:
+        return tuple(
+            (p['name'], p.get('data_type'), p.get('stream_maxsize'),
+             table.entry_key(p.get('setting')),
+             _value_key(p.get('data_range')),
+             _value_key(p.get('data_default')),
+             _value_key(p.get('widget_args')))
+            for p in ports)
+
+    key = (
+        data['type_name'],
+        port_sig(data['input_ports']),
+        port_sig(data['output_ports']),
+    )
+    cls = _generic_node_classes.get(key)
+    if cls is None:
+        cls = type(data['type_name'], (Node,), {
+            "input_ports": [
+                _port_from_data(p, settings) for p in data['input_ports']],
+            "output_ports": [
+                _port_from_data(p, settings) for p in data['output_ports']],
+        })
+        _generic_node_classes[key] = cls
+    return cls
+
+
+def load_node(
+        data: T.Dict[str, T.Any],
+        factory_table: T.Optional[FactoryTable] = None,
+        settings: T.Optional[SettingsTable] = None,
+        ) -> "core.Node":
+    """Build a headless node from serialized data.
+
+    Types found in `factory_table` are built with their factory, others
+    become instances of `generic_node_class`. Settings are looked up in
+    `settings`, the table of the serialized graph.
+    """
+    settings = settings or SettingsTable()
+    factory = (factory_table or {}).get(data['type_name'])
+    if factory is None:
+        factory = generic_node_class(data, settings)
+    node = _node_from_factory(data, factory)
+    if data.get('setting') is not None:
+        node.item_setting = settings.get(NodeItemSetting, data['setting'])
+    node.attrs = data['attrs']
+    node.uid = data['id']
+    return node
+
+
+def load_nodes_and_edges(
+        data: T.Dict[str, T.Any],
+        factory_table: T.Optional[FactoryTable] = None,
+        ) -> T.Tuple[T.List["core.Node"], T.List["core.Edge"]]:
+    nodes: T.List["core.Node"] = []
+    id2node: T.Dict[int, T.Any] = {}
+    settings = SettingsTable(data.get('settings'))
+    for node_data in data['nodes']:
+        node = load_node(node_data, factory_table, settings)
+        nodes.append(node)
+        id2node[node_data['id']] = node
+    edges = deserialize_edges(data['edges'], id2node)
+    return nodes, edges  # type: ignore
+
+
+def load_graph(
+        data: T.Dict[str, T.Any],
+        factory_table: T.Optional[FactoryTable] = None,
+        ) -> "core.Graph":
+    """Load serialized data into a headless `easynode.core.Graph`.
+
+    Does not import qtpy, so it works on machines without a Qt binding.
+    """
+    from ..core.graph import Graph
+    nodes, edges = load_nodes_and_edges(data, factory_table)
+    graph = Graph()
+    with graph.batch():
+        graph.add_nodes(*nodes)
+        graph.add_edges(*edges)
+    return graph
+
+
+def iter_graph_chunks(
+        items: T.Iterable[T.Tuple[str, T.Any]],
+        load_node: T.Callable[[T.Dict[str, T.Any]], T.Any],
+        chunk_size: int = 1000,
+        settings: T.Optional[SettingsTable] = None,
+        ) -> T.Iterator[T.Tuple[T.List[T.Any], T.List[T.Any]]]:
+    """Build nodes and edges from streamed graph items, in chunks.
+
+    Args:
+        items: `(key, value)` pairs, as yielded by `JsonGraphReader`.
+        load_node: Builds a node from its serialized data.
+        chunk_size: Number of nodes or edges per chunk.
+        settings: Table filled with the "settings" item, for
+            `load_node` to look up.
+
+    Yields:
+        Lists of new nodes and of new edges, to add to the graph in
+        this order. Edges only connect nodes of this or earlier chunks.
+
+    Raises:
+        ValueError: An edge refers to a node missing from the items.
+    """
+    id2node: T.Dict[int, T.Any] = {}
+    nodes: T.List[T.Any] = []
+    edges_data: T.List[T.Dict[str, T.Any]] = []
+    # edges read before their nodes
+    deferred: T.List[T.Dict[str, T.Any]] = []
+    for key, value in items:
+        if key == "nodes":
+            node = load_node(value)
+            id2node[value['id']] = node
+            nodes.append(node)
+        elif key == "edges":
+            if value['source']['node_id'] in id2node and \
+                    value['target']['node_id'] in id2node:
+                edges_data.append(value)
+            else:
+                deferred.append(value)
+        else:
+            if key == "settings" and settings is not None:
+                settings.entries.extend(value)
+            continue
+        if len(nodes) + len(edges_data) >= chunk_size:
+            yield nodes, deserialize_edges(edges_data, id2node)
+            nodes, edges_data = [], []
+    edges_data.extend(deferred)
+    if nodes or edges_data:
+        yield nodes, deserialize_edges(edges_data, id2node)
+
+
+def load_graph_file(
+        path: str,
+        factory_table: T.Optional[FactoryTable] = None,
+        chunk_size: int = 1000,
+        ) -> "core.Graph":
+    """Load a JSON graph file into a headless `easynode.core.Graph`,
+    without reading the whole file in memory."""
+    from ..core.graph import Graph
+    from .json_stream import JsonGraphReader
+    graph = Graph()
+    settings = SettingsTable()
+    with open(path, "rb") as f:
+        chunks = iter_graph_chunks(
+            JsonGraphReader(f),
+            lambda data: load_node(data, factory_table, settings),
+            chunk_size, settings)
+        for nodes, edges in chunks:
+            with graph.batch():
+                graph.add_nodes(*nodes)
+                graph.add_edges(*edges)
     return graph
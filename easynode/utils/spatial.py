@@ -0,0 +1,71 @@
+"""Uniform grid index of axis-aligned rectangles."""
+import typing as T
+import math
+
+
+Rect = T.Tuple[float, float, float, float]  # x0, y0, x1, y1
+
+
+class SpatialIndex:
+    """Rectangles keyed by id, bucketed in square grid cells.
+
+    Inserting, moving and removing a rectangle, and querying a region,
+    only touch the cells they overlap, so their cost does not depend
+    on the number of rectangles when these are about the cell size.
+
+    Args:
+        cell_size: Side of the grid cells, about the size of the
+            rectangles works best.
+    """
+
+    def __init__(self, cell_size: float = 256.0) -> None:
+        self.cell_size = cell_size
+        self.rects: T.Dict[int, Rect] = {}
+        self._cells: T.Dict[T.Tuple[int, int], T.Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self.rects)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self.rects
+
+    def _cell_range(self, rect: Rect) -> T.Iterator[T.Tuple[int, int]]:
+        s = self.cell_size
+        x0, y0 = math.floor(rect[0] / s), math.floor(rect[1] / s)
+        x1, y1 = math.floor(rect[2] / s), math.floor(rect[3] / s)
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                yield cx, cy
+
+    def insert(self, key: int, rect: Rect):
+        """Insert a rectangle, or move it if the key is present."""
+        if key in self.rects:
+            self.remove(key)
+        self.rects[key] = rect
+        for cell in self._cell_range(rect):
+            self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key: int):
+        rect = self.rects.pop(key)
+        for cell in self._cell_range(rect):
+            keys = self._cells[cell]
+            keys.discard(key)
+            if not keys:
+                del self._cells[cell]
+
+    def query(self, rect: Rect) -> T.Set[int]:
+        """Keys of the rectangles intersecting `rect` (touching edges do
+        not count)."""
+        found: T.Set[int] = set()
+        for cell in self._cell_range(rect):
+            keys = self._cells.get(cell)
+            if not keys:
+                continue
+            for key in keys:
+                if key in found:
+                    continue
+                r = self.rects[key]
+                if r[0] < rect[2] and rect[0] < r[2] and \
+                        r[1] < rect[3] and rect[1] < r[3]:
+                    found.add(key)
+        return found
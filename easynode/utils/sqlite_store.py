@@ -0,0 +1,363 @@
+"""Graphs stored in a SQLite database, saved by changed elements and
+loaded in parts.
+
+Tables:
+
+- `settings`: the `SettingsTable` of the database, one JSON entry per
+  row,
+- `nodes`: uid, type name, name, attrs as JSON, item setting, and
+  position (`x`, `y`, indexed, NULL without `attrs['pos']`),
+- `ports`: for each node, port type ("in" or "out") and index, the
+  serialized port as JSON and the value of data ports,
+- `edges`: uids and port indexes of both ends, indexed by source and
+  by target.
+
+This module does not import qtpy, like `serialization`.
+"""
+import typing as T
+import json
+import sqlite3
+
+from .graph_diff import ChangeSet
+from .serialization import (
+    FactoryTable, SettingsTable, load_node, serialize_node,
+)
+
+if T.TYPE_CHECKING:
+    from .. import core
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    idx INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS nodes (
+    uid INTEGER PRIMARY KEY,
+    type_name TEXT NOT NULL,
+    name TEXT NOT NULL,
+    attrs TEXT NOT NULL,
+    setting INTEGER,
+    x REAL,
+    y REAL
+);
+CREATE INDEX IF NOT EXISTS nodes_pos ON nodes (x, y);
+CREATE TABLE IF NOT EXISTS ports (
+    node INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    idx INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (node, type, idx)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS edges (
+    source INTEGER NOT NULL,
+    source_port INTEGER NOT NULL,
+    target INTEGER NOT NULL,
+    target_port INTEGER NOT NULL,
+    PRIMARY KEY (source, source_port, target, target_port)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS edges_target ON edges (target);
+"""
+
+
+class GraphStore:
+    """A graph in a SQLite database.
+
+    `write_graph` stores a whole graph, and follows its changes with a
+    `ChangeSet`. `save` then writes only the nodes and edges added,
+    removed or changed since, in one transaction. A graph loaded from
+    the database, in whole or in part, is followed with `track`.
+
+    The `load_*` methods build the nodes with `load_node`, or with the
+    `load` callable (e.g. `deserialize_node` for the editor), and add
+    them to `graph`, a new `easynode.core.Graph` by default. Nodes
+    already in `graph` are kept, so parts can be loaded one after the
+    other: the edges between a new node and a node of `graph` are
+    loaded with the new node.
+
+    Example:
+        >>> store = GraphStore("pipeline.db")
+        >>> graph = store.load_region(0, 0, 2000, 1000, factory_table)
+        >>> store.track(graph)
+        >>> ...  # edit the graph
+        >>> store.save()
+
+    Args:
+        path: Database file, or ":memory:".
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(_SCHEMA)
+        # uids of the nodes to load
+        self.conn.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS selection "
+            "(uid INTEGER PRIMARY KEY)")
+        self.settings = SettingsTable()
+        for (data,) in self.conn.execute(
+                "SELECT data FROM settings ORDER BY idx"):
+            self.settings.add_entry(json.loads(data))
+        self._saved_settings = len(self.settings.entries)
+        self.changes = ChangeSet()
+
+    def __enter__(self) -> "GraphStore":
+        return self
+
+    def __exit__(self, *exc: T.Any) -> None:
+        self.close()
+
+    def close(self):
+        self.changes.disconnect()
+        self.conn.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM nodes").fetchone()[0]
+
+    # -- saving
+
+    def track(self, graph: T.Any):
+        """Follow the changes of a graph stored in the database, for
+        `save`. Parts loaded into it afterwards are not changes."""
+        self.changes.disconnect()
+        self.changes.clear()
+        self.changes.connect(graph)
+
+    def write_graph(self, graph: T.Any):
+        """Replace the content of the database with a graph, and follow
+        its changes."""
+        with self.conn:
+            for table in ("nodes", "ports", "edges"):
+                self.conn.execute(f"DELETE FROM {table}")
+            self._write_nodes(graph.nodes)
+            self.conn.executemany(
+                "INSERT INTO edges VALUES (?, ?, ?, ?)",
+                (edge.uid for edge in graph.edges))
+            self._write_settings()
+        self.track(graph)
+
+    def save(self) -> int:
+        """Write the changes of the tracked graph since the previous save,
+        in one transaction.
+
+        Returns:
+            Number of changed nodes and edges.
+        """
+        changes = self.changes
+        count = (
+            len(changes.added_nodes) + len(changes.removed_nodes) +
+            len(changes.changed_nodes) + len(changes.added_edges) +
+            len(changes.removed_edges))
+        if not count:
+            return 0
+        removed = [(uid,) for uid in changes.removed_nodes]
+        with self.conn:
+            execute = self.conn.executemany
+            execute(
+                "DELETE FROM edges WHERE source = ? AND source_port = ? "
+                "AND target = ? AND target_port = ?", changes.removed_edges)
+            execute("DELETE FROM nodes WHERE uid = ?", removed)
+            execute("DELETE FROM ports WHERE node = ?", removed)
+            execute("DELETE FROM edges WHERE source = ?", removed)
+            execute("DELETE FROM edges WHERE target = ?", removed)
+            self._write_nodes(
+                list(changes.added_nodes.values()) +
+                list(changes.changed_nodes.values()))
+            execute(
+                "INSERT OR IGNORE INTO edges VALUES (?, ?, ?, ?)",
+                changes.added_edges)
+            self._write_settings()
+        changes.clear()
+        return count
+
+    def _write_nodes(self, nodes: T.Iterable[T.Any]):
+        node_rows = []
+        port_rows = []
+        for node in nodes:
+            data = serialize_node(node, self.settings)
+            uid = data['id']
+            attrs = dict(data['attrs'])
+            pos = attrs.pop('pos', None)
+            if isinstance(pos, (list, tuple)) and len(pos) == 2:
+                x, y = pos
+            else:
+                if pos is not None:
+                    attrs['pos'] = pos
+                x = y = None
+            node_rows.append((
+                uid, data['type_name'], data['name'], json.dumps(attrs),
+                data['setting'], x, y))
+            for key, tp in (("input_ports", "in"), ("output_ports", "out")):
+                for idx, port in enumerate(data[key]):
+                    value = (
+                        json.dumps(port.pop("widget_value"))
+                        if "widget_value" in port else None)
+                    port_rows.append((
+                        uid, tp, idx, json.dumps(port, sort_keys=True),
+                        value))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?)",
+            node_rows)
+        self.conn.executemany(
+            "DELETE FROM ports WHERE node = ?",
+            ((row[0],) for row in node_rows))
+        self.conn.executemany(
+            "INSERT INTO ports VALUES (?, ?, ?, ?, ?)", port_rows)
+
+    def _write_settings(self):
+        entries = self.settings.entries
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO settings VALUES (?, ?)",
+            ((i, json.dumps(entries[i]))
+             for i in range(self._saved_settings, len(entries))))
+        self._saved_settings = len(entries)
+
+    # -- loading
+
+    def load_graph(
+            self,
+            factory_table: T.Optional[FactoryTable] = None,
+            graph: T.Any = None,
+            load: T.Optional[T.Callable[[T.Dict[str, T.Any]], T.Any]] = None,
+            ) -> T.Any:
+        """Load the whole graph."""
+        return self._load(
+            "INSERT INTO temp.selection SELECT uid FROM nodes", (),
+            factory_table, graph, load)
+
+    def load_region(
+            self,
+            x0: float, y0: float, x1: float, y1: float,
+            factory_table: T.Optional[FactoryTable] = None,
+            graph: T.Any = None,
+            load: T.Optional[T.Callable[[T.Dict[str, T.Any]], T.Any]] = None,
+            ) -> T.Any:
+        """Load the nodes positioned in a rectangle, and the edges
+        between them."""
+        return self._load(
+            "INSERT INTO temp.selection SELECT uid FROM nodes "
+            "WHERE x BETWEEN ? AND ? AND y BETWEEN ? AND ?",
+            (x0, x1, y0, y1), factory_table, graph, load)
+
+    def load_subgraph(
+            self,
+            uids: T.Iterable[int],
+            depth: int = 0,
+            factory_table: T.Optional[FactoryTable] = None,
+            graph: T.Any = None,
+            load: T.Optional[T.Callable[[T.Dict[str, T.Any]], T.Any]] = None,
+            ) -> T.Any:
+        """Load nodes by uid, with their neighbors up to `depth` edges
+        away, and the edges between them."""
+        self.conn.execute("DELETE FROM temp.selection")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO temp.selection SELECT uid FROM nodes "
+            "WHERE uid = ?", ((uid,) for uid in uids))
+        for _ in range(depth):
+            self.conn.execute(
+                "INSERT OR IGNORE INTO temp.selection "
+                "SELECT target FROM edges JOIN temp.selection s "
+                "ON source = s.uid "
+                "UNION SELECT source FROM edges JOIN temp.selection s "
+                "ON target = s.uid")
+        return self._load(None, (), factory_table, graph, load)
+
+    def _load(
+            self,
+            select: T.Optional[str],
+            params: T.Tuple,
+            factory_table: T.Optional[FactoryTable],
+            graph: T.Any,
+            load: T.Optional[T.Callable[[T.Dict[str, T.Any]], T.Any]],
+            ) -> T.Any:
+        conn = self.conn
+        if select is not None:
+            conn.execute("DELETE FROM temp.selection")
+            conn.execute(select, params)
+        if graph is None:
+            from ..core.graph import Graph
+            graph = Graph()
+        settings = self.settings
+        build = load or (
+            lambda data: load_node(data, factory_table, settings))
+        # uid -> [input ports, output ports]
+        ports: T.Dict[int, T.Tuple[T.List[T.Any], T.List[T.Any]]] = {}
+        layouts: T.Dict[str, T.Dict[str, T.Any]] = {}
+        for uid, tp, data, value in conn.execute(
+                "SELECT node, type, data, value FROM ports "
+                "JOIN temp.selection s ON node = s.uid "
+                "ORDER BY node, type, idx"):
+            port = layouts.get(data)
+            if port is None:
+                port = layouts[data] = json.loads(data)
+            if value is not None:
+                port = dict(port, widget_value=json.loads(value))
+            if uid not in ports:
+                ports[uid] = ([], [])
+            ports[uid][0 if tp == "in" else 1].append(port)
+        nodes: T.Dict[int, T.Any] = {}
+        new_nodes = []
+        for uid, type_name, name, attrs, setting, x, y in conn.execute(
+                "SELECT n.* FROM nodes n JOIN temp.selection s "
+                "ON n.uid = s.uid"):
+            node = graph.node_by_uid(uid)
+            if node is None:
+                attrs = json.loads(attrs)
+                if x is not None:
+                    attrs['pos'] = [x, y]
+                inputs, outputs = ports.get(uid, ([], []))
+                node = build({
+                    "id": uid,
+                    "type_name": type_name,
+                    "name": name,
+                    "input_ports": inputs,
+                    "output_ports": outputs,
+                    "attrs": attrs,
+                    "setting": setting,
+                })
+                new_nodes.append(node)
+            nodes[uid] = node
+        # edges with an end in the selection, whose other end is selected
+        # too or already in the graph, e.g. loaded with another region
+        edges = []
+        for uid in conn.execute(
+                "SELECT e.* FROM edges e JOIN temp.selection s "
+                "ON e.source = s.uid "
+                "UNION SELECT e.* FROM edges e JOIN temp.selection s "
+                "ON e.target = s.uid"):
+            s_uid, s_idx, t_uid, t_idx = uid
+            source = nodes.get(s_uid) or graph.node_by_uid(s_uid)
+            target = nodes.get(t_uid) or graph.node_by_uid(t_uid)
+            if source is None or target is None or \
+                    graph.edge_by_uid(uid) is not None:
+                continue
+            edges.append(source.create_edge(target, s_idx, t_idx))
+        # the loaded elements are already stored, not changes to save
+        tracked = self.changes.graph is graph
+        if tracked:
+            self.changes.disconnect()
+        try:
+            with graph.batch():
+                graph.add_nodes(*new_nodes)
+                graph.add_edges(*edges)
+        finally:
+            if tracked:
+                self.changes.connect(graph)
+        return graph
+
+
+def save_graph_sqlite(graph: T.Any, path: str):
+    """Write a whole graph to a SQLite database file."""
+    with GraphStore(path) as store:
+        store.write_graph(graph)
+
+
+def load_graph_sqlite(
+        path: str,
+        factory_table: T.Optional[FactoryTable] = None,
+        ) -> "core.Graph":
+    """Load a whole graph from a SQLite database file into a headless
+    `easynode.core.Graph`."""
+    with GraphStore(path) as store:
+        return store.load_graph(factory_table)
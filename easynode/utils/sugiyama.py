@@ -0,0 +1,345 @@
+"""Layered (Sugiyama-style) graph layout.
+
+1. Layering: longest-path levels, with cycles broken (`compute_levels`).
+2. Edges spanning several levels are split by dummy nodes.
+3. Crossing reduction: barycenter or median sweeps, level by level.
+4. Coordinate assignment: nodes are pulled towards their neighbors,
+   then packed without overlaps.
+
+The steps after layering work on NumPy arrays, one level at a time.
+"""
+import typing as T
+
+import numpy as np
+
+from .layout import GraphSnapshot, Progress, levels_from_edges
+
+if T.TYPE_CHECKING:
+    from ..core import NodeBase
+
+
+class _Layers:
+    """Nodes (real and dummy) of each level, and the edge segments
+    between consecutive levels."""
+
+    def __init__(
+            self, level: np.ndarray,
+            src: np.ndarray, dst: np.ndarray,
+            src_frac: np.ndarray, dst_frac: np.ndarray) -> None:
+        self.level = level
+        self.n_levels = int(level.max()) + 1 if len(level) else 0
+        # members of each level, in the initial order
+        order = np.argsort(level, kind="stable")
+        bounds = np.searchsorted(level[order], np.arange(self.n_levels + 1))
+        self.members = [
+            order[bounds[i]:bounds[i + 1]] for i in range(self.n_levels)]
+        self.local = np.empty(len(level), dtype=np.int64)
+        for members in self.members:
+            self.local[members] = np.arange(len(members))
+        self.src, self.dst = src, dst
+        self.src_frac, self.dst_frac = src_frac, dst_frac
+        # segments grouped by the level of their target / source
+        self.into = self._group(level[dst]) if len(dst) else None
+        self.out_of = self._group(level[src]) if len(src) else None
+
+    def _group(self, seg_level: np.ndarray) -> T.List[np.ndarray]:
+        order = np.argsort(seg_level, kind="stable")
+        bounds = np.searchsorted(
+            seg_level[order], np.arange(self.n_levels + 1))
+        return [
+            order[bounds[i]:bounds[i + 1]] for i in range(self.n_levels)]
+
+    def neighbors(
+            self, lvl: int, down: bool,
+            ) -> T.Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Segments reaching level `lvl` from the previous level (down)
+        or from the next one: local index of the node in `lvl`, the
+        neighbor, and the port offset on the neighbor's side."""
+        if down:
+            if self.into is None:
+                empty = np.empty(0, dtype=np.int64)
+                return empty, empty, np.empty(0)
+            seg = self.into[lvl]
+            return self.local[self.dst[seg]], self.src[seg], \
+                self.src_frac[seg]
+        if self.out_of is None:
+            empty = np.empty(0, dtype=np.int64)
+            return empty, empty, np.empty(0)
+        seg = self.out_of[lvl]
+        return self.local[self.src[seg]], self.dst[seg], self.dst_frac[seg]
+
+
+def _split_long_edges(
+        level: np.ndarray, src: np.ndarray, dst: np.ndarray,
+        src_frac: np.ndarray, dst_frac: np.ndarray,
+        ) -> T.Tuple[np.ndarray, ...]:
+    """Replace edges spanning k > 1 levels by k segments through k - 1
+    dummy nodes, appended after the real nodes."""
+    n = len(level)
+    span = level[dst] - level[src]
+    n_dummy_per_edge = span - 1
+    first_dummy = n + np.cumsum(n_dummy_per_edge) - n_dummy_per_edge
+    n_dummy = int(n_dummy_per_edge.sum())
+    # segment j of edge k goes from chain node j to chain node j + 1,
+    # chain node 0 being the source and chain node span[k] the target
+    edge = np.repeat(np.arange(len(span)), span)
+    seg_start = np.cumsum(span) - span
+    j = np.arange(len(edge)) - np.repeat(seg_start, span)
+    last = j == span[edge] - 1
+    seg_src = np.where(j == 0, src[edge], first_dummy[edge] + j - 1)
+    seg_dst = np.where(last, dst[edge], first_dummy[edge] + j)
+    seg_src_frac = np.where(j == 0, src_frac[edge], 0.5)
+    seg_dst_frac = np.where(last, dst_frac[edge], 0.5)
+    dummy_edge = np.repeat(np.arange(len(span)), n_dummy_per_edge)
+    dummy_j = np.arange(n_dummy) - np.repeat(
+        first_dummy - n, n_dummy_per_edge)
+    dummy_level = level[src[dummy_edge]] + 1 + dummy_j
+    return (
+        np.concatenate((level, dummy_level)),
+        seg_src, seg_dst, seg_src_frac, seg_dst_frac,
+    )
+
+
+def _sweep_order(
+        layers: _Layers, pos: np.ndarray, down: bool, method: str):
+    levels = range(1, layers.n_levels) if down else \
+        range(layers.n_levels - 2, -1, -1)
+    for lvl in levels:
+        members = layers.members[lvl]
+        local, other, frac = layers.neighbors(lvl, down)
+        if len(local) == 0:
+            continue
+        # rank of the neighbor, plus the port offset to order edges
+        # that leave the same node
+        values = pos[other] + frac
+        count = np.bincount(local, minlength=len(members))
+        key = pos[members].astype(np.float64)
+        has = count > 0
+        if method == "median":
+            order = np.lexsort((values, local))
+            sorted_vals = values[order]
+            start = np.concatenate(([0], np.cumsum(count)[:-1]))
+            lo = start + (count - 1) // 2
+            hi = start + count // 2
+            med = (sorted_vals[np.minimum(lo, len(values) - 1)] +
+                   sorted_vals[np.minimum(hi, len(values) - 1)]) / 2
+            key[has] = med[has]
+        else:
+            total = np.bincount(local, weights=values, minlength=len(members))
+            key[has] = total[has] / count[has]
+        new_order = np.argsort(key, kind="stable")
+        layers.members[lvl] = members = members[new_order]
+        pos[members] = np.arange(len(members))
+        layers.local[members] = np.arange(len(members))
+
+
+def _inversions(r: np.ndarray) -> int:
+    """Number of pairs i < j with r[i] > r[j], by a bottom-up merge
+    sort where each pass merges all pairs of blocks at once."""
+    m = len(r)
+    if m < 2:
+        return 0
+    big = int(r.max()) + 1
+    idx = np.arange(m)
+    arr = r.astype(np.int64)
+    total = 0
+    width = 1
+    while width < m:
+        pair_start = idx // (2 * width) * (2 * width)
+        right = idx - pair_start >= width
+        # a stable sort merges the sorted blocks, left before right on
+        # ties; timsort does it in linear time per pass
+        order = np.argsort(pair_start * big + arr, kind="stable")
+        merged_pos = np.empty(m, dtype=np.int64)
+        merged_pos[order] = idx
+        # left elements merged before each right element, the others
+        # are greater and form inversions with it
+        offset_in_right = idx - pair_start - width
+        left_before = merged_pos - pair_start - offset_in_right
+        left_len = np.minimum(width, m - pair_start)
+        total += int((left_len - left_before)[right].sum())
+        arr = arr[order]
+        width *= 2
+    return total
+
+
+def _count_crossings(layers: _Layers, pos: np.ndarray) -> int:
+    """Crossings between the segments of all pairs of adjacent levels."""
+    if len(layers.src) < 2:
+        return 0
+    stride = float(pos.max()) + 2
+    offset = layers.level[layers.src] * stride
+    a = offset + pos[layers.src] + layers.src_frac
+    b = offset + pos[layers.dst] + layers.dst_frac
+    order = np.lexsort((b, a))
+    _, ranks = np.unique(b[order], return_inverse=True)
+    return _inversions(ranks)
+
+
+def _pack(target: np.ndarray, gap: np.ndarray) -> np.ndarray:
+    """Closest positions to `target` (in order) with at least `gap[i]`
+    between node i - 1 and node i; the average of a forward and a
+    backward pass."""
+    offset = np.cumsum(gap)
+    forward = np.maximum.accumulate(target - offset) + offset
+    backward = np.minimum.accumulate((target - offset)[::-1])[::-1] + offset
+    return (forward + backward) / 2
+
+
+def _assign_coordinates(
+        layers: _Layers, size: np.ndarray, padding: float,
+        iterations: int) -> np.ndarray:
+    """Centers of the nodes along the level axis."""
+    center = np.zeros(len(layers.level))
+    gaps = []
+    for members in layers.members:
+        s = size[members]
+        gap = np.concatenate(([0.0], (s[:-1] + s[1:]) / 2 + padding))
+        gaps.append(gap)
+        center[members] = np.cumsum(gap)
+    for it in range(iterations):
+        down = it % 2 == 0
+        levels = range(layers.n_levels) if down else \
+            range(layers.n_levels - 1, -1, -1)
+        for lvl in levels:
+            members = layers.members[lvl]
+            total = np.zeros(len(members))
+            count = np.zeros(len(members))
+            for d in (True, False):
+                local, other, _ = layers.neighbors(lvl, d)
+                total += np.bincount(
+                    local, weights=center[other], minlength=len(members))
+                count += np.bincount(local, minlength=len(members))
+            target = center[members].copy()
+            has = count > 0
+            target[has] = total[has] / count[has]
+            center[members] = _pack(target, gaps[lvl])
+    return center
+
+
+def sugiyama_layout(
+        nodes: T.Sequence["NodeBase"],
+        sizes: T.Mapping[int, T.Tuple[float, float]],
+        direction: str = "LR",
+        padding_level: float = 100.0,
+        padding_node: float = 20.0,
+        start_pos: T.Tuple[float, float] = (10.0, 10.0),
+        method: str = "barycenter",
+        sweeps: int = 4,
+        iterations: int = 8,
+        ) -> T.Dict[int, T.Tuple[float, float]]:
+    """Layered layout minimizing edge crossings.
+
+    Args:
+        nodes: Nodes to place, only the edges between them are used.
+        sizes: (width, height) of each node, keyed by node id.
+        direction: "LR" or "TB".
+        padding_level: Space between levels.
+        padding_node: Space between nodes of a level.
+        start_pos: Top-left corner of the layout.
+        method: Crossing reduction heuristic, "barycenter" or "median".
+        sweeps: Maximum number of down and up sweep rounds, stops
+            early once a round removes no crossing.
+        iterations: Number of coordinate assignment passes.
+
+    Returns:
+        Top-left position of each node, keyed by node id.
+    """
+    return sugiyama_positions(
+        GraphSnapshot.from_nodes(list(nodes), sizes), direction=direction,
+        padding_level=padding_level, padding_node=padding_node,
+        start_pos=start_pos, method=method, sweeps=sweeps,
+        iterations=iterations)
+
+
+def sugiyama_positions(
+        snap: GraphSnapshot,
+        direction: str = "LR",
+        padding_level: float = 100.0,
+        padding_node: float = 20.0,
+        start_pos: T.Tuple[float, float] = (10.0, 10.0),
+        method: str = "barycenter",
+        sweeps: int = 4,
+        iterations: int = 8,
+        progress: T.Optional[Progress] = None,
+        ) -> T.Dict[int, T.Tuple[float, float]]:
+    """`sugiyama_layout` on a snapshot, reporting its progress."""
+    if len(snap) == 0:
+        return {}
+    report = progress or (lambda fraction: None)
+    levels, _ = levels_from_edges(snap.ids, snap.out)
+    src_l, dst_l, src_f, dst_f = [], [], [], []
+    for s, targets in enumerate(snap.out):
+        n_out = snap.n_outputs[s] + 1
+        for t, (s_port, t_port) in targets:
+            if levels[s] == levels[t]:
+                continue  # a self loop, or between nodes of one level
+            s_frac = (s_port + 0.5) / n_out
+            t_frac = (t_port + 0.5) / (snap.n_inputs[t] + 1)
+            if levels[s] > levels[t]:  # feedback edges point backwards
+                src_l.append(t)
+                dst_l.append(s)
+                src_f.append(t_frac)
+                dst_f.append(s_frac)
+            else:
+                src_l.append(s)
+                dst_l.append(t)
+                src_f.append(s_frac)
+                dst_f.append(t_frac)
+    level = np.array(levels, dtype=np.int64)
+    level, src, dst, src_frac, dst_frac = _split_long_edges(
+        level,
+        np.array(src_l, dtype=np.int64), np.array(dst_l, dtype=np.int64),
+        np.array(src_f, dtype=np.float64), np.array(dst_f, dtype=np.float64),
+    )
+    layers = _Layers(level, src, dst, src_frac, dst_frac)
+    report(0.1)
+    pos = np.empty(len(level), dtype=np.int64)
+    for members in layers.members:
+        pos[members] = np.arange(len(members))
+    # an up sweep can undo what the down sweep achieved, keep the best
+    best = _count_crossings(layers, pos)
+    best_members = list(layers.members)
+    for i in range(sweeps):
+        if best == 0:
+            break
+        improved = False
+        for down in (True, False):
+            _sweep_order(layers, pos, down, method)
+            crossings = _count_crossings(layers, pos)
+            if crossings < best:
+                best = crossings
+                best_members = list(layers.members)
+                improved = True
+        report(0.1 + 0.7 * (i + 1) / sweeps)
+        if not improved:
+            break
+    layers.members = best_members
+    for members in best_members:
+        pos[members] = np.arange(len(members))
+        layers.local[members] = np.arange(len(members))
+
+    report(0.8)
+    n = len(snap)
+    wh = np.array(snap.sizes, dtype=np.float64)
+    # size along the level axis, and across it
+    along = wh[:, 0] if direction != "TB" else wh[:, 1]
+    across = np.zeros(len(level))
+    across[:n] = wh[:, 1] if direction != "TB" else wh[:, 0]
+    center = _assign_coordinates(layers, across, padding_node, iterations)
+    # levels are as thick as their thickest node
+    thickness = np.zeros(layers.n_levels)
+    np.maximum.at(thickness, level[:n], along)
+    level_start = np.concatenate(
+        ([0.0], np.cumsum(thickness + padding_level)[:-1]))
+    a = level_start[level[:n]]
+    b = center[:n] - across[:n] / 2
+    b -= b.min()
+    if direction == "TB":
+        xs, ys = b + start_pos[0], a + start_pos[1]
+    else:
+        xs, ys = a + start_pos[0], b + start_pos[1]
+    return {
+        node_id: (float(xs[i]), float(ys[i]))
+        for i, node_id in enumerate(snap.ids)
+    }
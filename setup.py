@@ -40,6 +40,7 @@ def get_install_requires():
         "qtpy",
         "pyqtdarktheme",
         "textdistance",
+        "numpy",
     ]
     return requirements
 
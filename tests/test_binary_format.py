@@ -0,0 +1,122 @@
+import unittest
+
+from easynode.core import Graph, Node, Port, DataPort, StreamPort
+from easynode.setting import NodeItemSetting, PortSetting
+from easynode.utils.binary_format import (
+    COMPRESSIONS, BinaryGraphData, dump_graph_binary, is_binary_graph,
+    load_graph_binary,
+)
+
+
+class Source(Node):
+    input_ports = [
+        DataPort(name="value", data_type=int, data_range=[0, 10]),
+        Port(name="in", setting=PortSetting(height=30)),
+    ]
+    output_ports = [Port(name="out"), StreamPort(name="chunks", maxsize=4)]
+
+
+class Sink(Node):
+    input_ports = [Port(name="a"), Port(name="b")]
+    output_ports = []
+
+    def __init__(self, name=None, **attrs):
+        super().__init__(name, **attrs)
+        self.custom = True
+
+
+def build() -> Graph:
+    graph = Graph()
+    sources = [Source() for _ in range(5)]
+    sink = Sink(name="sink", color="red")
+    for i, node in enumerate(sources):
+        node.attrs['pos'] = [10.0 * i, -2.5]
+        node.input_ports[0].value = i % 2
+    sources[0].item_setting = NodeItemSetting(title_color="#ff0000")
+    graph.add_nodes(*sources, sink)
+    graph.add_edges(
+        sources[0].create_edge(sources[1], 0, 1),
+        sources[1].create_edge(sink, 0, 0),
+        sources[2].create_edge(sink, 0, 1))
+    return graph
+
+
+def summary(graph: Graph) -> tuple:
+    return (
+        [(n.uid, n.type_name(), n.name, n.attrs,
+          [getattr(p, "value", None) for p in n.input_ports],
+          n.item_setting)
+         for n in graph.nodes],
+        sorted(e.uid for e in graph.edges),
+    )
+
+
+def port_class(**port_args) -> type:
+    class Foo(Node):
+        input_ports = [DataPort(name="x", **port_args)]
+        output_ports = []
+    return Foo
+
+
+class TestBinaryFormat(unittest.TestCase):
+    def test_round_trip(self):
+        graph = build()
+        factories = {"Source": Source, "Sink": Sink}
+        for compression in COMPRESSIONS:
+            blob = graph.serialize_binary(compression)
+            self.assertTrue(is_binary_graph(blob))
+            loaded = load_graph_binary(blob, factories)
+            self.assertEqual(summary(loaded), summary(graph))
+            sink = loaded.node_by_uid(graph.nodes[-1].uid)
+            self.assertTrue(sink.custom)
+            source = loaded.nodes[0]
+            self.assertIsInstance(source, Source)
+            self.assertEqual(source.input_ports[1].setting.height, 30)
+            self.assertEqual(source.output_ports[1].maxsize, 4)
+
+    def test_generic_nodes(self):
+        graph = build()
+        loaded = load_graph_binary(graph.serialize_binary())
+        self.assertEqual(summary(loaded), summary(graph))
+        port = loaded.nodes[0].input_ports[0]
+        self.assertEqual(port.data_range, [0, 10])
+        self.assertIs(port.data_type, int)
+
+    def test_layouts_keyed_by_value(self):
+        # ports of different classes with equal attributes share a
+        # layout, ports with attributes equal in Python but saved
+        # differently do not
+        classes = [
+            port_class(data_default=1),
+            port_class(data_default=1),
+            port_class(data_default=True),
+            port_class(data_default=1.0),
+            port_class(data_range=[0, 1]),
+            port_class(data_range=[0, 1]),
+            port_class(data_range=[0, 1.0]),
+        ]
+        graph = Graph()
+        graph.add_nodes(*[cls() for cls in classes])
+        data = BinaryGraphData(graph.serialize_binary())
+        self.assertEqual(len(set(data.nodes['ports'])), 5)
+        ports = [n.input_ports[0] for n in load_graph_binary(
+            graph.serialize_binary()).nodes]
+        self.assertEqual(
+            [(type(p.data_default), p.data_range) for p in ports],
+            [(int, None), (int, None), (bool, None), (float, None),
+             (type(None), [0, 1]), (type(None), [0, 1]),
+             (type(None), [0, 1.0])])
+        self.assertIs(type(ports[6].data_range[1]), float)
+
+    def test_bad_data(self):
+        blob = build().serialize_binary()
+        with self.assertRaises(ValueError):
+            load_graph_binary(blob[:4])
+        with self.assertRaises(ValueError):
+            load_graph_binary(b"XXXX" + blob[4:])
+        with self.assertRaises(ValueError):
+            dump_graph_binary([], [], "zip")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+import unittest
+
+import numpy as np
+
+from easynode.core import Graph, Node, Port, DataPort
+from easynode.execution import GraphExecutor, ResultCache
+from easynode.execution.cache import node_key, sizeof
+
+
+class Value(Node):
+    input_ports = [DataPort(name="x", data_type=int, data_default=1)]
+    output_ports = [Port(name="out")]
+
+    def process(self, x):
+        return x
+
+
+class Noise(Node):
+    cacheable = False
+    input_ports = [Port(name="x")]
+    output_ports = [Port(name="out")]
+
+    def process(self, x):
+        return x
+
+
+class Inc(Node):
+    input_ports = [Port(name="x")]
+    output_ports = [Port(name="out")]
+
+    def process(self, x):
+        return x + 1
+
+
+class TestResultCache(unittest.TestCase):
+    def test_least_recently_used(self):
+        cache = ResultCache(max_entries=2)
+        cache.put("a", (1,))
+        cache.put("b", (2,))
+        self.assertEqual(cache.get("a"), (1,))
+        cache.put("c", (3,))
+        self.assertIn("a", cache)
+        self.assertNotIn("b", cache)
+        self.assertEqual(cache.stats.evictions, 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 1))
+        self.assertEqual(cache.stats.hit_rate, 0.5)
+
+    def test_max_bytes(self):
+        cache = ResultCache(max_bytes=20000)
+        cache.put("a", (np.zeros(1000),))
+        cache.put("b", (np.zeros(1000),))
+        self.assertEqual(cache.nbytes, 2 * sizeof((np.zeros(1000),)))
+        cache.put("c", (np.zeros(1000),))
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("a", cache)
+        # larger than the whole cache: not stored, nothing evicted
+        cache.put("d", (np.zeros(5000),))
+        self.assertEqual(len(cache), 2)
+        self.assertNotIn("d", cache)
+
+    def test_overwrite(self):
+        cache = ResultCache()
+        cache.put("a", (np.zeros(10),))
+        cache.put("a", (np.zeros(100),))
+        self.assertEqual(cache.nbytes, sizeof((np.zeros(100),)))
+        cache.clear()
+        self.assertEqual((len(cache), cache.nbytes), (0, 0))
+
+    def test_node_key(self):
+        node = Value()
+        key = node_key(node, [1])
+        self.assertEqual(node_key(node, [1]), key)
+        self.assertNotEqual(node_key(node, [2]), key)
+        node.attrs['pos'] = [1.0, 2.0]
+        self.assertEqual(node_key(node, [1]), key)
+        node.attrs['mode'] = "fast"
+        self.assertNotEqual(node_key(node, [1]), key)
+        self.assertIsNone(node_key(node, [lambda: 0]))
+
+
+class TestExecutorCache(unittest.TestCase):
+    def setUp(self):
+        self.graph = Graph()
+        self.cache = ResultCache()
+
+    def run_graph(self):
+        with GraphExecutor(self.graph, cache=self.cache) as executor:
+            return executor.run(timeout=10)
+
+    def test_unchanged_nodes_are_not_run(self):
+        value, inc = Value(), Inc()
+        self.graph.add_nodes(value, inc)
+        self.graph.add_edge(value.create_edge(inc, 0, 0))
+        self.assertEqual(self.run_graph().cached, [])
+        result = self.run_graph()
+        self.assertEqual(set(result.cached), {value, inc})
+        self.assertEqual(result.outputs[inc.id], (2,))
+        value.input_ports[0].value = 5
+        result = self.run_graph()
+        self.assertEqual(result.cached, [])
+        self.assertEqual(result.outputs[inc.id], (6,))
+
+    def test_not_cacheable_and_downstream(self):
+        value, noise, inc = Value(), Noise(), Inc()
+        self.graph.add_nodes(value, noise, inc)
+        self.graph.add_edges(
+            value.create_edge(noise, 0, 0), noise.create_edge(inc, 0, 0))
+        self.run_graph()
+        result = self.run_graph()
+        self.assertEqual(result.cached, [value])
+        self.assertEqual(len(self.cache), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
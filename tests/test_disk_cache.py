@@ -0,0 +1,101 @@
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+import numpy as np
+
+from easynode.execution import DiskCache
+
+
+class BadReduce:
+    def __reduce__(self):
+        raise ValueError("can not be pickled")
+
+
+def nested(depth: int) -> list:
+    value: list = []
+    for _ in range(depth):
+        value = [value]
+    return value
+
+
+class TestDiskCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_round_trip(self):
+        cache = DiskCache(self.directory)
+        array = np.arange(1000, dtype=np.float64)
+        cache.put("ab01", (array, "text", {"k": 1}))
+        outputs = cache.get("ab01")
+        np.testing.assert_array_equal(outputs[0], array)
+        self.assertFalse(outputs[0].flags.writeable)
+        self.assertEqual(outputs[1:], ("text", {"k": 1}))
+        self.assertIsNone(cache.get("cd02"))
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (1, 1))
+        # shared with a later session
+        self.assertIn("ab01", DiskCache(self.directory))
+
+    def test_overwrite_counts_the_difference(self):
+        cache = DiskCache(self.directory)
+        cache.put("ab01", (b"x" * 1000,))
+        size = cache.nbytes
+        for _ in range(5):
+            cache.put("ab01", (b"x" * 1000,))
+        self.assertEqual(cache.nbytes, size)
+        cache.put("ab01", (b"x" * 100,))
+        self.assertLess(cache.nbytes, size)
+        self.assertEqual(cache.nbytes, DiskCache(self.directory).nbytes)
+
+    def test_overwrite_does_not_evict(self):
+        cache = DiskCache(self.directory, max_bytes=4096)
+        cache.put("ab01", (b"x" * 1000,))
+        cache.put("cd02", (b"y" * 1000,))
+        for _ in range(10):
+            cache.put("cd02", (b"y" * 1000,))
+        self.assertEqual(cache.stats.evictions, 0)
+        self.assertEqual(len(cache), 2)
+
+    def test_evicts_least_recently_used(self):
+        cache = DiskCache(self.directory, max_bytes=2500)
+        cache.put("aa01", (b"a" * 1000,))
+        cache.put("bb02", (b"b" * 1000,))
+        old = time.time() - 100
+        os.utime(cache._path("aa01"), (old, old))
+        os.utime(cache._path("bb02"), (old + 1, old + 1))
+        cache.get("aa01")
+        cache.put("cc03", (b"c" * 1000,))
+        self.assertIn("aa01", cache)
+        self.assertNotIn("bb02", cache)
+        self.assertIn("cc03", cache)
+        self.assertEqual(cache.stats.evictions, 1)
+
+    def test_not_picklable(self):
+        cache = DiskCache(self.directory)
+        cache.put("ab01", (lambda: 0,))
+        cache.put("ab02", (BadReduce(),))
+        cache.put("ab03", (nested(100000),))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.nbytes, 0)
+        self.assertEqual(os.listdir(os.path.join(self.directory, "ab")), [])
+
+    def test_truncated_entry(self):
+        cache = DiskCache(self.directory)
+        cache.put("ab01", (1,))
+        with open(cache._path("ab01"), "r+b") as f:
+            f.truncate(8)
+        self.assertIsNone(cache.get("ab01"))
+        self.assertNotIn("ab01", cache)
+
+    def test_clear(self):
+        cache = DiskCache(self.directory)
+        cache.put("ab01", (1,))
+        cache.clear()
+        self.assertEqual((len(cache), cache.nbytes), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
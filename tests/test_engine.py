@@ -0,0 +1,245 @@
+import threading
+import unittest
+from concurrent.futures import Future
+
+from easynode.core import Graph, Node, Port, DataPort
+from easynode.execution import Backend, GraphExecutor, ResultCache
+from easynode.execution.backends import normalize_outputs
+
+
+class Value(Node):
+    input_ports = [DataPort(name="x", data_type=int, data_default=1)]
+    output_ports = [Port(name="out")]
+
+    def process(self, x):
+        return x
+
+
+class Add(Node):
+    input_ports = [Port(name="a"), Port(name="b")]
+    output_ports = [Port(name="out")]
+
+    def process(self, a, b):
+        return a + b
+
+
+class Inc(Node):
+    input_ports = [Port(name="x")]
+    output_ports = [Port(name="out")]
+
+    def process(self, x):
+        return x + 1
+
+
+class Fail(Node):
+    input_ports = [Port(name="x")]
+    output_ports = [Port(name="out")]
+
+    def process(self, x):
+        raise RuntimeError("failed")
+
+
+class Pair(Node):
+    output_ports = [Port(name="a"), Port(name="b")]
+
+    def process(self):
+        return 1, 2, 3
+
+
+def connect(graph, source, target, s_idx=0, t_idx=0):
+    graph.add_edge(source.create_edge(target, s_idx, t_idx))
+
+
+def chain(graph, first, n):
+    nodes = [first]
+    for _ in range(n):
+        node = Inc()
+        graph.add_node(node)
+        connect(graph, nodes[-1], node)
+        nodes.append(node)
+    return nodes
+
+
+class Counted(Node):
+    input_ports = [Port(name="x")]
+    output_ports = [Port(name="out")]
+    runs: list = []
+
+    def process(self, x):
+        Counted.runs.append(self)
+        if x is None:
+            return 0
+        if self.attrs.get('fail'):
+            raise RuntimeError("failed")
+        return x + 1
+
+
+class InlineBackend(Backend):
+    """Runs the nodes on the calling thread, the futures are done when
+    returned."""
+
+    def submit(self, node, inputs):
+        future = Future()
+        future.set_result(normalize_outputs(node, node.process(*inputs)))
+        return future
+
+
+class BrokenCache(ResultCache):
+    def put(self, key, outputs):
+        raise OSError("disk full")
+
+
+class TestGraphExecutor(unittest.TestCase):
+    def setUp(self):
+        self.graph = Graph()
+
+    def run_graph(self, **kwargs):
+        with GraphExecutor(self.graph, max_workers=4, **kwargs) as executor:
+            return executor.run(timeout=10)
+
+    def test_diamond(self):
+        a, b, c, d = Value(), Inc(), Inc(), Add()
+        a.input_ports[0].value = 5
+        self.graph.add_nodes(a, b, c, d)
+        connect(self.graph, a, b)
+        connect(self.graph, a, c)
+        connect(self.graph, b, d, 0, 0)
+        connect(self.graph, c, d, 0, 1)
+        result = self.run_graph()
+        self.assertTrue(result.ok)
+        self.assertEqual(result.outputs[d.id], (12,))
+        self.assertEqual(
+            {n.status for n in self.graph.nodes}, {"normal"})
+
+    def test_error_skips_downstream(self):
+        a, fail, after, other = Value(), Fail(), Inc(), Inc()
+        self.graph.add_nodes(a, fail, after, other)
+        connect(self.graph, a, fail)
+        connect(self.graph, fail, after)
+        connect(self.graph, a, other)
+        result = self.run_graph()
+        self.assertFalse(result.ok)
+        self.assertIsInstance(result.errors[fail.id], RuntimeError)
+        self.assertEqual(result.skipped, [after])
+        self.assertEqual(result.outputs[other.id], (2,))
+        self.assertEqual(fail.status, "error")
+
+    def test_wrong_number_of_outputs(self):
+        node = Pair()
+        self.graph.add_node(node)
+        result = self.run_graph()
+        self.assertIsInstance(result.errors[node.id], ValueError)
+
+    def test_cycle(self):
+        a, b = Inc(), Inc()
+        self.graph.add_nodes(a, b)
+        connect(self.graph, a, b)
+        connect(self.graph, b, a)
+        with GraphExecutor(self.graph) as executor:
+            with self.assertRaises(ValueError):
+                executor.run(timeout=10)
+
+    def test_unknown_affinity(self):
+        node = Value()
+        node.affinity = "gpu"
+        self.graph.add_node(node)
+        result = self.run_graph()
+        self.assertIsInstance(result.errors[node.id], ValueError)
+
+    def test_callback_error_fails_the_run(self):
+        a = Value()
+        self.graph.add_node(a)
+        chain(self.graph, a, 3)
+        with GraphExecutor(self.graph, cache=BrokenCache()) as executor:
+            with self.assertRaises(OSError):
+                executor.run(timeout=10)
+
+    def test_long_chain_of_done_futures(self):
+        a = Value()
+        self.graph.add_node(a)
+        nodes = chain(self.graph, a, 5000)
+        with GraphExecutor(self.graph) as executor:
+            executor.backends["thread"] = InlineBackend()
+            result = executor.run(timeout=30)
+        self.assertEqual(result.outputs[nodes[-1].id], (5001,))
+
+    def test_long_chain_of_cache_hits(self):
+        a = Value()
+        self.graph.add_node(a)
+        nodes = chain(self.graph, a, 3000)
+        cache = ResultCache(max_entries=10000)
+        self.run_graph(cache=cache)
+        result = self.run_graph(cache=cache)
+        self.assertEqual(len(result.cached), len(nodes))
+        self.assertEqual(result.outputs[nodes[-1].id], (3001,))
+
+    def test_parallel_branches(self):
+        barrier = threading.Barrier(3, timeout=5)
+
+        class Wait(Node):
+            output_ports = [Port(name="out")]
+
+            def process(self):
+                barrier.wait()
+                return 0
+
+        self.graph.add_nodes(Wait(), Wait(), Wait())
+        self.assertTrue(self.run_graph().ok)
+
+
+class TestDirtyRuns(unittest.TestCase):
+    def setUp(self):
+        Counted.runs = []
+        self.graph = Graph()
+        # a -> b -> c, a -> d
+        self.a, self.b, self.c, self.d = nodes = [
+            Counted(name) for name in "abcd"]
+        self.graph.add_nodes(*nodes)
+        connect(self.graph, self.a, self.b)
+        connect(self.graph, self.b, self.c)
+        connect(self.graph, self.a, self.d)
+        self.executor = GraphExecutor(self.graph)
+        self.addCleanup(self.executor.close)
+        self.executor.run(timeout=10)
+        Counted.runs = []
+
+    def test_runs_the_downstream_cone(self):
+        self.executor.mark_dirty(self.b)
+        self.assertEqual(
+            set(self.executor.dirty_nodes), {self.b, self.c})
+        result = self.executor.run_dirty(timeout=10)
+        self.assertEqual(sorted(n.name for n in Counted.runs), ["b", "c"])
+        self.assertEqual(result.outputs[self.c.id], (2,))
+        self.assertEqual(self.executor.dirty_nodes, [])
+
+    def test_edge_changes_mark_the_target(self):
+        e = Counted("e")
+        self.graph.add_node(e)
+        self.assertEqual(self.executor.dirty_nodes, [e])
+        connect(self.graph, self.c, e)
+        self.executor.run_dirty(timeout=10)
+        self.assertEqual([n.name for n in Counted.runs], ["e"])
+        self.assertEqual(self.executor.outputs[e.id], (3,))
+        Counted.runs = []
+        self.graph.remove_edge(next(iter(e.input_ports[0].edges)))
+        self.executor.run_dirty(timeout=10)
+        self.assertEqual([n.name for n in Counted.runs], ["e"])
+        self.assertEqual(self.executor.outputs[e.id], (0,))
+
+    def test_failed_nodes_stay_dirty(self):
+        self.b.attrs['fail'] = True
+        self.executor.mark_dirty(self.b)
+        result = self.executor.run_dirty(timeout=10)
+        self.assertIn(self.b.id, result.errors)
+        self.assertEqual(result.skipped, [self.c])
+        self.assertEqual(
+            set(self.executor.dirty_nodes), {self.b, self.c})
+        del self.b.attrs['fail']
+        Counted.runs = []
+        self.executor.run_dirty(timeout=10)
+        self.assertEqual(sorted(n.name for n in Counted.runs), ["b", "c"])
+        self.assertEqual(self.executor.dirty_nodes, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
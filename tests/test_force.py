@@ -0,0 +1,118 @@
+import unittest
+
+import numpy as np
+
+from easynode.core import Node, Port
+from easynode.utils.force import _QuadTree, force_layout
+
+
+class Step(Node):
+    input_ports = [Port(name="in")]
+    output_ports = [Port(name="out")]
+
+
+def connect(source, target):
+    edge = source.create_edge(target, 0, 0)
+    edge.source_port.on_edge_added(edge)
+    edge.target_port.on_edge_added(edge)
+
+
+def layout(nodes, **kwargs):
+    sizes = {n.id: (100.0, 40.0) for n in nodes}
+    return force_layout(nodes, sizes, **kwargs)
+
+
+def pairwise_repulsion(pos, radius, k):
+    delta = pos[:, None, :] - pos[None, :, :]
+    dist = np.hypot(delta[..., 0], delta[..., 1])
+    gap = np.maximum(dist - radius[:, None] - radius[None, :], 0.01 * k)
+    scale = k * k / (gap * np.maximum(dist, 1e-9))
+    np.fill_diagonal(scale, 0.0)
+    return (delta * scale[..., None]).sum(axis=1)
+
+
+class TestQuadTree(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.pos = rng.uniform(0, 2000, (300, 2))
+        self.radius = rng.uniform(5, 20, 300)
+        self.exact = pairwise_repulsion(self.pos, self.radius, 30.0)
+
+    def error(self, depth, theta):
+        approx = _QuadTree(self.pos, self.radius, depth).repulsion(
+            30.0, theta)
+        return (np.linalg.norm(approx - self.exact, axis=1) /
+                np.linalg.norm(self.exact, axis=1))
+
+    def test_exact_without_approximation(self):
+        # one node per deepest cell and no cell opened: pair by pair
+        self.assertLess(self.error(10, 0.0).max(), 1e-9)
+
+    def test_close_to_pairwise(self):
+        self.assertLess(np.median(self.error(6, 0.8)), 0.15)
+
+    def test_coincident_nodes(self):
+        pos = np.zeros((4, 2))
+        force = _QuadTree(pos, np.ones(4), 3).repulsion(30.0, 0.8)
+        self.assertTrue(np.isfinite(force).all())
+
+
+class TestForceLayout(unittest.TestCase):
+    def test_connected_nodes_are_closer(self):
+        nodes = [Step() for _ in range(30)]
+        for a, b in zip(nodes, nodes[1:]):
+            connect(a, b)
+        positions = layout(nodes)
+        self.assertEqual(set(positions), {n.id for n in nodes})
+        pos = np.array([positions[n.id] for n in nodes])
+        self.assertTrue(np.isfinite(pos).all())
+        linked = np.hypot(*(pos[1:] - pos[:-1]).T).mean()
+        delta = pos[:, None, :] - pos[None, :, :]
+        overall = np.hypot(delta[..., 0], delta[..., 1]).sum() / (30 * 29)
+        self.assertLess(linked, overall / 2)
+
+    def test_start_pos(self):
+        nodes = [Step() for _ in range(10)]
+        positions = layout(nodes, start_pos=(50.0, -20.0))
+        pos = np.array(list(positions.values()))
+        np.testing.assert_allclose(pos.min(axis=0), [50.0, -20.0])
+
+    def test_pinned(self):
+        nodes = [Step() for _ in range(10)]
+        for node in nodes[1:]:
+            connect(nodes[0], node)
+        current = {n.id: (30.0 * i, 0.0) for i, n in enumerate(nodes)}
+        positions = layout(
+            nodes, positions=current, pinned=[nodes[0].id, nodes[5].id])
+        self.assertEqual(positions[nodes[0].id], (0.0, 0.0))
+        self.assertEqual(positions[nodes[5].id], (150.0, 0.0))
+        self.assertNotEqual(positions[nodes[1].id], current[nodes[1].id])
+
+    def test_all_pinned(self):
+        nodes = [Step() for _ in range(3)]
+        current = {n.id: (10.0 * i, 5.0) for i, n in enumerate(nodes)}
+        positions = layout(
+            nodes, positions=current, pinned=[n.id for n in nodes])
+        self.assertEqual(positions, current)
+
+    def test_coincident_start_positions(self):
+        nodes = [Step() for _ in range(20)]
+        current = {n.id: (0.0, 0.0) for n in nodes}
+        positions = layout(nodes, positions=current)
+        self.assertEqual(len(set(positions.values())), len(nodes))
+        pos = np.array(list(positions.values()))
+        self.assertGreater(np.ptp(pos, axis=0).max(), 100.0)
+
+    def test_deterministic(self):
+        nodes = [Step() for _ in range(15)]
+        for a, b in zip(nodes, nodes[1:]):
+            connect(a, b)
+        self.assertEqual(layout(nodes, seed=3), layout(nodes, seed=3))
+        self.assertNotEqual(layout(nodes, seed=3), layout(nodes, seed=4))
+
+    def test_empty(self):
+        self.assertEqual(layout([]), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
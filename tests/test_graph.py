@@ -0,0 +1,95 @@
+import unittest
+
+from easynode.core import Graph, Node, Port
+
+
+class Single(Node):
+    input_ports = [Port(name="in")]
+    output_ports = [Port(name="out")]
+
+
+def chain(n: int):
+    graph = Graph()
+    nodes = [Single() for _ in range(n)]
+    graph.add_nodes(*nodes)
+    graph.add_edges(*[
+        nodes[i - 1].create_edge(nodes[i], 0, 0) for i in range(1, n)])
+    return graph, nodes
+
+
+class TestElementsView(unittest.TestCase):
+    def test_indexing_follows_changes(self):
+        graph, nodes = chain(4)
+        self.assertEqual([graph.nodes[i] for i in range(4)], nodes)
+        self.assertIs(graph.nodes[-1], nodes[3])
+        graph.remove_node(nodes[1])
+        self.assertEqual(list(graph.nodes), [nodes[0]] + nodes[2:])
+        self.assertIs(graph.nodes[1], nodes[2])
+        self.assertEqual(len(graph.edges), 1)
+        self.assertIs(graph.edges[0].source_port.node, nodes[2])
+        new = Single()
+        graph.add_node(new)
+        self.assertIs(graph.nodes[3], new)
+        with self.assertRaises(IndexError):
+            graph.nodes[4]
+
+    def test_list_reused_between_changes(self):
+        graph, nodes = chain(3)
+        first = graph._nodes_list()
+        graph.nodes[0]
+        self.assertIs(graph._nodes_list(), first)
+        graph.add_node(Single())
+        self.assertIsNot(graph._nodes_list(), first)
+
+    def test_membership(self):
+        graph, nodes = chain(2)
+        self.assertIn(nodes[0], graph.nodes)
+        self.assertIn(graph.edges[0], graph.edges)
+        self.assertNotIn(Single(), graph.nodes)
+        self.assertNotIn("other", graph.nodes)
+
+
+class TestSignals(unittest.TestCase):
+    def setUp(self):
+        self.graph = Graph()
+        self.events = []
+        for name in (
+                "node_added", "node_removed", "edge_added", "edge_removed",
+                "elements_changed", "batch_changed"):
+            getattr(self.graph, name).connect(
+                lambda *args, name=name: self.events.append((name, args)))
+
+    def names(self):
+        return [name for name, _ in self.events]
+
+    def test_per_element_signals(self):
+        nodes = [Single(), Single()]
+        self.graph.add_nodes(*nodes)
+        self.assertEqual(self.names(), [
+            "node_added", "elements_changed",
+            "node_added", "elements_changed"])
+        self.assertEqual(
+            [args[0] for name, args in self.events if args], nodes)
+        del self.events[:]
+        self.graph.add_edges(nodes[0].create_edge(nodes[1], 0, 0))
+        self.graph.remove_nodes(nodes[0])
+        self.assertEqual(self.names(), [
+            "edge_added", "elements_changed",
+            "edge_removed", "elements_changed",
+            "node_removed", "elements_changed"])
+
+    def test_batch(self):
+        nodes = [Single(), Single(), Single()]
+        with self.graph.batch():
+            self.graph.add_nodes(*nodes)
+            self.graph.add_edges(nodes[0].create_edge(nodes[1], 0, 0))
+            self.graph.remove_node(nodes[2])
+        self.assertEqual(self.names(), ["batch_changed", "elements_changed"])
+        changes = self.events[0][1][0]
+        self.assertEqual(changes.added_nodes, nodes[:2])
+        self.assertEqual(len(changes.added_edges), 1)
+        self.assertEqual(changes.removed_nodes, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from easynode.core import Graph, Node, Port, DataPort
+from easynode.utils import graph_diff
+from easynode.utils.graph_diff import (
+    PATCHES_SUFFIX, IncrementalSaver, diff_graphs, is_empty_patch,
+    load_patched_graph, patches_are_current,
+)
+
+
+class Source(Node):
+    input_ports = [DataPort(name="value", data_type=int), Port(name="in")]
+    output_ports = [Port(name="out")]
+
+
+FACTORIES = {"Source": Source}
+
+
+def build(n: int) -> Graph:
+    graph = Graph()
+    nodes = [Source(pos=[i * 100.0, 0.0]) for i in range(n)]
+    graph.add_nodes(*nodes)
+    graph.add_edges(*[
+        nodes[i - 1].create_edge(nodes[i], 0, 1) for i in range(1, n)])
+    return graph
+
+
+class TestCrashRecovery(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, "graph.json")
+
+    def crash_before_new_patches(self, saver: IncrementalSaver):
+        """Write a snapshot, crashing between the graph file and the
+        patches file."""
+        write_file = graph_diff._write_file
+
+        def crashing_write(path, text):
+            if path.endswith(PATCHES_SUFFIX):
+                raise KeyboardInterrupt("crash")
+            write_file(path, text)
+
+        with mock.patch.object(graph_diff, "_write_file", crashing_write):
+            with self.assertRaises(KeyboardInterrupt):
+                saver.save_all()
+
+    def test_stale_patches_are_ignored(self):
+        graph = build(4)
+        saver = IncrementalSaver(graph, self.path)
+        saver.save_all()
+        new = Source(pos=[0.0, 100.0])
+        graph.add_node(new)
+        graph.add_edge(graph.nodes[0].create_edge(new, 0, 1))
+        saver.save()
+        new.name = "renamed"
+        self.crash_before_new_patches(saver)
+        self.assertFalse(patches_are_current(self.path))
+        loaded = load_patched_graph(self.path, FACTORIES)
+        self.assertEqual(len(loaded.nodes), 5)
+        self.assertEqual(len(loaded.edges), 4)
+        self.assertEqual(loaded.node_by_uid(new.uid).name, "renamed")
+        self.assertTrue(is_empty_patch(diff_graphs(graph, loaded)))
+
+    def test_patches_after_snapshot(self):
+        graph = build(3)
+        saver = IncrementalSaver(graph, self.path)
+        saver.save_all()
+        graph.remove_node(graph.nodes[2])
+        saver.save()
+        self.assertTrue(patches_are_current(self.path))
+        loaded = load_patched_graph(self.path, FACTORIES)
+        self.assertTrue(is_empty_patch(diff_graphs(graph, loaded)))
+
+
+class TestApplyPatch(unittest.TestCase):
+    def test_apply_twice(self):
+        old = build(3)
+        new = Graph.deserialize(old.serialize(), FACTORIES)
+        node = Source(pos=[0.0, 100.0])
+        new.add_node(node)
+        new.add_edge(new.nodes[0].create_edge(node, 0, 1))
+        patch = diff_graphs(old, new)
+        old.apply_patch(patch, FACTORIES)
+        old.apply_patch(patch, FACTORIES)
+        self.assertEqual(len(old.nodes), 4)
+        self.assertEqual(len(old.edges), 3)
+        self.assertTrue(is_empty_patch(diff_graphs(old, new)))
+
+
+if __name__ == "__main__":
+    unittest.main()
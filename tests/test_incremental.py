@@ -0,0 +1,51 @@
+import unittest
+
+from easynode.core import Node, Port
+from easynode.utils.incremental import IncrementalLayout
+
+
+class Single(Node):
+    input_ports = [Port(name="in")]
+    output_ports = [Port(name="out")]
+
+
+SIZE = (100.0, 50.0)
+
+
+class TestExtent(unittest.TestCase):
+    def test_removed_nodes_leave_no_gap(self):
+        layout = IncrementalLayout()
+        nodes = [Single() for _ in range(4)]
+        sizes = {node.id: SIZE for node in nodes}
+        placed = layout.update(nodes, sizes)
+        bottom = max(pos[1] for pos in placed.values())
+        # keep the first node, drop the ones stacked under it
+        kept = nodes[:1]
+        new = Single()
+        sizes[new.id] = SIZE
+        placed = layout.update(kept + [new], sizes)
+        first = layout.positions[kept[0].id]
+        self.assertEqual(
+            placed[new.id][1], first[1] + SIZE[1] + layout.padding_node)
+        self.assertLess(placed[new.id][1], bottom)
+        self.assertEqual(
+            layout.extent(),
+            (first[0], first[1], first[0] + SIZE[0],
+             placed[new.id][1] + SIZE[1]))
+
+    def test_extent_after_reset_and_move(self):
+        layout = IncrementalLayout()
+        nodes = [Single(), Single()]
+        sizes = {node.id: SIZE for node in nodes}
+        layout.reset(
+            {nodes[0].id: (0.0, 0.0), nodes[1].id: (500.0, 500.0)}, sizes)
+        layout.update(
+            nodes, sizes,
+            {nodes[0].id: (0.0, 0.0), nodes[1].id: (200.0, 0.0)})
+        self.assertEqual(layout.extent(), (0.0, 0.0, 300.0, 50.0))
+        layout.update([], sizes)
+        self.assertIsNone(layout.extent())
+
+
+if __name__ == "__main__":
+    unittest.main()
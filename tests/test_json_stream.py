@@ -0,0 +1,105 @@
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from easynode.core import Graph, Node, Port, DataPort
+from easynode.utils.json_stream import JsonGraphReader
+from easynode.utils.serialization import (
+    iter_graph_chunks, load_graph, load_graph_file,
+    serialize_nodes_and_edges,
+)
+
+
+class Inc(Node):
+    input_ports = [Port(name="x"), DataPort(name="step", data_type=float)]
+    output_ports = [Port(name="out")]
+
+
+def saved_graph(n: int) -> dict:
+    graph = Graph()
+    nodes = [Inc() for _ in range(n)]
+    for i, node in enumerate(nodes):
+        node.input_ports[1].value = i + 0.125
+    graph.add_nodes(*nodes)
+    graph.add_edges(*[
+        a.create_edge(b, 0, 0) for a, b in zip(nodes, nodes[1:])])
+    return serialize_nodes_and_edges(graph.nodes, graph.edges)
+
+
+def summary(graph) -> list:
+    index = {node: i for i, node in enumerate(graph.nodes)}
+    return [
+        sorted(
+            (type(n).__name__, n.input_ports[1].value) for n in graph.nodes),
+        sorted(
+            (index[e.source_port.node], index[e.target_port.node])
+            for e in graph.edges),
+    ]
+
+
+class TestJsonGraphReader(unittest.TestCase):
+    def test_small_blocks(self):
+        data = {"settings": [{"a": 1}], "nodes": [
+            {"id": 12345678, "name": "né☃", "x": -1.5e-3}] * 3,
+            "edges": [], "extra": {"k": [1, 2]}}
+        text = json.dumps(data, ensure_ascii=False, indent=1).encode()
+        # every block boundary ends up inside some token
+        for block_size in (1, 2, 3, 7):
+            reader = JsonGraphReader(io.BytesIO(text), block_size)
+            items = list(reader)
+            self.assertEqual(items[0], ("settings", data["settings"]))
+            self.assertEqual(
+                [v for k, v in items if k == "nodes"], data["nodes"])
+            self.assertEqual(items[-1], ("extra", data["extra"]))
+
+    def test_number_at_block_end(self):
+        reader = JsonGraphReader(io.BytesIO(b'{"n": 123456}'), 9)
+        self.assertEqual(list(reader), [("n", 123456)])
+
+    def test_not_an_object(self):
+        with self.assertRaises(ValueError):
+            list(JsonGraphReader(io.BytesIO(b'[1, 2]')))
+
+
+class TestLoadGraphFile(unittest.TestCase):
+    def write(self, data: dict) -> str:
+        fd, path = tempfile.mkstemp(suffix=".json")
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f)
+        return path
+
+    def test_same_as_load_graph(self):
+        data = saved_graph(50)
+        graph = load_graph_file(self.write(data), chunk_size=7)
+        self.assertEqual(summary(graph), summary(load_graph(data)))
+
+    def test_edges_before_nodes(self):
+        data = saved_graph(20)
+        reordered = {"edges": data["edges"], "settings": data["settings"],
+                     "nodes": data["nodes"]}
+        graph = load_graph_file(self.write(reordered), chunk_size=3)
+        self.assertEqual(summary(graph), summary(load_graph(data)))
+
+    def test_edge_to_missing_node(self):
+        data = saved_graph(5)
+        data["edges"][-1]["target"]["node_id"] = -1
+        with self.assertRaisesRegex(ValueError, "unknown node"):
+            load_graph(data)
+        with self.assertRaisesRegex(ValueError, "unknown node"):
+            load_graph_file(self.write(data))
+
+    def test_chunks(self):
+        data = saved_graph(10)
+        items = [("nodes", n) for n in data["nodes"]] + \
+            [("edges", e) for e in data["edges"]]
+        chunks = list(iter_graph_chunks(items, lambda d: Inc(), 4))
+        self.assertEqual(
+            [(len(n), len(e)) for n, e in chunks],
+            [(4, 0), (4, 0), (2, 2), (0, 4), (0, 3)])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+
+from easynode.core import Node, Port
+from easynode.utils.layout import (
+    GraphSnapshot, compute_levels, compute_positions,
+)
+
+
+class Step(Node):
+    input_ports = [Port(name="in")]
+    output_ports = [Port(name="out")]
+
+
+def connect(source, target):
+    edge = source.create_edge(target, 0, 0)
+    edge.source_port.on_edge_added(edge)
+    edge.target_port.on_edge_added(edge)
+    return edge
+
+
+def chain(n):
+    nodes = [Step() for _ in range(n)]
+    for a, b in zip(nodes, nodes[1:]):
+        connect(a, b)
+    return nodes
+
+
+class TestComputeLevels(unittest.TestCase):
+    def test_longest_path(self):
+        a, b, c, d = nodes = [Step() for _ in range(4)]
+        connect(a, b)
+        connect(b, c)
+        connect(a, c)
+        levels, feedback = compute_levels(nodes)
+        self.assertEqual(
+            [levels[n.id] for n in nodes], [0, 1, 2, 0])
+        self.assertEqual(feedback, [])
+
+    def test_deep_chain(self):
+        nodes = chain(20000)
+        levels, _ = compute_levels(nodes)
+        self.assertEqual(levels[nodes[-1].id], len(nodes) - 1)
+
+    def test_cycle(self):
+        a, b, c = nodes = chain(3)
+        back = connect(c, a)
+        levels, feedback = compute_levels(nodes)
+        self.assertEqual(feedback, [back])
+        self.assertEqual([levels[n.id] for n in nodes], [0, 1, 2])
+        with self.assertRaises(ValueError):
+            compute_levels(nodes, break_cycles=False)
+
+    def test_cycle_downstream_of_a_source(self):
+        source, a, b, after = nodes = chain(4)
+        connect(b, a)
+        levels, feedback = compute_levels(nodes)
+        self.assertEqual(len(feedback), 1)
+        self.assertEqual(
+            sorted(levels[n.id] for n in nodes), [0, 1, 2, 3])
+        self.assertEqual(levels[after.id], 3)
+
+    def test_self_loop(self):
+        node = Step()
+        loop = connect(node, node)
+        levels, feedback = compute_levels([node])
+        self.assertEqual(levels[node.id], 0)
+        self.assertEqual(feedback, [loop])
+
+    def test_only_given_nodes(self):
+        a, b, c = chain(3)
+        levels, _ = compute_levels([a, c])
+        self.assertEqual(levels, {a.id: 0, c.id: 0})
+
+
+class TestStackedPositions(unittest.TestCase):
+    def test_levels_mode(self):
+        nodes = [Step() for _ in range(3)]
+        connect(nodes[0], nodes[2])
+        connect(nodes[1], nodes[2])
+        snap = GraphSnapshot.from_nodes(
+            nodes, {n.id: (100.0, 50.0) for n in nodes})
+        positions = compute_positions(snap, "levels", start_pos=(0, 0))
+        self.assertEqual(positions, {
+            nodes[0].id: (0, 0), nodes[1].id: (0, 70.0),
+            nodes[2].id: (200.0, 0)})
+        positions = compute_positions(
+            snap, "levels", direction="TB", start_pos=(0, 0))
+        self.assertEqual(positions[nodes[1].id], (120.0, 0))
+        self.assertEqual(positions[nodes[2].id], (0, 150.0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import os
+import time
+import unittest
+
+from easynode.core import Node, Port
+from easynode.utils.layout import (
+    PROGRESS_STEP, GraphSnapshot, LayoutCancelled, compute_positions,
+)
+
+try:
+    from qtpy import QtWidgets
+except Exception:  # no Qt binding
+    QtWidgets = None
+
+
+class Step(Node):
+    input_ports = [Port(name="in")]
+    output_ports = [Port(name="out")]
+
+
+def chain_snapshot(n: int) -> GraphSnapshot:
+    nodes = [Step() for _ in range(n)]
+    for a, b in zip(nodes, nodes[1:]):
+        edge = a.create_edge(b, 0, 0)
+        edge.source_port.on_edge_added(edge)
+        edge.target_port.on_edge_added(edge)
+    return GraphSnapshot.from_nodes(
+        nodes, {node.id: (100.0, 50.0) for node in nodes})
+
+
+def pump(app, runner, timeout=30.0):
+    end = time.monotonic() + timeout
+    while runner.is_running and time.monotonic() < end:
+        runner.wait(0.01)
+        app.processEvents()
+    app.processEvents()
+
+
+class TestLevelsProgress(unittest.TestCase):
+    def test_reports_while_running(self):
+        snap = chain_snapshot(5 * PROGRESS_STEP)
+        reports = []
+        compute_positions(snap, "levels", progress=reports.append)
+        self.assertGreater(len(reports), 5)
+        self.assertEqual(reports, sorted(reports))
+        self.assertEqual(reports[-1], 1.0)
+
+    def test_cancel_before_the_end(self):
+        snap = chain_snapshot(5 * PROGRESS_STEP)
+        reports = []
+
+        def cancel(fraction):
+            reports.append(fraction)
+            raise LayoutCancelled()
+
+        with self.assertRaises(LayoutCancelled):
+            compute_positions(snap, "levels", progress=cancel)
+        self.assertLess(reports[0], 0.5)
+
+
+@unittest.skipIf(QtWidgets is None, "requires a Qt binding")
+class TestLayoutRunner(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        cls.app = QtWidgets.QApplication.instance() or \
+            QtWidgets.QApplication([])
+
+    def setUp(self):
+        from easynode import NodeEditor
+        from easynode.model import Node, Port
+
+        class Step(Node):
+            input_ports = [Port(name="in")]
+            output_ports = [Port(name="out")]
+
+        self.node_class = Step
+        self.editor = NodeEditor()
+        self.graph = self.editor.current_scene.graph
+        self.nodes = [Step() for _ in range(200)]
+        self.graph.add_nodes(*self.nodes)
+        self.graph.add_edges(*[
+            self.nodes[i - 1].create_edge(self.nodes[i], 0, 0)
+            for i in range(1, len(self.nodes))])
+        self.events = []
+
+    def tearDown(self):
+        self.editor.deleteLater()
+        self.app.processEvents()
+
+    def runner(self):
+        from easynode.utils.layout_runner import LayoutRunner
+        runner = LayoutRunner(self.graph)
+        runner.finished.connect(
+            lambda positions: self.events.append(("finished", positions)))
+        runner.cancelled.connect(lambda: self.events.append(("cancelled",)))
+        runner.failed.connect(lambda e: self.events.append(("failed", e)))
+        runner.progress.connect(lambda f: self.events.append(("progress",)))
+        return runner
+
+    def names(self):
+        return [e[0] for e in self.events if e[0] != "progress"]
+
+    def positions(self):
+        return [(n.item.pos().x(), n.item.pos().y()) for n in self.nodes]
+
+    def test_finished(self):
+        runner = self.runner()
+        runner.start(mode="levels")
+        pump(self.app, runner)
+        self.assertEqual(self.names(), ["finished"])
+        self.assertEqual(len(set(self.positions())), len(self.nodes))
+
+    def test_cancel(self):
+        before = self.positions()
+        runner = self.runner()
+        runner.start(mode="force", iterations=100000)
+        runner.cancel()
+        pump(self.app, runner)
+        self.assertEqual(self.names(), ["cancelled"])
+        self.assertEqual(self.positions(), before)
+
+    def test_replaced_job_is_cancelled(self):
+        runner = self.runner()
+        runner.start(mode="force", iterations=100000)
+        runner.start(mode="levels")
+        self.assertEqual(self.names(), ["cancelled"])
+        pump(self.app, runner)
+        self.assertEqual(self.names(), ["cancelled", "finished"])
+
+    def test_nodes_changed_meanwhile(self):
+        runner = self.runner()
+        runner.start(mode="levels")
+        runner.wait(30)
+        removed = self.nodes.pop()
+        self.graph.remove_node(removed)
+        new = self.node_class()
+        self.graph.add_node(new)
+        new.item.setPos(-500.0, -500.0)
+        pump(self.app, runner)
+        positions = self.events[-1][1]
+        self.assertEqual(len(positions), len(self.nodes))
+        self.assertNotIn(new.id, positions)
+        self.assertEqual((new.item.pos().x(), new.item.pos().y()),
+                         (-500.0, -500.0))
+
+    def test_failed(self):
+        runner = self.runner()
+        runner.start(mode="unknown")
+        pump(self.app, runner)
+        self.assertEqual(self.names(), ["failed"])
+        self.assertIsInstance(self.events[-1][1], ValueError)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,132 @@
+import os
+import unittest
+
+from easynode.core import Graph, Node, Port, DataPort
+from easynode.execution import GraphExecutor, ProcessBackend
+
+
+class Value(Node):
+    input_ports = [DataPort(name="x", data_type=int, data_default=3)]
+    output_ports = [Port(name="out")]
+
+    def process(self, x):
+        return x
+
+
+class Square(Node):
+    affinity = "process"
+    input_ports = [Port(name="x")]
+    output_ports = [Port(name="out"), Port(name="pid")]
+
+    @staticmethod
+    def process(x):
+        return x * x, os.getpid()
+
+
+class Fail(Node):
+    affinity = "process"
+    input_ports = [Port(name="x")]
+    output_ports = [Port(name="out")]
+
+    @staticmethod
+    def process(x):
+        raise KeyError(x)
+
+
+class Bound(Node):
+    affinity = "process"
+    output_ports = [Port(name="out")]
+
+    def process(self):
+        return 0
+
+
+class Pair(Node):
+    affinity = "process"
+    output_ports = [Port(name="a"), Port(name="b")]
+
+    @staticmethod
+    def process():
+        return 1, 2, 3
+
+
+class Local(Node):
+    output_ports = [Port(name="out")]
+
+    def process(self):
+        return lambda: 0
+
+
+class Inc(Node):
+    input_ports = [Port(name="x")]
+    output_ports = [Port(name="out")]
+
+    def process(self, x):
+        return x + 1
+
+
+class TestProcessBackend(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        # one pool for all the tests, spawning workers is slow
+        cls.backend = ProcessBackend(max_workers=2)
+        cls.backend.warm_up()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.backend.close()
+
+    def setUp(self):
+        self.graph = Graph()
+
+    def run_graph(self):
+        with GraphExecutor(
+                self.graph,
+                process_executor=self.backend.executor) as executor:
+            return executor.run(timeout=60)
+
+    def test_mixed_affinities(self):
+        value, square, inc = Value(), Square(), Inc()
+        self.graph.add_nodes(value, square, inc)
+        self.graph.add_edges(
+            value.create_edge(square, 0, 0), square.create_edge(inc, 0, 0))
+        result = self.run_graph()
+        self.assertTrue(result.ok, result.errors)
+        self.assertEqual(result.outputs[inc.id], (10,))
+        self.assertNotEqual(result.outputs[square.id][1], os.getpid())
+        self.assertEqual(square.status, "normal")
+
+    def test_error_in_worker(self):
+        value, fail, inc = Value(), Fail(), Inc()
+        self.graph.add_nodes(value, fail, inc)
+        self.graph.add_edges(
+            value.create_edge(fail, 0, 0), fail.create_edge(inc, 0, 0))
+        result = self.run_graph()
+        self.assertIsInstance(result.errors[fail.id], KeyError)
+        self.assertEqual(result.skipped, [inc])
+        self.assertEqual(fail.status, "error")
+
+    def test_process_must_be_static(self):
+        node = Bound()
+        self.graph.add_node(node)
+        result = self.run_graph()
+        self.assertIsInstance(result.errors[node.id], TypeError)
+        self.assertEqual(node.status, "error")
+
+    def test_unpicklable_input(self):
+        local, square = Local(), Square()
+        self.graph.add_nodes(local, square)
+        self.graph.add_edge(local.create_edge(square, 0, 0))
+        result = self.run_graph()
+        self.assertIn(square.id, result.errors)
+        self.assertEqual(square.status, "error")
+
+    def test_wrong_number_of_outputs(self):
+        node = Pair()
+        self.graph.add_node(node)
+        result = self.run_graph()
+        self.assertIsInstance(result.errors[node.id], ValueError)
+
+
+if __name__ == "__main__":
+    unittest.main()
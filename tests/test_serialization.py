@@ -0,0 +1,104 @@
+import json
+import os
+import tempfile
+import unittest
+
+from easynode.core import Graph, Node, Port, DataPort
+from easynode.setting import PortSetting
+from easynode.utils.serialization import (
+    load_graph, serialize_nodes_and_edges,
+)
+
+try:
+    from qtpy import QtWidgets
+except Exception:  # no Qt binding
+    QtWidgets = None
+
+
+def saved_graph(height: int, default: object) -> dict:
+    class Foo(Node):
+        input_ports = [DataPort(
+            "value", int, data_default=default,
+            setting=PortSetting(height=height))]
+        output_ports = [Port("out")]
+
+    graph = Graph()
+    graph.add_node(Foo())
+    return json.loads(json.dumps(
+        serialize_nodes_and_edges(graph.nodes, graph.edges)))
+
+
+class TestGenericNodes(unittest.TestCase):
+    def test_same_type_name_other_layout(self):
+        first = load_graph(saved_graph(30, 1)).nodes[0]
+        second = load_graph(saved_graph(50, True)).nodes[0]
+        self.assertIsNot(type(first), type(second))
+        port = second.input_ports[0]
+        self.assertEqual(port.setting.height, 50)
+        self.assertIs(port.data_default, True)
+
+    def test_same_layout_shares_class(self):
+        first = load_graph(saved_graph(30, 1)).nodes[0]
+        second = load_graph(saved_graph(30, 1)).nodes[0]
+        self.assertIs(type(first), type(second))
+
+
+@unittest.skipIf(QtWidgets is None, "requires a Qt binding")
+class TestEditorLoaders(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        cls.app = QtWidgets.QApplication.instance() or \
+            QtWidgets.QApplication([])
+
+    def setUp(self):
+        from easynode import NodeEditor
+        from easynode.model import Node, Port
+
+        class Tinted(Node):
+            theme_color = "#336699"
+            input_ports = [Port(name="in")]
+            output_ports = [Port(name="out")]
+
+        self.editor = NodeEditor()
+        self.editor.register_factory(Tinted)
+        graph = self.editor.current_scene.graph
+        self.nodes = [Tinted() for _ in range(3)]
+        self.nodes[0].item_setting.title_color = "#ff0000"
+        graph.add_nodes(*self.nodes)
+        graph.add_edge(self.nodes[0].create_edge(self.nodes[1], 0, 0))
+        self.graph = graph
+
+    def tearDown(self):
+        self.editor.deleteLater()
+        self.app.processEvents()
+
+    def check(self, graph):
+        colors = [n.item_setting.title_color for n in graph.nodes]
+        self.assertEqual(colors, ["#ff0000", "#336699", "#336699"])
+        # equal settings share one instance, as with `load_node`
+        self.assertIs(graph.nodes[1].item_setting,
+                      graph.nodes[2].item_setting)
+        self.assertEqual(len(graph.edges), 1)
+
+    def test_json(self):
+        from easynode.model import Graph
+        text = self.graph.serialize()
+        self.check(Graph.deserialize(text, self.editor))
+
+    def test_json_file(self):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        self.addCleanup(os.remove, path)
+        with os.fdopen(fd, "w") as f:
+            f.write(self.graph.serialize())
+        self.editor.load_graph_from_json_file(path)
+        self.check(self.editor.current_scene.graph)
+
+    def test_binary(self):
+        from easynode.model import Graph
+        blob = self.graph.serialize_binary()
+        self.check(Graph.deserialize_binary(blob, self.editor))
+
+
+if __name__ == "__main__":
+    unittest.main()
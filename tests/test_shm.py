@@ -0,0 +1,106 @@
+import glob
+import unittest
+
+import numpy as np
+
+from easynode.core import Graph, Node, Port, DataPort
+from easynode.execution import GraphExecutor, shm
+
+
+class Make(Node):
+    affinity = "process"
+    input_ports = [DataPort(name="n", data_type=int, data_default=100000)]
+    output_ports = [Port(name="a")]
+
+    @staticmethod
+    def process(n):
+        return np.ones(n)
+
+
+class AddOne(Node):
+    affinity = "process"
+    input_ports = [Port(name="a")]
+    output_ports = [Port(name="a")]
+
+    @staticmethod
+    def process(a):
+        return a + 1
+
+
+class Firsts(Node):
+    affinity = "process"
+    input_ports = [Port(name="a")]
+    output_ports = [Port(name="firsts")]
+
+    @staticmethod
+    def process(a):
+        return [float(x[0]) for x in a]
+
+
+def blocks():
+    return set(glob.glob("/dev/shm/psm_*"))
+
+
+class TestBlocks(unittest.TestCase):
+    def test_round_trip(self):
+        array = np.arange(12.0).reshape(3, 4)
+        desc = shm.share(array, 8)
+        self.assertIsInstance(desc, shm.SharedArray)
+        view = shm.open_shared(desc)
+        np.testing.assert_array_equal(view, array)
+        self.assertFalse(view.flags.writeable)
+        copy = shm.materialize(desc)
+        self.assertTrue(copy.flags.writeable)
+        shm.release(desc)
+        np.testing.assert_array_equal(copy, array)
+
+    def test_bytes_and_small_values(self):
+        desc = shm.share(b"x" * 100, 10)
+        self.assertEqual(shm.open_shared(desc), b"x" * 100)
+        shm.release(desc)
+        small = np.zeros(2)
+        self.assertIs(shm.share(small, 1024), small)
+        self.assertEqual(shm.share("text", 0), "text")
+
+    def test_views_outlive_release(self):
+        desc = shm.share(np.arange(100000.0), 8)
+        view = shm.open_shared(desc)[10:20]
+        shm.release(desc)
+        # a new block must not reuse the memory under the view
+        other = shm.share(np.zeros(100000), 8)
+        zeros = shm.open_shared(other)
+        self.assertEqual(view[0], 10.0)
+        self.assertEqual(zeros[0], 0.0)
+        del zeros
+        shm.release(other)
+        n_mapped = len(shm._mapped)
+        del view
+        shm.collect()
+        self.assertLess(len(shm._mapped), n_mapped)
+
+
+class TestExecutor(unittest.TestCase):
+    def test_released_outputs_stay_readable(self):
+        before = blocks()
+        graph = Graph()
+        make, a1, a2, firsts = Make(), AddOne(), AddOne(), Firsts()
+        graph.add_nodes(make, a1, a2, firsts)
+        graph.add_edges(
+            make.create_edge(a1, 0, 0), a1.create_edge(a2, 0, 0),
+            a1.create_edge(firsts, 0, 0), a2.create_edge(firsts, 0, 0))
+        with GraphExecutor(
+                graph, max_processes=2,
+                shared_memory_threshold=1024) as executor:
+            result = executor.run(timeout=60)
+        self.assertTrue(result.ok, result.errors)
+        self.assertEqual(sorted(result.outputs[firsts.id][0]), [2.0, 3.0])
+        for node, value in ((make, 1.0), (a1, 2.0), (a2, 3.0)):
+            array = result.outputs[node.id][0]
+            self.assertIsInstance(array, np.ndarray)
+            self.assertEqual(array.shape, (100000,))
+            self.assertTrue((array == value).all())
+        self.assertEqual(blocks(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from easynode.core import Graph, Node, Port, DataPort
+from easynode.setting import NodeItemSetting
+from easynode.utils.sqlite_store import (
+    GraphStore, load_graph_sqlite, save_graph_sqlite,
+)
+
+
+class Source(Node):
+    input_ports = [DataPort(name="value", data_type=int), Port(name="in")]
+    output_ports = [Port(name="out")]
+
+
+FACTORIES = {"Source": Source}
+
+
+def build(n: int) -> Graph:
+    """A chain of nodes 100 apart on the x axis."""
+    graph = Graph()
+    nodes = [Source(pos=[i * 100.0, 0.0]) for i in range(n)]
+    for i, node in enumerate(nodes):
+        node.input_ports[0].value = i
+    graph.add_nodes(*nodes)
+    graph.add_edges(*[
+        nodes[i - 1].create_edge(nodes[i], 0, 1) for i in range(1, n)])
+    return graph
+
+
+def summary(graph: Graph) -> tuple:
+    return (
+        sorted((n.uid, n.name, n.attrs, n.input_ports[0].value)
+               for n in graph.nodes),
+        sorted(e.uid for e in graph.edges),
+    )
+
+
+class TestGraphStore(unittest.TestCase):
+    def setUp(self):
+        self.store = GraphStore(":memory:")
+        self.addCleanup(self.store.close)
+        self.graph = build(10)
+        self.store.write_graph(self.graph)
+
+    def test_round_trip(self):
+        self.graph.nodes[0].item_setting = NodeItemSetting(
+            title_color="#00ff00")
+        self.store.write_graph(self.graph)
+        self.assertEqual(len(self.store), 10)
+        loaded = self.store.load_graph(FACTORIES)
+        self.assertEqual(summary(loaded), summary(self.graph))
+        self.assertIsInstance(loaded.nodes[0], Source)
+        node = loaded.node_by_uid(self.graph.nodes[0].uid)
+        self.assertEqual(node.item_setting.title_color, "#00ff00")
+
+    def test_save_writes_changes(self):
+        graph, store = self.graph, self.store
+        self.assertEqual(store.save(), 0)
+        first, last = graph.nodes[0], graph.nodes[-1]
+        first.attrs['pos'] = [5.0, 5.0]
+        first.input_ports[0].value = 42
+        graph.mark_changed(first)
+        graph.remove_node(last)
+        added = Source(pos=[0.0, 500.0])
+        graph.add_node(added)
+        graph.add_edge(first.create_edge(added, 0, 1))
+        # the first node, the removed one with its edge, the added one
+        # with its edge
+        self.assertEqual(store.save(), 5)
+        self.assertEqual(store.save(), 0)
+        loaded = store.load_graph(FACTORIES)
+        self.assertEqual(summary(loaded), summary(graph))
+
+    def test_load_region(self):
+        graph = self.store.load_region(150, -10, 450, 10, FACTORIES)
+        self.assertEqual(
+            sorted(n.attrs['pos'][0] for n in graph.nodes),
+            [200.0, 300.0, 400.0])
+        self.assertEqual(len(graph.edges), 2)
+
+    def test_parts_loaded_one_after_the_other(self):
+        graph = self.store.load_region(-10, -10, 250, 10, FACTORIES)
+        self.assertEqual((len(graph.nodes), len(graph.edges)), (3, 2))
+        self.store.track(graph)
+        # the edge from the node at 200 is loaded with the next part
+        self.store.load_region(250, -10, 450, 10, FACTORIES, graph)
+        self.assertEqual((len(graph.nodes), len(graph.edges)), (5, 4))
+        # loading a part again adds nothing, and nothing is to save
+        self.store.load_region(-10, -10, 450, 10, FACTORIES, graph)
+        self.assertEqual((len(graph.nodes), len(graph.edges)), (5, 4))
+        self.assertEqual(self.store.save(), 0)
+
+    def test_load_subgraph(self):
+        middle = self.graph.nodes[5]
+        graph = self.store.load_subgraph([middle.uid], 0, FACTORIES)
+        self.assertEqual([n.uid for n in graph.nodes], [middle.uid])
+        graph = self.store.load_subgraph([middle.uid], 2, FACTORIES)
+        self.assertEqual(
+            sorted(n.uid for n in graph.nodes),
+            sorted(n.uid for n in self.graph.nodes[3:8]))
+        self.assertEqual(len(graph.edges), 4)
+        graph = self.store.load_subgraph([-1], 3, FACTORIES)
+        self.assertEqual(len(graph.nodes), 0)
+
+
+class TestSqliteFile(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.path = os.path.join(self.tmp, "graph.db")
+
+    def test_reopen(self):
+        graph = build(5)
+        graph.nodes[1].item_setting = NodeItemSetting(title_color="#0000ff")
+        save_graph_sqlite(graph, self.path)
+        loaded = load_graph_sqlite(self.path, FACTORIES)
+        self.assertEqual(summary(loaded), summary(graph))
+        node = loaded.node_by_uid(graph.nodes[1].uid)
+        self.assertEqual(node.item_setting.title_color, "#0000ff")
+        with GraphStore(self.path) as store:
+            store.track(loaded)
+            loaded.remove_node(loaded.node_by_uid(graph.nodes[0].uid))
+            self.assertEqual(store.save(), 2)
+        self.assertEqual(len(load_graph_sqlite(self.path).nodes), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
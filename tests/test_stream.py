@@ -0,0 +1,164 @@
+import threading
+import time
+import unittest
+
+from easynode.core import Graph, Node, Port, DataPort, StreamPort
+from easynode.execution import GraphExecutor
+from easynode.execution.stream import Channel, StreamClosed, pump
+
+
+class Source(Node):
+    input_ports = [DataPort(name="n", data_type=int, data_default=20)]
+    output_ports = [StreamPort(name="chunks")]
+
+    def process(self, n):
+        return iter(range(n))
+
+
+class Double(Node):
+    input_ports = [StreamPort(name="chunks")]
+    output_ports = [StreamPort(name="chunks")]
+
+    def process(self, chunks):
+        return (2 * c for c in chunks)
+
+
+class Total(Node):
+    input_ports = [StreamPort(name="chunks")]
+    output_ports = [Port(name="total")]
+
+    def process(self, chunks):
+        return sum(chunks)
+
+
+class First(Node):
+    input_ports = [StreamPort(name="chunks")]
+    output_ports = [Port(name="first")]
+
+    def process(self, chunks):
+        return next(iter(chunks))
+
+
+class Broken(Node):
+    input_ports = [StreamPort(name="chunks")]
+    output_ports = [StreamPort(name="chunks")]
+
+    def process(self, chunks):
+        def gen():
+            for i, c in enumerate(chunks):
+                if i == 3:
+                    raise RuntimeError("bad chunk")
+                yield c
+        return gen()
+
+
+def stream_threads():
+    return [
+        t for t in threading.enumerate()
+        if t.name.startswith("easynode-stream")]
+
+
+class TestChannel(unittest.TestCase):
+    def test_pump_to_channels(self):
+        channels = [Channel(1), Channel(1)]
+        ends = []
+        thread = threading.Thread(
+            target=pump, args=(range(5), channels, ends.append))
+        thread.start()
+        first = iter(channels[0])
+        received = [next(first)]
+        channels[0].close()
+        self.assertEqual(list(channels[1]), [0, 1, 2, 3, 4])
+        thread.join(5)
+        self.assertEqual(received, [0])
+        self.assertEqual(ends, [None])
+
+    def test_closed_channel(self):
+        channel = Channel(1)
+        channel.close()
+        with self.assertRaises(StreamClosed):
+            channel.put(1)
+
+    def test_producer_error_reaches_consumers(self):
+        def chunks():
+            yield 1
+            raise RuntimeError("producer")
+
+        channel = Channel(1)
+        ends = []
+        threading.Thread(
+            target=pump, args=(chunks(), [channel], ends.append)).start()
+        with self.assertRaises(RuntimeError):
+            list(channel)
+        self.assertIsInstance(ends[0], RuntimeError)
+
+
+class TestStreams(unittest.TestCase):
+    def setUp(self):
+        self.graph = Graph()
+
+    def connect(self, source, target):
+        self.graph.add_edge(source.create_edge(target, 0, 0))
+
+    def wait_for_stream_threads(self):
+        deadline = time.monotonic() + 5
+        while stream_threads() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(stream_threads(), [])
+
+    def test_pipeline(self):
+        source, double, total, first = Source(), Double(), Total(), First()
+        self.graph.add_nodes(source, double, total, first)
+        self.connect(source, double)
+        self.connect(double, total)
+        self.connect(source, first)
+        with GraphExecutor(self.graph, max_workers=2) as executor:
+            result = executor.run(timeout=10)
+        self.assertTrue(result.ok, result.errors)
+        self.assertEqual(result.outputs[total.id], (380,))
+        self.assertEqual(result.outputs[first.id], (0,))
+        self.assertEqual(result.outputs[source.id], (None,))
+        self.wait_for_stream_threads()
+        self.assertEqual(source.status, "normal")
+
+    def test_one_worker_two_consumers(self):
+        source, a, b = Source(), Total(), Total()
+        source.input_ports[0].value = 100
+        self.graph.add_nodes(source, a, b)
+        self.connect(source, a)
+        self.connect(source, b)
+        with GraphExecutor(self.graph, max_workers=1) as executor:
+            result = executor.run(timeout=10)
+        self.assertEqual(result.outputs[a.id], (4950,))
+        self.assertEqual(result.outputs[b.id], (4950,))
+
+    def test_one_worker_pipeline_and_other_nodes(self):
+        source, double, totals = Source(), Double(), [Total(), Total()]
+        self.graph.add_nodes(source, double, *totals)
+        self.connect(source, double)
+        for total in totals:
+            self.connect(double, total)
+        with GraphExecutor(self.graph, max_workers=1) as executor:
+            result = executor.run(timeout=10)
+            self.assertEqual(
+                [result.outputs[t.id] for t in totals], [(380,), (380,)])
+            # consumers pull their producers in again
+            result = executor.submit([totals[0]]).result(10)
+        self.assertEqual(result.outputs[totals[0].id], (380,))
+        self.assertIn(source.id, result.outputs)
+
+    def test_error_in_the_middle(self):
+        source, broken, total = Source(), Broken(), Total()
+        self.graph.add_nodes(source, broken, total)
+        self.connect(source, broken)
+        self.connect(broken, total)
+        with GraphExecutor(self.graph) as executor:
+            result = executor.run(timeout=10)
+        self.assertIsInstance(result.errors[total.id], RuntimeError)
+        self.wait_for_stream_threads()
+        self.assertIsInstance(result.errors[broken.id], RuntimeError)
+        self.assertEqual(broken.status, "error")
+
+
+if __name__ == "__main__":
+    unittest.main()
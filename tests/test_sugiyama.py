@@ -0,0 +1,105 @@
+import random
+import unittest
+
+import numpy as np
+
+from easynode.core import Node, Port
+from easynode.utils.sugiyama import _inversions, sugiyama_layout
+
+
+class Step(Node):
+    input_ports = [Port(name="a"), Port(name="b")]
+    output_ports = [Port(name="out")]
+
+
+def connect(source, target, t_idx=0):
+    edge = source.create_edge(target, 0, t_idx)
+    edge.source_port.on_edge_added(edge)
+    edge.target_port.on_edge_added(edge)
+
+
+def layout(nodes, **kwargs):
+    sizes = {n.id: (100.0, 40.0) for n in nodes}
+    return sugiyama_layout(nodes, sizes, start_pos=(0, 0), **kwargs)
+
+
+def crossings(nodes, positions):
+    """Crossings between edges of adjacent levels, pair by pair."""
+    segments = []
+    for node in nodes:
+        for edge in node.iter_output_edges():
+            target = edge.target_port.node
+            segments.append((
+                positions[node.id], positions[target.id]))
+    total = 0
+    for i, (a0, b0) in enumerate(segments):
+        for a1, b1 in segments[i + 1:]:
+            if a0[0] == a1[0] and b0[0] == b1[0]:
+                total += (a0[1] - a1[1]) * (b0[1] - b1[1]) < 0
+    return total
+
+
+class TestSugiyama(unittest.TestCase):
+    def test_inversions(self):
+        rng = random.Random(0)
+        for m in (0, 1, 2, 7, 64, 100):
+            r = [rng.randrange(10) for _ in range(m)]
+            expected = sum(
+                r[i] > r[j] for i in range(m) for j in range(i + 1, m))
+            self.assertEqual(_inversions(np.array(r)), expected)
+
+    def test_untangles_crossed_edges(self):
+        a1, a2, b1, b2 = nodes = [Step() for _ in range(4)]
+        connect(a1, b2)
+        connect(a2, b1)
+        for method in ("barycenter", "median"):
+            positions = layout(nodes, method=method)
+            self.assertEqual(crossings(nodes, positions), 0)
+            self.assertEqual(positions[a1.id][0], positions[a2.id][0])
+            self.assertEqual(positions[b1.id][0], 200.0)
+
+    def test_fewer_crossings_than_input_order(self):
+        rng = random.Random(1)
+        levels = [[Step() for _ in range(8)] for _ in range(4)]
+        for upper, lower in zip(levels, levels[1:]):
+            for target in lower:
+                connect(rng.choice(upper), target)
+                connect(rng.choice(upper), target, 1)
+        nodes = [n for level in levels for n in level]
+        stacked = {
+            n.id: (200.0 * i, 60.0 * j)
+            for i, level in enumerate(levels) for j, n in enumerate(level)}
+        positions = layout(nodes)
+        self.assertLess(
+            crossings(nodes, positions), crossings(nodes, stacked))
+
+    def test_no_overlaps(self):
+        rng = random.Random(2)
+        nodes = [Step() for _ in range(60)]
+        for i in range(1, len(nodes)):
+            connect(nodes[rng.randrange(i)], nodes[i], rng.randrange(2))
+        positions = layout(nodes, padding_node=20.0)
+        columns = {}
+        for x, y in positions.values():
+            columns.setdefault(x, []).append(y)
+        for ys in columns.values():
+            ys.sort()
+            self.assertTrue(all(
+                b - a >= 60.0 - 1e-9 for a, b in zip(ys, ys[1:])))
+
+    def test_long_edges_and_cycles(self):
+        a, b, c = nodes = [Step() for _ in range(3)]
+        connect(a, b)
+        connect(b, c)
+        connect(a, c, 1)
+        connect(c, a, 1)
+        positions = layout(nodes, direction="TB")
+        self.assertEqual(
+            [positions[n.id][1] for n in nodes], [0.0, 140.0, 280.0])
+
+    def test_empty(self):
+        self.assertEqual(layout([]), {})
+
+
+if __name__ == "__main__":
+    unittest.main()